@@ -0,0 +1,168 @@
+"""
+Token budgets for composed output (--max-tokens).
+
+Notes are taken in the order they arrive, which is rank order for every
+composition command, until the budget runs out: the note that crosses the
+limit is trimmed to the tokens left (when enough are left to be useful), and
+everything after it is dropped. Forwarded stdin from an earlier stage is
+charged too, estimated from its byte count since it is never read into
+Python.
+
+Tokens are counted with tiktoken when it is installed and otherwise
+estimated from the character count. Real counts are cached in the state
+store, keyed by the tokenizer and the note's content hash (the same digest
+the catalog records), so unchanged notes are never re-tokenized.
+"""
+
+from functools import cache
+from typing import Callable
+import logging
+import sys
+
+from tap.database.obsidian.catalog import hash_bytes
+
+logger = logging.getLogger(__name__)
+
+TIKTOKEN_ENCODING = "o200k_base"
+# Rough average for English prose; used when tiktoken isn't available
+CHARS_PER_TOKEN = 4
+BYTES_PER_TOKEN = 4
+# Trimming a note to fewer tokens than this isn't worth it; drop it instead
+MIN_TRIMMED_TOKENS = 64
+TRUNCATION_MARKER = "\n[... truncated to fit the token budget]"
+
+
+class Tokenizer:
+    """
+    Counts and truncates text in tokens. `name` identifies the tokenizer in
+    the count cache; None means counts are estimates and aren't cached.
+    """
+
+    def __init__(
+        self,
+        name: str | None,
+        encode: Callable[[str], list[int]] | None = None,
+        decode: Callable[[list[int]], str] | None = None,
+    ):
+        self.name = name
+        self._encode = encode
+        self._decode = decode
+
+    def count(self, text: str) -> int:
+        if self._encode is None:
+            return -(-len(text) // CHARS_PER_TOKEN)
+        return len(self._encode(text))
+
+    def truncate(self, text: str, tokens: int) -> str:
+        if self._encode is None or self._decode is None:
+            cut = text[: tokens * CHARS_PER_TOKEN]
+            # Prefer ending on a line boundary if one is reasonably close
+            newline = cut.rfind("\n")
+            return cut[:newline] if newline > len(cut) // 2 else cut
+        return self._decode(self._encode(text)[:tokens])
+
+
+@cache
+def get_tokenizer() -> Tokenizer:
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except ImportError:
+        return Tokenizer(None)
+    except Exception as e:
+        # e.g. the encoding file couldn't be downloaded
+        logger.warning(f"tiktoken unavailable ({e}); estimating token counts")
+        return Tokenizer(None)
+    return Tokenizer(
+        f"tiktoken:{TIKTOKEN_ENCODING}",
+        lambda text: encoding.encode(text, disallowed_special=()),
+        encoding.decode,
+    )
+
+
+def token_budget(max_tokens: int | None) -> "TokenBudget | None":
+    return None if max_tokens is None else TokenBudget(max_tokens)
+
+
+class TokenBudget:
+    def __init__(self, max_tokens: int, tokenizer: Tokenizer | None = None):
+        self.max_tokens = max_tokens
+        self.tokenizer = tokenizer or get_tokenizer()
+        self.used = 0
+        self.kept: list[str] = []
+        self.trimmed: list[str] = []
+        # Set once a note has been trimmed or dropped: nothing later fits
+        self.cut = False
+        self._new_counts: dict[str, int] = {}
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.max_tokens - self.used)
+
+    def charge_bytes(self, size: int):
+        """
+        Charge text that passed through without being counted (stdin).
+        """
+        self.used += -(-size // BYTES_PER_TOKEN)
+
+    def count(self, content: str) -> int:
+        """
+        Tokens in a note, from the cache when this content was counted before.
+        """
+        tokenizer = self.tokenizer
+        if tokenizer.name is None:
+            return tokenizer.count(content)
+        from tap.storage.state import get_state
+
+        digest = hash_bytes(content.encode("utf-8"))
+        tokens = self._new_counts.get(digest)
+        if tokens is None:
+            tokens = get_state().get_token_count(tokenizer.name, digest)
+        if tokens is None:
+            tokens = tokenizer.count(content)
+            self._new_counts[digest] = tokens
+        return tokens
+
+    def fit(self, title: str, content: str, wrapper: str = "") -> str | None:
+        """
+        The part of this note that fits: the whole note, a trimmed prefix,
+        or None to drop it. `wrapper` is the text written around it.
+        """
+        if self.cut:
+            return None
+        overhead = self.tokenizer.count(wrapper) if wrapper else 0
+        tokens = self.count(content) + overhead
+        if tokens <= self.remaining:
+            self.used += tokens
+            self.kept.append(title)
+            return content
+        self.cut = True
+        room = self.remaining - overhead - self.tokenizer.count(TRUNCATION_MARKER)
+        if room < MIN_TRIMMED_TOKENS:
+            return None
+        trimmed = self.tokenizer.truncate(content, room) + TRUNCATION_MARKER
+        self.used = self.max_tokens
+        self.kept.append(title)
+        self.trimmed.append(title)
+        return trimmed
+
+    def finish(self):
+        """
+        Save new token counts and, if the budget cut anything, say so on
+        stderr.
+        """
+        if self._new_counts and self.tokenizer.name is not None:
+            from tap.storage.state import get_state
+
+            get_state().set_token_counts(self.tokenizer.name, self._new_counts)
+            self._new_counts = {}
+        if self.cut:
+            approx = "" if self.tokenizer.name else "~"
+            trimmed = f", trimmed '{self.trimmed[0]}'" if self.trimmed else ""
+            print(
+                f"Token budget of {self.max_tokens} reached: kept "
+                f"{len(self.kept)} notes ({approx}{self.used} tokens){trimmed}, "
+                "dropped the rest",
+                file=sys.stderr,
+            )
@@ -0,0 +1,91 @@
+"""
+Alias management: `tap alias`, `tap alias NAME TITLE|-g INDEX`, `tap alias rm
+NAME`, and `tap -a NAME` to output an aliased note. Aliases live in the state
+store alongside their usage counts.
+
+`tap -a` is the fastest path in the tool: the alias record holds the note's
+absolute path, so resolving it is one indexed lookup and one open. The vault,
+catalog and search engines are only touched if the note has moved.
+"""
+
+from pathlib import Path
+import sys
+
+from tap.cli.display import get_console, print_error
+from tap.storage.state import get_state
+
+
+def handle_alias_get(name: str, raw: bool = False, max_tokens: int | None = None):
+    from tap.cli.budget import token_budget
+    from tap.cli.output import stream_notes
+    from tap.database.obsidian.reader import read_note_file
+
+    state = get_state()
+    alias = state.get_alias(name)
+    if alias is None:
+        print_error(f"No alias named '{name}'")
+        sys.exit(1)
+    path = alias.path
+    try:
+        # The open's fstat is the only stat on the fast path
+        note_file = read_note_file(Path(path)) if path else None
+    except FileNotFoundError:
+        note_file = None
+    except OSError as e:
+        print_error(f"Error reading {path}: {e}")
+        sys.exit(1)
+    if note_file is None:
+        # Moved or renamed: re-resolve the title through the catalog
+        from tap.daemon.client import call
+
+        located = call("locate", titles=[alias.title])
+        if not located:
+            print_error(f"Alias '{name}' points to missing note '{alias.title}'")
+            sys.exit(1)
+        path = located[0][1]
+        note_file = read_note_file(Path(path))
+    state.record_alias_use(name, path if path != alias.path else None)
+    stream_notes(
+        [(alias.title, note_file.content)],
+        raw=raw or None,
+        tag=alias.tag or name,
+        budget=token_budget(max_tokens),
+    )
+
+
+def handle_alias_remove(name: str):
+    if not get_state().remove_alias(name):
+        print_error(f"No alias named '{name}'")
+        sys.exit(1)
+
+
+def handle_alias_list():
+    aliases = get_state().list_aliases()
+    if not aliases:
+        print_error("No aliases defined. Create one with `tap alias NAME TITLE`.")
+        return
+    console = get_console()
+    for alias in aliases:
+        console.print(
+            f"[yellow]{alias.name}[/yellow] -> [green]{alias.title}[/green]"
+            f"[blue].md[/blue] ({alias.use_count} uses)"
+        )
+
+
+def handle_alias_create(name: str, index: int | None = None, title: str | None = None):
+    from tap.cli.commands.search import retrieve_titles
+    from tap.daemon.client import call
+
+    if index is not None:
+        titles = retrieve_titles()
+        if not 1 <= index <= len(titles):
+            print_error(f"No search result at index {index}")
+            sys.exit(1)
+        title = titles[index - 1]
+    located = call("locate", titles=[title])
+    if not located:
+        print_error(f"No note titled '{title}'")
+        sys.exit(1)
+    title, path = located[0]
+    get_state().set_alias(name, title, path)
+    print(f"{name} -> {title}")
@@ -0,0 +1,12 @@
+from tap.cli.output import discard_stdout
+from tap.cli.pipe import passthrough
+
+
+def handle_passthrough(tag: str):
+    """
+    tap -p TAG: tag stdin without a file lookup.
+    """
+    try:
+        passthrough(tag)
+    except BrokenPipeError:
+        discard_stdout()
@@ -0,0 +1,74 @@
+"""
+The pool: a working set of notes collected with `tap stow` and written out
+together with `tap pool pour` / `tap pool drain`.
+"""
+
+import sys
+
+from tap.cli.display import display_titles, print_error
+from tap.storage.state import get_state
+
+
+def handle_pool_show():
+    titles = get_state().pool_titles()
+    if not titles:
+        print_error("Pool is empty. Add notes with `tap stow INDEX`.")
+        return
+    display_titles(titles)
+
+
+def pour(
+    raw: bool = False, max_tokens: int | None = None
+) -> tuple[list[str], list[str]]:
+    """
+    Stream every pooled note to stdout. Returns the pooled titles and those
+    written in full (a token budget may trim or drop some, and a closed pipe
+    ends the stream early).
+    """
+    from tap.cli.budget import token_budget
+    from tap.cli.output import read_located, stream_notes
+    from tap.daemon.client import call
+
+    titles = get_state().pool_titles()
+    if not titles:
+        return titles, titles
+    budget = token_budget(max_tokens)
+    written: list[str] = []
+    stream_notes(
+        read_located(call("locate", titles=titles)),
+        raw=raw or None,
+        budget=budget,
+        written=written,
+    )
+    if budget is None:
+        return titles, written
+    return titles, [title for title in written if title not in budget.trimmed]
+
+
+def handle_pool_pour(raw: bool = False, max_tokens: int | None = None):
+    titles, _ = pour(raw, max_tokens)
+    if not titles:
+        print_error("Pool is empty.")
+        sys.exit(1)
+
+
+def handle_pool_drain(raw: bool = False, max_tokens: int | None = None):
+    titles, written = pour(raw, max_tokens)
+    if not titles:
+        print_error("Pool is empty.")
+        sys.exit(1)
+    # Only what was poured in full; notes stowed meanwhile, cut by the token
+    # budget or lost to a closed pipe stay in the pool
+    get_state().pool_discard(written)
+
+
+def handle_pool_remove(index: int):
+    state = get_state()
+    if state.pool_remove(index) is None:
+        print_error(f"No pool item at index {index}")
+        sys.exit(1)
+    display_titles(state.pool_titles())
+
+
+def handle_pool_clear():
+    get_state().pool_clear()
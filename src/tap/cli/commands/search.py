@@ -0,0 +1,308 @@
+"""
+Search and retrieval handlers: the default `tap "query"` command plus the
+-l / -g / -d / -c / -H / --passages flags, the link-graph flags
+(--connected, --network, --referenced-by) and the metadata filters (--recent,
+--context-for, --tag, --property). Operations go through the tap
+daemon when it's running and run in-process otherwise; either way heavy
+modules (vault, rapidfuzz, rich) are only imported once a handler needs them.
+"""
+
+from typing import Iterable
+import re
+import sys
+
+from tap.cli.display import display_titles, print_error
+from tap.cli.output import read_located, stream_notes
+from tap.daemon.client import call
+from tap.storage.state import get_state
+
+
+def shelve_matches(matches: list[tuple[str, int, int]]):
+    """
+    Store full matches as the last results.
+    """
+    get_state().set_matches(matches)
+
+
+def retrieve_matches() -> list[tuple[str, int, int]]:
+    """
+    Retrieve full matches from the last results.
+    """
+    return get_state().get_matches()
+
+
+def retrieve_titles() -> list[str]:
+    """
+    Retrieve only titles from the last results.
+    """
+    matches = retrieve_matches()
+    return [title for title, _, _ in matches]
+
+
+def parse_filters(
+    recent: str | None = None,
+    context_for: str | None = None,
+    tags: list[str] | None = None,
+    keys: list[str] | None = None,
+) -> dict:
+    """
+    Metadata filters for the search operations; empty when none were given.
+    """
+    filters: dict = {}
+    if recent or context_for:
+        from tap.database.local.metadata_index import context_window, recent_window
+
+        try:
+            if recent:
+                filters.update(recent_window(recent))
+            if context_for:
+                filters.update(context_window(context_for))
+        except ValueError as e:
+            print_error(str(e))
+            sys.exit(1)
+    if tags:
+        filters["tags"] = tags
+    if keys:
+        filters["keys"] = keys
+    return filters
+
+
+FILTERLESS_FLAGS = {
+    "passthrough": "--passthrough",
+    "alias": "-a",
+    "last": "-l",
+    "get": "-g",
+    "date_range": "-d",
+    "passages": "--passages",
+}
+
+
+def reject_filters(**used):
+    """
+    Exit with an error if a flag that ignores the metadata filters was used
+    alongside them, rather than silently returning unfiltered notes.
+    """
+    flags = [FILTERLESS_FLAGS[name] for name, value in used.items() if value]
+    if flags:
+        print_error(
+            "--recent, --context-for, --tag and --property can't be combined "
+            f"with {', '.join(flags)}"
+        )
+        sys.exit(1)
+
+
+def _filter_params(filters: dict | None) -> dict:
+    # Only sent when set, so plain searches keep their usual call
+    return {"filters": filters} if filters else {}
+
+
+def get_fuzzy_matches(
+    query: str, limit: int = 5, filters: dict | None = None
+) -> list[str]:
+    matches: list[tuple[str, int, int]] = call(
+        "search", query=query, limit=limit, **_filter_params(filters)
+    )
+    shelve_matches(matches)
+    titles = [title for title, _, _ in matches]
+    return titles
+
+
+def get_content_matches(
+    query: str, limit: int = 5, filters: dict | None = None
+) -> list[str]:
+    matches: list[tuple[str, float, int]] = call(
+        "content_search", query=query, limit=limit, **_filter_params(filters)
+    )
+    shelve_matches(matches)
+    return [title for title, _, _ in matches]
+
+
+def get_hybrid_matches(
+    query: str, limit: int = 5, filters: dict | None = None
+) -> list[str]:
+    matches: list[tuple[str, float, int]] = call(
+        "hybrid_search", query=query, limit=limit, **_filter_params(filters)
+    )
+    shelve_matches(matches)
+    return [title for title, _, _ in matches]
+
+
+def get_filtered_notes(filters: dict, limit: int) -> list[str]:
+    """
+    Notes passing the metadata filters, most recently modified first.
+    """
+    matches: list[tuple[str, float, int]] = call(
+        "filter_notes", filters=filters, limit=limit
+    )
+    shelve_matches(matches)
+    return [title for title, _, _ in matches]
+
+
+def get_vector_matches(
+    query: str, limit: int = 5, filters: dict | None = None
+) -> list[str]:
+    results: list[tuple[str, float]] = call(
+        "vector_search", query=query, limit=limit, **_filter_params(filters)
+    )
+    # Same (title, score, index) shape as fuzzy matches
+    matches = [(title, score, index) for index, (title, score) in enumerate(results)]
+    shelve_matches(matches)
+    return [title for title, _, _ in matches]
+
+
+def get_passages(
+    query: str, limit: int = 5
+) -> list[tuple[str, str, int, float, str, str | None]]:
+    """
+    Best (note, heading, chunk index, distance, text, hash) passages for
+    `query`. Their notes are shelved, best first, so -g opens the full note.
+    """
+    passages = call("passage_search", query=query, limit=limit)
+    notes = list(dict.fromkeys(note for note, *_ in passages))
+    shelve_matches([(note, 0, index) for index, note in enumerate(notes)])
+    return passages
+
+
+def format_passage(note: str, heading: str, text: str) -> str:
+    from xml.sax.saxutils import escape, quoteattr
+
+    source = f"{note} > {heading}" if heading else note
+    return f"<passage source={quoteattr(source)}>\n{escape(text)}\n</passage>\n"
+
+
+def get_linked_matches(title: str, hops: int, reverse: bool = False) -> list[str]:
+    """
+    Notes around `title` in the link graph. Backlink lookups leave out the
+    note itself.
+    """
+    matches: list[tuple[str, int, int]] = call(
+        "network", title=title, hops=hops, reverse=reverse
+    )
+    if reverse:
+        matches = [(t, d, i) for i, (t, d, _) in enumerate(matches[1:])]
+    shelve_matches(matches)
+    return [title for title, _, _ in matches]
+
+
+def get_exact_match(query: str, filters: dict | None = None) -> list[str]:
+    matches: list[tuple[str, int, int]] = call(
+        "search", query=query, exact=True, **_filter_params(filters)
+    )
+    shelve_matches(matches)
+    return [title for title, _, _ in matches]
+
+
+def get_document(index: int) -> str | None:
+    titles = retrieve_titles()
+    if not 0 <= index < len(titles):
+        return None
+    return call("get", title=titles[index])
+
+
+def validate_date_range(date_range: str) -> bool:
+    pattern = r"^\d{4}-\d{2}-\d{2}:\d{4}-\d{2}-\d{2}$"
+    return bool(re.match(pattern, date_range))
+
+
+def get_date_range(date_range: str) -> Iterable[tuple[str, str]]:
+    """
+    (date, content) for each daily note in the range, read lazily in order.
+    """
+    date_one, date_two = date_range.split(":")
+    return read_located(call("date_range_paths", start=date_one, end=date_two))
+
+
+def handle_show_last():
+    display_titles(retrieve_titles())
+
+
+def handle_get(index: int, raw: bool = False, max_tokens: int | None = None):
+    from tap.cli.budget import token_budget
+
+    titles = retrieve_titles()
+    located = call("locate", titles=titles[index - 1 : index]) if index > 0 else []
+    budget = token_budget(max_tokens)
+    written = stream_notes(read_located(located), raw=raw or None, budget=budget)
+    if not written and not (budget and budget.cut):
+        print_error(f"No document found at index {index}")
+        sys.exit(1)
+
+
+def handle_date_range(
+    date_range: str, raw: bool = False, max_tokens: int | None = None
+):
+    from tap.cli.budget import token_budget
+
+    if not validate_date_range(date_range):
+        print_error("Invalid date range format. Use YYYY-MM-DD:YYYY-MM-DD")
+        sys.exit(1)
+    budget = token_budget(max_tokens)
+    notes = get_date_range(date_range)
+    written = stream_notes(notes, raw=raw or None, budget=budget)
+    if not written and not (budget and budget.cut):
+        print_error("No daily notes found in the given date range.")
+        sys.exit(1)
+
+
+def handle_passages(query: str, limit: int):
+    passages = get_passages(query, limit)
+    if not passages:
+        print_error(f"No passages found for query '{query}'")
+        sys.exit(1)
+    from tap.cli.output import discard_stdout
+    from tap.cli.pipe import forward_stdin
+
+    try:
+        forward_stdin()
+        for note, heading, _, _, text, *_ in passages:
+            sys.stdout.write(format_passage(note, heading, text))
+        sys.stdout.flush()
+    except BrokenPipeError:
+        discard_stdout()
+
+
+def handle_search(
+    query: str,
+    limit: int,
+    vector: bool,
+    force_fuzzy: bool,
+    force_exact: bool,
+    passages: bool = False,
+    content: bool = False,
+    hybrid: bool = False,
+    network: int | None = None,
+    referenced_by: bool = False,
+    filters: dict | None = None,
+):
+    if passages:
+        return handle_passages(query, limit)
+    if force_exact:
+        titles = get_exact_match(query, filters)
+    elif hybrid:
+        titles = get_hybrid_matches(query, limit, filters)
+    elif content:
+        titles = get_content_matches(query, limit, filters)
+    elif vector:
+        titles = get_vector_matches(query, limit, filters)
+    else:
+        titles = get_fuzzy_matches(query, limit, filters)
+    if not titles:
+        print_error(f"No match found for query '{query}'")
+        sys.exit(1)
+    if referenced_by or network is not None:
+        seed = titles[0]
+        titles = get_linked_matches(
+            seed, 1 if referenced_by else network, reverse=referenced_by
+        )
+        if not titles:
+            print_error(f"No notes link to '{seed}'")
+            sys.exit(1)
+    display_titles(titles)
+
+
+def handle_filter(filters: dict, limit: int):
+    titles = get_filtered_notes(filters, limit)
+    if not titles:
+        print_error("No notes match the given filters")
+        sys.exit(1)
+    display_titles(titles)
@@ -0,0 +1,18 @@
+import sys
+
+from tap.cli.commands.search import retrieve_titles
+from tap.cli.display import display_titles, print_error
+from tap.storage.state import get_state
+
+
+def handle_stow(index: int):
+    """
+    Add the note at `index` in the last results to the pool.
+    """
+    titles = retrieve_titles()
+    if not 1 <= index <= len(titles):
+        print_error(f"No search result at index {index}")
+        sys.exit(1)
+    state = get_state()
+    state.pool_add(titles[index - 1])
+    display_titles(state.pool_titles())
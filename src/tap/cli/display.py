@@ -0,0 +1,50 @@
+"""
+Terminal output helpers. rich is imported on first use, not at CLI startup.
+"""
+
+from functools import cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+
+@cache
+def get_console() -> "Console":
+    from rich.console import Console
+
+    return Console()
+
+
+def print_markdown(text: str):
+    """
+    Pretty print markdown text to the console.
+    """
+    from rich.markdown import Markdown
+
+    get_console().print(Markdown(text))
+
+
+def display_titles(titles: list[str]):
+    """
+    Pretty print titles with index numbers.
+    """
+    console = get_console()
+    for index, title in enumerate(titles):
+        console.print(
+            f"[yellow]{index + 1}[/yellow] - [green]{title}[/green][blue].md[/blue]"
+        )
+
+
+@cache
+def get_error_console() -> "Console":
+    from rich.console import Console
+
+    return Console(stderr=True)
+
+
+def print_error(message: str):
+    """
+    Print an error to stderr, so it never mixes into piped output.
+    """
+    get_error_console().print(f"[red]Error:[/red] {message}")
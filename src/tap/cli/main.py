@@ -1,10 +1,20 @@
-from tap.cli.parser import create_parser
+import sys
+
+from tap.cli.parser import parse_args
 
 
 def main():
-    parser = create_parser()
-    args = parser.parse_args()
+    args, parser = parse_args()
 
     from tap.cli.router import route_command
+    from tap.daemon.client import DaemonError
+
+    try:
+        route_command(args, parser)
+    except (DaemonError, ValueError) as e:
+        # Bad input caught by the service (e.g. an impossible date), whether
+        # it ran in the daemon or in-process
+        from tap.cli.display import print_error
 
-    route_command(args)
+        print_error(str(e))
+        sys.exit(1)
@@ -0,0 +1,139 @@
+"""
+Streaming context output.
+
+Composition commands (-g, -d, pool pour/drain) write each note as soon as it
+has been read, instead of building one big string first. When stdout is a
+pipe or file the notes are written raw, each wrapped in an XML tag derived
+from its title, ready for an LLM or another tap; on a terminal they are
+rendered as markdown. --raw forces XML on a terminal too. Piped stdin from an
+earlier stage is forwarded first (see tap.cli.pipe). --max-tokens caps the
+total with a token budget (see tap.cli.budget).
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, TextIO
+import os
+import re
+import sys
+
+if TYPE_CHECKING:
+    from tap.cli.budget import TokenBudget
+
+TAG_INVALID_RE = re.compile(r"[^a-z0-9._-]+")
+# Fewer notes than this are read straight from disk, skipping the snapshot
+SNAPSHOT_MIN_READS = 32
+
+
+def xml_tag(title: str) -> str:
+    """
+    Kebab-case tag for a note title: "Mental Health Context" ->
+    "mental-health-context". Tags must start with a letter or underscore,
+    so "2025-01-06" becomes "note-2025-01-06".
+    """
+    tag = TAG_INVALID_RE.sub("-", title.lower()).strip("-.")
+    if not tag or not (tag[0].isalpha() or tag[0] == "_"):
+        tag = f"note-{tag}" if tag else "note"
+    return tag
+
+
+def is_raw(force: bool = False) -> bool:
+    return force or not sys.stdout.isatty()
+
+
+def write_note(out: TextIO, title: str, content: str, tag: str | None = None):
+    tag = tag or xml_tag(title)
+    out.write(f"<{tag}>\n")
+    out.write(content)
+    out.write(f"\n</{tag}>\n")
+    out.flush()
+
+
+def discard_stdout():
+    """
+    After a closed pipe (`tap ... | head`), point stdout at devnull so the
+    interpreter's final flush can't fail.
+    """
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+def stream_notes(
+    notes: Iterable[tuple[str, str]],
+    raw: bool | None = None,
+    tag: str | None = None,
+    budget: "TokenBudget | None" = None,
+    written: list[str] | None = None,
+) -> int:
+    """
+    Forward piped stdin, then write (title, content) pairs to stdout as they
+    arrive. Returns the number of notes written, and appends their titles to
+    `written` if given. `tag` overrides the tag derived from each title. With
+    a `budget`, notes are trimmed or dropped to fit it. A closed pipe ends the
+    stream quietly; the note it interrupted doesn't count as written.
+    """
+    from tap.cli.display import print_markdown
+    from tap.cli.pipe import forward_stdin
+
+    raw = is_raw() if raw is None else raw
+    count = 0
+    try:
+        forwarded = forward_stdin()
+        if budget is not None:
+            budget.charge_bytes(forwarded)
+        for title, content in notes:
+            if raw:
+                note_tag = tag or xml_tag(title)
+                wrapper = f"<{note_tag}>\n\n</{note_tag}>\n"
+            else:
+                wrapper = f"---\n\n# {title}\n\n"
+            if budget is not None:
+                fitted = budget.fit(title, content, wrapper)
+                if fitted is None:
+                    break
+                content = fitted
+            if raw:
+                write_note(sys.stdout, title, content, tag)
+            else:
+                print_markdown(f"{wrapper}{content}")
+            count += 1
+            if written is not None:
+                written.append(title)
+            if budget is not None and budget.cut:
+                break
+    except BrokenPipeError:
+        discard_stdout()
+    finally:
+        if budget is not None:
+            budget.finish()
+    return count
+
+
+def read_located(located: Iterable[tuple[str, str]]) -> Iterable[tuple[str, str]]:
+    """
+    (title, content) for (title, path) pairs, read concurrently but yielded
+    in order, skipping unreadable files. For SNAPSHOT_MIN_READS notes or more,
+    files whose size and mtime still match the vault snapshot are served from
+    it after a stat; fewer are cheaper to read than to map the snapshot for.
+    """
+    from tap.database.local.snapshot import open_snapshot
+    from tap.database.obsidian.reader import iter_note_files, read_note_file
+
+    located = list(located)
+    root = os.environ.get("OBSIDIAN_PATH")
+    snapshot = None
+    if root and len(located) >= SNAPSHOT_MIN_READS:
+        snapshot = open_snapshot(Path(root).expanduser())
+    if snapshot is not None:
+        for title, path in located:
+            note_file = snapshot.read_stat(Path(path))
+            if note_file is None:
+                try:
+                    note_file = read_note_file(Path(path))
+                except Exception as e:
+                    print(f"Error reading {path}: {e}", file=sys.stderr)
+                    continue
+            yield title, note_file.content
+        return
+    note_files = iter_note_files(Path(path) for _, path in located)
+    for (title, _), note_file in zip(located, note_files):
+        if note_file is not None:
+            yield title, note_file.content
@@ -1,10 +1,24 @@
 import argparse
 
+SUBCOMMANDS = ("stow", "pool", "alias", "serve", "watch", "snapshot")
 
-def create_parser():
+
+def create_parser(subcommands: bool = True):
     parser = argparse.ArgumentParser(
         prog="tap", description="Search and compose context from your Obsidian vault"
     )
+    add_search_arguments(parser)
+    if not subcommands:
+        # argparse can't mix optional subcommands with a positional query, so
+        # plain searches are parsed without them (see parse_args)
+        parser.add_argument(
+            "query",
+            nargs="?",
+            help="Search query (alias name, note title, or fuzzy search)",
+        )
+        parser.set_defaults(command=None)
+        return parser
+    parser.set_defaults(query=None)
 
     # Create subparsers for main commands
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
@@ -31,14 +45,18 @@ def create_parser():
     # This is handled by checking if pool_action is None
 
     # tap pool pour
-    pool_subparsers.add_parser(
+    pour_parser = pool_subparsers.add_parser(
         "pour", help="Output pool as XML context, keep pool intact"
     )
+    add_raw_argument(pour_parser, default=argparse.SUPPRESS)
+    add_budget_argument(pour_parser, default=argparse.SUPPRESS)
 
     # tap pool drain
-    pool_subparsers.add_parser(
+    drain_parser = pool_subparsers.add_parser(
         "drain", help="Output pool as XML context, then clear pool"
     )
+    add_raw_argument(drain_parser, default=argparse.SUPPRESS)
+    add_budget_argument(drain_parser, default=argparse.SUPPRESS)
 
     # tap pool remove
     remove_parser = pool_subparsers.add_parser(
@@ -55,9 +73,9 @@ def create_parser():
     # ALIAS command
     # ============================================================================
     alias_parser = subparsers.add_parser("alias", help="Manage note aliases")
-    alias_subparsers = alias_parser.add_subparsers(
-        dest="alias_action", help="Alias actions"
-    )
+    # A nested subparser would swallow the alias name as an action, so
+    # `tap alias rm <name>` is recognised after parsing (see parse_args)
+    alias_parser.set_defaults(alias_action=None)
 
     # tap alias (no action = list)
     # This is handled by checking if alias_action is None
@@ -78,18 +96,94 @@ def create_parser():
     )
 
     # tap alias rm <name>
-    rm_parser = alias_subparsers.add_parser("rm", help="Remove an alias")
-    rm_parser.add_argument("name", help="Alias name to remove")
+    # Parsed as name="rm", target=<name> and rewritten in parse_args
 
     # ============================================================================
-    # DEFAULT (search) command - when no subcommand is provided
+    # SERVE command
     # ============================================================================
-    # These are added to the main parser for when command is None
+    serve_parser = subparsers.add_parser(
+        "serve", help="Run a resident daemon that keeps the vault and models warm"
+    )
+    serve_parser.add_argument(
+        "--warm-vectors",
+        action="store_true",
+        help="Load the embedding model at startup instead of on first vector search",
+    )
+
+    # ============================================================================
+    # WATCH command
+    # ============================================================================
+    watch_parser = subparsers.add_parser(
+        "watch", help="Keep the catalog and indexes current as the vault changes"
+    )
+    watch_parser.add_argument(
+        "--vectors",
+        action="store_true",
+        help="Also re-embed changed notes into the vector store",
+    )
+    watch_parser.add_argument(
+        "--debounce",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="Quiet period after the last change before syncing (default: 1.0)",
+    )
+    watch_parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Poll the vault instead of using inotify",
+    )
+
+    # ============================================================================
+    # SNAPSHOT command
+    # ============================================================================
+    snapshot_parser = subparsers.add_parser(
+        "snapshot", help="Pack the vault into one file for fast bulk reads"
+    )
+    snapshot_parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="zstd-compress each note (needs zstd support)",
+    )
+    snapshot_parser.add_argument(
+        "--level",
+        type=int,
+        default=3,
+        help="zstd compression level (default: 3)",
+    )
+    snapshot_parser.add_argument(
+        "--remove", action="store_true", help="Delete the snapshot instead"
+    )
+
+    return parser
+
+
+def add_raw_argument(parser: argparse.ArgumentParser, default=False):
     parser.add_argument(
-        "query",
-        nargs="?",
-        help="Search query (alias name, note title, or fuzzy search)",
+        "-r",
+        "--raw",
+        action="store_true",
+        default=default,
+        help="Write XML-wrapped notes even on a terminal (default when piped)",
     )
+
+
+def add_budget_argument(parser: argparse.ArgumentParser, default=None):
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        default=default,
+        metavar="N",
+        help="Cap composed output at N tokens, trimming or dropping the "
+        "lowest-ranked notes",
+    )
+
+
+def add_search_arguments(parser: argparse.ArgumentParser):
+    # ============================================================================
+    # DEFAULT (search) command - when no subcommand is provided
+    # ============================================================================
+    # These are added to the main parser for when command is None
     parser.add_argument(
         "-L",
         "--limit",
@@ -114,6 +208,86 @@ def create_parser():
         metavar="YYYY-MM-DD:YYYY-MM-DD",
         help="Get daily notes in date range",
     )
+    add_raw_argument(parser)
+    add_budget_argument(parser)
+    parser.add_argument(
+        "-a",
+        "--alias",
+        metavar="NAME",
+        help="Output the note behind a predefined alias",
+    )
+    parser.add_argument(
+        "-p",
+        "--passthrough",
+        metavar="TAG",
+        help="Wrap stdin in <TAG> without a file lookup",
+    )
+    parser.add_argument(
+        "-v",
+        "--vector",
+        action="store_true",
+        help="Use vector similarity search instead of fuzzy matching",
+    )
+    parser.add_argument(
+        "-H",
+        "--hybrid",
+        action="store_true",
+        help="Fuse title, content and vector search into one ranking",
+    )
+    parser.add_argument(
+        "-c",
+        "--content",
+        action="store_true",
+        help='Search note contents (BM25 full-text); "quote" phrases',
+    )
+    parser.add_argument(
+        "--passages",
+        action="store_true",
+        help="Output the best matching passages (from the chunk index) as context",
+    )
+    parser.add_argument(
+        "--connected",
+        action="store_const",
+        const=1,
+        dest="network",
+        help="Best match plus the notes it links to (same as --network 1)",
+    )
+    parser.add_argument(
+        "--network",
+        type=int,
+        metavar="HOPS",
+        help="Best match plus every note within HOPS wiki links of it",
+    )
+    parser.add_argument(
+        "--referenced-by",
+        action="store_true",
+        help="Notes that link to the best match",
+    )
+    parser.add_argument(
+        "--recent",
+        metavar="AGE",
+        help="Only notes modified within AGE (e.g. 12h, 7d, 2w)",
+    )
+    parser.add_argument(
+        "--context-for",
+        metavar="YYYY-MM-DD",
+        help="Only notes modified on that date, give or take a day",
+    )
+    parser.add_argument(
+        "-t",
+        "--tag",
+        action="append",
+        dest="tags",
+        metavar="TAG",
+        help="Only notes with TAG (or a nested tag under it); repeatable",
+    )
+    parser.add_argument(
+        "--property",
+        action="append",
+        dest="keys",
+        metavar="KEY",
+        help="Only notes whose frontmatter sets KEY; repeatable",
+    )
     parser.add_argument(
         "--fuzzy", action="store_true", help="Force fuzzy search (ignore aliases)"
     )
@@ -121,4 +295,35 @@ def create_parser():
         "--exact", action="store_true", help="Force exact title match only"
     )
 
-    return parser
+
+def first_positional(parser: argparse.ArgumentParser, argv: list[str]) -> str | None:
+    """
+    First argument that isn't an option or an option's value.
+    """
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg == "--":
+            return None
+        elif arg.startswith("-") and len(arg) > 1:
+            action = parser._option_string_actions.get(arg.split("=", 1)[0])
+            skip = action is not None and action.nargs != 0 and "=" not in arg
+        else:
+            return arg
+    return None
+
+
+def parse_args(
+    argv: list[str] | None = None,
+) -> tuple[argparse.Namespace, argparse.ArgumentParser]:
+    import sys
+
+    argv = sys.argv[1:] if argv is None else argv
+    parser = create_parser(subcommands=False)
+    if first_positional(parser, argv) in SUBCOMMANDS:
+        parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.command == "alias" and args.name == "rm" and args.target:
+        args.alias_action, args.name, args.target = "rm", args.target, None
+    return args, parser
@@ -0,0 +1,117 @@
+"""
+Stdin forwarding for chained pipelines:
+
+    tap -p transcript < call.txt | tap -g 1 | twig "summarise"
+
+Each stage copies whatever arrived on stdin to stdout before its own output,
+and -p wraps stdin in a tag. Upstream input can be hundreds of MB, so it is
+never read into Python: bytes move fd to fd in fixed-size chunks, with
+splice (pipe to pipe/file, no copy through user space) or sendfile (regular
+file to anything) where the kernel supports them, and a reused buffer
+otherwise. Memory stays flat and the first chunk goes out as soon as it
+arrives.
+"""
+
+import errno
+import os
+import stat
+import sys
+
+# Default pipe capacity on Linux
+CHUNK_SIZE = 1 << 16
+# "This kind of fd can't do that": fall back to the next strategy
+_UNSUPPORTED = {
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EBADF,
+    errno.ESPIPE,
+    errno.EOPNOTSUPP,
+}
+
+
+def has_piped_stdin() -> bool:
+    """
+    True when stdin is a pipe or redirected file. Terminals, /dev/null and
+    sockets are left alone so interactive runs never block waiting for input.
+    """
+    try:
+        mode = os.fstat(sys.stdin.fileno()).st_mode
+    except (OSError, ValueError, AttributeError):
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISREG(mode)
+
+
+def _splice(src: int, dst: int, chunk: int) -> int | None:
+    splice = getattr(os, "splice", None)
+    if splice is None:
+        return None
+    total = 0
+    try:
+        while n := splice(src, dst, chunk):
+            total += n
+    except OSError as e:
+        if total or e.errno not in _UNSUPPORTED:
+            raise
+        return None
+    return total
+
+
+def _sendfile(src: int, dst: int, chunk: int) -> int | None:
+    if not hasattr(os, "sendfile") or not stat.S_ISREG(os.fstat(src).st_mode):
+        return None
+    total = 0
+    try:
+        while n := os.sendfile(dst, src, None, chunk):
+            total += n
+    except OSError as e:
+        if total or e.errno not in _UNSUPPORTED:
+            raise
+        return None
+    return total
+
+
+def _read_write(src: int, dst: int, chunk: int) -> int:
+    buffer = bytearray(chunk)
+    view = memoryview(buffer)
+    total = 0
+    while n := os.readv(src, [buffer]):
+        written = 0
+        while written < n:
+            written += os.write(dst, view[written:n])
+        total += n
+    return total
+
+
+def copy_fd(src: int, dst: int, chunk: int = CHUNK_SIZE) -> int:
+    """
+    Copy everything from `src` to `dst` until EOF; returns the byte count.
+    """
+    for strategy in (_splice, _sendfile):
+        copied = strategy(src, dst, chunk)
+        if copied is not None:
+            return copied
+    return _read_write(src, dst, chunk)
+
+
+def forward_stdin() -> int:
+    """
+    Copy piped stdin to stdout, ahead of anything this process writes.
+    """
+    if not has_piped_stdin():
+        return 0
+    sys.stdout.flush()
+    return copy_fd(sys.stdin.fileno(), sys.stdout.fileno())
+
+
+def passthrough(tag: str):
+    """
+    Write stdin wrapped in <tag>...</tag>, streaming the body.
+    """
+    from tap.cli.output import xml_tag
+
+    tag = xml_tag(tag)
+    out = sys.stdout
+    out.write(f"<{tag}>\n")
+    copied = forward_stdin()
+    out.write(f"\n</{tag}>\n" if copied else f"</{tag}>\n")
+    out.flush()
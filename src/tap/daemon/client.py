@@ -0,0 +1,74 @@
+"""
+Thin client for the tap daemon.
+
+Kept to stdlib socket/json so the CLI can try the daemon before importing
+anything heavy. request() returns None when no daemon is listening, and the
+caller falls back to running the operation in-process.
+"""
+
+import json
+import os
+import socket
+from typing import Any
+
+from tap.storage.config import socket_file
+
+CONNECT_TIMEOUT = 0.2
+# Searches on a cold daemon may need to load the embedding model
+RESPONSE_TIMEOUT = 120.0
+
+
+class DaemonError(Exception):
+    """
+    The daemon received the request but failed to execute it.
+    """
+
+
+class _Unavailable:
+    pass
+
+
+UNAVAILABLE = _Unavailable()
+
+
+def send(op: str, **params: Any) -> Any:
+    """
+    Send one request. Returns UNAVAILABLE if there's no daemon to talk to.
+    """
+    if os.environ.get("TAP_NO_DAEMON"):
+        return UNAVAILABLE
+    path = socket_file()
+    if not path.exists():
+        return UNAVAILABLE
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(str(path))
+        except OSError:
+            return UNAVAILABLE
+        sock.settimeout(RESPONSE_TIMEOUT)
+        payload = json.dumps({"op": op, "params": params}).encode() + b"\n"
+        sock.sendall(payload)
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    finally:
+        sock.close()
+    if not line:
+        return UNAVAILABLE
+    response = json.loads(line)
+    if not response.get("ok"):
+        raise DaemonError(response.get("error", "unknown error"))
+    return response["result"]
+
+
+def call(op: str, **params: Any) -> Any:
+    """
+    Run an operation on the daemon if it's up, otherwise in this process.
+    """
+    result = send(op, **params)
+    if result is not UNAVAILABLE:
+        return result
+    from tap.services.search_service import SearchService
+
+    return getattr(SearchService(), op)(**params)
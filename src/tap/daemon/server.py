@@ -0,0 +1,106 @@
+"""
+`tap serve`: a resident process that answers search/get/pour requests over a
+Unix socket, keeping the vault catalog, title list and embedding model warm.
+
+Protocol: one JSON object per line in each direction.
+    -> {"op": "search", "params": {"query": "burnout", "limit": 5}}
+    <- {"ok": true, "result": [...]}
+"""
+
+import json
+import logging
+import os
+import signal
+import socketserver
+import sys
+
+from tap.daemon.client import UNAVAILABLE, send
+from tap.services.search_service import SearchService
+from tap.storage.config import socket_file
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = (
+    "search",
+    "search_many",
+    "content_search",
+    "hybrid_search",
+    "vector_search",
+    "vector_search_many",
+    "passage_search",
+    "network",
+    "filter_notes",
+    "get",
+    "pour",
+    "date_range",
+    "date_range_paths",
+    "locate",
+    "ping",
+)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "TapServer"
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                op = request["op"]
+                if op not in OPERATIONS:
+                    raise ValueError(f"Unknown operation: {op}")
+                result = self.server.dispatch(op, request.get("params") or {})
+                response = {"ok": True, "result": result}
+            except Exception as e:
+                logger.exception("Request failed")
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class TapServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        self.service = SearchService()
+        super().__init__(path, _Handler)
+
+    def dispatch(self, op: str, params: dict):
+        if op == "ping":
+            return os.getpid()
+        return getattr(self.service, op)(**params)
+
+    def warm(self):
+        """
+        Load the catalog and titles up front so the first request is fast.
+        """
+        vault = self.service.vault
+        self.service.fuzzy_index
+        logger.info(f"Serving {len(vault.titles)} notes from {vault.obsidian_path}")
+
+
+def serve(warm_vectors: bool = False):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    path = socket_file()
+    if path.exists():
+        if send("ping") is not UNAVAILABLE:
+            print(f"tap daemon already running on {path}", file=sys.stderr)
+            sys.exit(1)
+        path.unlink()  # Stale socket from a crashed daemon
+
+    server = TapServer(str(path))
+    os.chmod(path, 0o600)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.warm()
+        if warm_vectors:
+            from tap.database.chroma.load_vault import get_embedding_function
+
+            get_embedding_function()
+        logger.info(f"Listening on {path}")
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
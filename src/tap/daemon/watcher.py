@@ -0,0 +1,290 @@
+"""
+`tap watch`: keep the catalog and derived indexes current as the vault
+changes, so queries never pay for a refresh.
+
+On Linux every vault directory is watched with inotify (through ctypes, no
+extra dependency); elsewhere, or if inotify is unavailable or out of
+watches, the catalog is deep-refreshed on a polling interval instead. Bursts
+of events (an editor's save, a sync client landing a batch) are debounced,
+then the catalog is refreshed and saved and each index syncs incrementally:
+the fuzzy title index, the full-text index, the link graph, the metadata
+index and, with --vectors, the vector store.
+
+While running, the watcher holds an flock on watch.lock. VaultCatalog.load
+and the daemon check that lock and trust the saved catalog instead of
+stat'ing the vault themselves.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+import ctypes
+import errno
+import fcntl
+import logging
+import os
+import select
+import signal
+import struct
+import sys
+import time
+
+from tap.storage.config import watch_lock_file
+
+if TYPE_CHECKING:
+    from tap.database.obsidian.catalog import VaultCatalog
+
+logger = logging.getLogger(__name__)
+
+# Quiet period after the last event before indexes are updated
+DEBOUNCE_SECONDS = 1.0
+POLL_INTERVAL = 2.0
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise()
+        self.watches: dict[int, Path] = {}
+        try:
+            self._add_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _raise(self):
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code))
+
+    def _add_tree(self, top: Path):
+        for directory, _, _ in os.walk(top):
+            wd = self._libc.inotify_add_watch(
+                self.fd, os.fsencode(directory), WATCH_MASK
+            )
+            if wd < 0:
+                if ctypes.get_errno() == errno.ENOENT:
+                    continue  # Removed while walking
+                self._raise()  # ENOSPC: out of watches
+            self.watches[wd] = Path(directory)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Block until a note or directory changes (True) or `timeout` passes.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if ready and self._drain():
+                return True
+
+    def _drain(self) -> bool:
+        relevant = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0").decode(
+                    errors="surrogateescape"
+                )
+                offset += length
+                relevant |= self._handle(wd, mask, name)
+
+    def _handle(self, wd: int, mask: int, name: str) -> bool:
+        if mask & IN_Q_OVERFLOW:
+            return True
+        if mask & IN_IGNORED:
+            self.watches.pop(wd, None)
+            return False
+        if mask & IN_ISDIR:
+            parent = self.watches.get(wd)
+            if mask & (IN_CREATE | IN_MOVED_TO) and parent is not None:
+                self._add_tree(parent / name)
+            return True
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            return True
+        return name.endswith(".md")
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    def __init__(self, catalog: "VaultCatalog", interval: float = POLL_INTERVAL):
+        self.catalog = catalog
+        self.interval = interval
+
+    def wait(self, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.catalog.refresh(deep=True):
+                return True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining or self.interval))
+
+    def close(self):
+        pass
+
+
+def make_watcher(
+    catalog: "VaultCatalog", poll: bool = False
+) -> "InotifyWatcher | PollingWatcher":
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(catalog.root)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable ({e}), polling instead")
+    return PollingWatcher(catalog)
+
+
+def wait_for_changes(
+    watcher: "InotifyWatcher | PollingWatcher",
+    catalog: "VaultCatalog",
+    debounce: float = DEBOUNCE_SECONDS,
+) -> "InotifyWatcher | PollingWatcher":
+    """
+    Block until the vault changes and the burst of events settles. Returns the
+    watcher to carry on with: a polling one if inotify failed meanwhile, e.g.
+    out of watches (ENOSPC) for a new directory.
+    """
+    try:
+        while not watcher.wait():
+            pass
+        # Let the burst settle before touching the indexes
+        while watcher.wait(debounce):
+            pass
+    except OSError as e:
+        logger.warning(f"inotify failed ({e}), polling instead")
+        watcher.close()
+        watcher = PollingWatcher(catalog)
+    return watcher
+
+
+def sync_indexes(catalog: "VaultCatalog", vectors: bool = False):
+    """
+    Refresh the catalog and bring every derived index up to date with it.
+    """
+    from tap.database.local.link_graph import sync_link_graph
+    from tap.database.local.metadata_index import sync_metadata_index
+    from tap.database.local.text_index import TextIndex
+    from tap.query.fuzzy import FuzzyIndex
+
+    started = time.monotonic()
+    catalog.refresh(deep=True)
+    catalog.save()
+    titles = [entry.stem for entry in catalog.unique_entries()]
+    FuzzyIndex.for_catalog(catalog, titles)
+    TextIndex().sync(catalog)
+    sync_link_graph(catalog)
+    sync_metadata_index(catalog)
+    if vectors:
+        sync_vectors(catalog)
+    logger.info(
+        f"Indexes synced at generation {catalog.generation} "
+        f"in {time.monotonic() - started:.2f}s"
+    )
+
+
+def sync_vectors(catalog: "VaultCatalog"):
+    """
+    Update whichever vector store queries use (see tap.query.backends).
+    """
+    from tap.database.obsidian.vault import Vault
+    from tap.query.backends import backend_name
+
+    vault = Vault(catalog=catalog)
+    if backend_name() == "local":
+        from tap.database.local.vector_index import (
+            CHUNK_INDEX_NAME,
+            LocalVectorIndex,
+            sync_local_index,
+        )
+
+        sync_local_index(vault)
+        if LocalVectorIndex.exists(CHUNK_INDEX_NAME):
+            sync_local_index(vault, chunks=True)
+    else:
+        import asyncio
+        from tap.database.chroma.load_vault import load_vault
+
+        asyncio.run(load_vault(vault))
+
+
+def acquire_watch_lock() -> int | None:
+    """
+    Exclusive lock marking this process as the vault watcher, or None if
+    another watcher already holds it.
+    """
+    fd = os.open(watch_lock_file(), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def watch(
+    vectors: bool = False, debounce: float = DEBOUNCE_SECONDS, poll: bool = False
+):
+    from tap.database.obsidian.vault import Vault
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    lock = acquire_watch_lock()
+    if lock is None:
+        print("tap watch is already running", file=sys.stderr)
+        sys.exit(1)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    catalog = Vault().catalog
+    watcher = make_watcher(catalog, poll)
+    logger.info(f"Watching {catalog.root} with {type(watcher).__name__}")
+    try:
+        sync_indexes(catalog, vectors)
+        while True:
+            watcher = wait_for_changes(watcher, catalog, debounce)
+            try:
+                sync_indexes(catalog, vectors)
+            except Exception:
+                logger.exception("Index sync failed; will retry on the next change")
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        watcher.close()
+        os.close(lock)
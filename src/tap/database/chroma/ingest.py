@@ -0,0 +1,232 @@
+"""
+Streaming, batched ingestion into a Chroma collection.
+
+Notes are processed in fixed-size batches through three overlapping stages:
+reading batch n+1 from disk, embedding batch n on a worker thread, and
+upserting batch n-1 into Chroma. At most three batches are alive at once, so
+peak memory is bounded by batch size rather than vault size, and a batch that
+fails is logged and skipped instead of failing the whole load.
+
+Every upserted document carries its content hash in metadata, which is what
+makes an interrupted run resumable: the next sync sees the finished batches as
+unchanged and picks up where the last one stopped.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, Sequence
+import asyncio
+import logging
+
+from tap.database.local.snapshot import read_catalog_files
+from tap.database.obsidian.catalog import CatalogEntry, VaultCatalog
+from tap.database.obsidian.chunking import chunk_note
+from tap.database.obsidian.reader import NoteFile
+from tap.storage.config import cache_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 64
+# Persist freshly computed content hashes every this many batches
+CATALOG_SAVE_INTERVAL = 20
+
+EmbedFunction = Callable[[list[str]], Sequence[Sequence[float]]]
+ProgressCallback = Callable[["IngestStats"], None]
+
+
+class Record(NamedTuple):
+    id: str
+    document: str
+    metadata: dict[str, Any]
+    embed_text: str
+
+
+RecordBuilder = Callable[[CatalogEntry, NoteFile, str], list[Record]]
+
+
+def note_records(entry: CatalogEntry, note_file: NoteFile, digest: str) -> list[Record]:
+    """
+    One record per note: the whole file, keyed by title.
+    """
+    content = note_file.content
+    return [Record(entry.stem, content, {"hash": digest, "path": entry.rel}, content)]
+
+
+def chunk_records(
+    entry: CatalogEntry, note_file: NoteFile, digest: str
+) -> list[Record]:
+    """
+    One record per heading-aware chunk, keyed "Title#n", with the owning note,
+    heading path and character span in metadata.
+    """
+    return [
+        Record(
+            chunk.chunk_id(entry.stem),
+            chunk.text,
+            {
+                "note": entry.stem,
+                "hash": digest,
+                "path": entry.rel,
+                "heading": chunk.heading,
+                "start": chunk.start,
+                "end": chunk.end,
+            },
+            chunk.embedding_text(entry.stem),
+        )
+        for chunk in chunk_note(note_file.content)
+    ]
+
+
+@dataclass
+class IngestStats:
+    total: int
+    processed: int = 0
+    upserted: int = 0
+    unchanged: int = 0
+    failed: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class _Batch:
+    notes: list[str] = field(default_factory=list)
+    ids: list[str] = field(default_factory=list)
+    documents: list[str] = field(default_factory=list)
+    metadatas: list[dict[str, Any]] = field(default_factory=list)
+    embed_texts: list[str] = field(default_factory=list)
+    embeddings: Sequence[Sequence[float]] | None = None
+    # Filled on the reader thread and applied to the catalog and stats on the
+    # event loop, which owns them
+    digests: list[tuple[str, str]] = field(default_factory=list)
+    unreadable: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+
+def _read_batch(
+    catalog: VaultCatalog,
+    entries: list[CatalogEntry],
+    indexed: dict[str, str | None],
+    records: RecordBuilder,
+) -> _Batch:
+    batch = _Batch()
+    note_files = read_catalog_files(catalog, entries)
+    for entry, note_file in zip(entries, note_files):
+        if note_file is None:
+            batch.unreadable.append(entry.stem)
+            continue
+        digest = note_file.digest
+        batch.digests.append((entry.rel, digest))
+        if indexed.get(entry.stem) == digest:
+            # Hash wasn't known before reading, but the stored copy is current
+            batch.unchanged += 1
+            continue
+        batch.notes.append(entry.stem)
+        for record in records(entry, note_file, digest):
+            batch.ids.append(record.id)
+            batch.documents.append(record.document)
+            batch.metadatas.append(record.metadata)
+            batch.embed_texts.append(record.embed_text)
+    return batch
+
+
+async def ingest(
+    collection: Any,
+    catalog: VaultCatalog,
+    entries: list[CatalogEntry],
+    indexed: dict[str, str | None],
+    embed: EmbedFunction,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: ProgressCallback | None = None,
+    records: RecordBuilder = note_records,
+    replace_notes: bool = False,
+) -> IngestStats:
+    """
+    Read, embed and upsert `entries` in batches. `indexed` maps note titles
+    already in the collection to their stored hash, so notes whose content
+    turns out to be unchanged are skipped without embedding.
+
+    `records` turns a note into the records to store (whole notes by default,
+    or chunk_records). With replace_notes=True, a changed note's existing
+    records are deleted before upserting, so a note that now has fewer chunks
+    doesn't leave stale ones behind.
+    """
+    stats = IngestStats(total=len(entries))
+    batches = [
+        entries[i : i + batch_size] for i in range(0, len(entries), batch_size)
+    ]
+    if not batches:
+        return stats
+
+    def read(index: int) -> asyncio.Task[_Batch]:
+        return asyncio.create_task(
+            asyncio.to_thread(_read_batch, catalog, batches[index], indexed, records)
+        )
+
+    async def upsert(batch: _Batch, size: int):
+        try:
+            if replace_notes:
+                await collection.delete(where={"note": {"$in": batch.notes}})
+            await collection.upsert(
+                ids=batch.ids,
+                documents=batch.documents,
+                metadatas=batch.metadatas,
+                embeddings=batch.embeddings,
+            )
+            stats.upserted += len(batch.notes)
+        except Exception as e:
+            logger.error(f"Failed to upsert batch starting at {batch.notes[0]}: {e}")
+            stats.failed.extend(batch.notes)
+        stats.processed += size
+        if progress:
+            progress(stats)
+
+    pending_read = read(0)
+    pending_upsert: asyncio.Task[None] | None = None
+    try:
+        for index, entries_in_batch in enumerate(batches):
+            batch = await pending_read
+            if index + 1 < len(batches):
+                pending_read = read(index + 1)
+            for rel, digest in batch.digests:
+                catalog.record_hash(rel, digest)
+            stats.failed.extend(batch.unreadable)
+            stats.unchanged += batch.unchanged
+
+            if batch.ids:
+                try:
+                    batch.embeddings = await asyncio.to_thread(
+                        embed, batch.embed_texts
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"Failed to embed batch starting at {batch.notes[0]}: {e}"
+                    )
+                    stats.failed.extend(batch.notes)
+                    batch.ids = []
+
+            if pending_upsert is not None:
+                await pending_upsert
+            if batch.ids:
+                pending_upsert = asyncio.create_task(
+                    upsert(batch, len(entries_in_batch))
+                )
+            else:
+                pending_upsert = None
+                stats.processed += len(entries_in_batch)
+                if progress:
+                    progress(stats)
+
+            if index % CATALOG_SAVE_INTERVAL == CATALOG_SAVE_INTERVAL - 1:
+                catalog.save()
+        if pending_upsert is not None:
+            await pending_upsert
+    finally:
+        catalog.save()
+    return stats
+
+
+def ingest_marker(name: str) -> Path:
+    """
+    Marker recording that a full rebuild of collection `name` is in progress,
+    so an interrupted rebuild resumes instead of dropping the collection again.
+    """
+    return cache_dir() / f"ingest-{name}.pending"
@@ -1,72 +1,248 @@
-from dbclients.clients.chroma import get_client, detect_device
-from contex.database.obsidian.vault import Vault
-from chromadb.utils.embedding_functions import (
-    SentenceTransformerEmbeddingFunction,
+"""
+Chroma collection for the vault.
+
+Importing this module is cheap: the Chroma client, sentence-transformers and
+the embedding model are only loaded the first time they're needed.
+"""
+
+from functools import cache
+from tap.database.chroma.ingest import (
+    DEFAULT_BATCH_SIZE,
+    IngestStats,
+    ProgressCallback,
+    chunk_records,
+    ingest,
+    ingest_marker,
+    note_records,
 )
-from chromadb.api.models.AsyncCollection import AsyncCollection
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 import logging
 
+if TYPE_CHECKING:
+    from chromadb.api.models.AsyncCollection import AsyncCollection
+    from chromadb.utils.embedding_functions import (
+        SentenceTransformerEmbeddingFunction,
+    )
+    from tap.database.obsidian.vault import Vault
+
 logger = logging.getLogger(__name__)
 
 COLLECTION_NAME = "obsidian_vault"
+# Heading-aware passages, ids "Title#n" with the owning note in metadata
+CHUNK_COLLECTION_NAME = "obsidian_vault_chunks"
+# Page size when reading back stored metadata from Chroma
+GET_PAGE_SIZE = 5000
 
 ## Configure embedding function
 embedding_model: Literal["gtr-t5-large", "all-MiniLM-L6-v2"] = "all-MiniLM-L6-v2"
-embedding_function = SentenceTransformerEmbeddingFunction(
-    model_name=embedding_model, device=detect_device()
-)
 
-## Our vault
-vault = Vault()
 
+@cache
+def get_embedding_function() -> "SentenceTransformerEmbeddingFunction":
+    from chromadb.utils.embedding_functions import (
+        SentenceTransformerEmbeddingFunction,
+    )
+    from dbclients.clients.chroma import detect_device
 
-async def get_vault_descriptions_collection() -> AsyncCollection:
-    logger.info(
-        f"Using embedding model: {embedding_model} on device: {detect_device()}"
+    device = detect_device()
+    logger.info(f"Using embedding model: {embedding_model} on device: {device}")
+    return SentenceTransformerEmbeddingFunction(
+        model_name=embedding_model, device=device
     )
+
+
+async def get_vault_descriptions_collection(
+    name: str = COLLECTION_NAME,
+) -> "AsyncCollection":
+    from dbclients.clients.chroma import get_client
+
     client = await get_client()
-    return await client.get_or_create_collection(
-        name=COLLECTION_NAME, embedding_function=embedding_function
+    collection = await client.get_or_create_collection(
+        name=name,
+        embedding_function=get_embedding_function(),
+        # Cosine distances, comparable with the local backend's
+        metadata={"hnsw:space": "cosine"},
     )
+    if (collection.metadata or {}).get("hnsw:space") != "cosine":
+        logger.warning(
+            f"Collection {name} uses L2 distances; rebuild it with --full for "
+            "cosine distances that match the local backend"
+        )
+    return collection
+
 
+async def get_indexed_hashes(
+    collection: "AsyncCollection", key: str | None = None
+) -> dict[str, str | None]:
+    """
+    Map of document id -> content hash stored in the collection's metadata.
+    With `key`, documents are grouped by that metadata field instead (the
+    owning note, for the chunk collection).
+    """
+    indexed: dict[str, str | None] = {}
+    offset = 0
+    while True:
+        page = await collection.get(
+            include=["metadatas"], limit=GET_PAGE_SIZE, offset=offset
+        )
+        ids = page["ids"]
+        for doc_id, metadata in zip(ids, page["metadatas"] or [{}] * len(ids)):
+            metadata = metadata or {}
+            indexed[metadata.get(key, doc_id) if key else doc_id] = metadata.get(
+                "hash"
+            )
+        if len(ids) < GET_PAGE_SIZE:
+            return indexed
+        offset += len(ids)
+
+
+def embed_documents(documents: list[str]) -> list[list[float]]:
+    return get_embedding_function()(documents)
+
+
+async def load_vault(
+    vault: "Vault",
+    full: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: ProgressCallback | None = None,
+    chunks: bool = False,
+) -> "AsyncCollection":
+    """
+    Sync the vault into Chroma. Only notes whose content hash differs from the
+    stored metadata are re-embedded, and notes no longer in the vault are
+    deleted. With full=True the collection is dropped and rebuilt; if a full
+    rebuild is interrupted, the next run resumes it rather than starting over.
+
+    With chunks=True the chunk collection is synced instead: each note is
+    split at headings and every passage is embedded on its own, so content
+    past the model's input limit is still searchable.
+    """
+    from dbclients.clients.chroma import get_client
 
-async def load_vault(vault: Vault) -> AsyncCollection:
     logger.info(f"Loading vault from path: {vault.obsidian_path}")
     client = await get_client()
 
-    # Delete the entire collection if it exists
-    try:
-        await client.delete_collection(name=COLLECTION_NAME)
-        logger.info(f"Deleted existing collection: {COLLECTION_NAME}")
-    except Exception:
-        pass  # Collection didn't exist, that's fine
-
-    # Create fresh collection
-    collection = await client.create_collection(
-        name=COLLECTION_NAME, embedding_function=embedding_function
+    name = CHUNK_COLLECTION_NAME if chunks else COLLECTION_NAME
+    marker = ingest_marker(name)
+    if full and not marker.exists():
+        try:
+            await client.delete_collection(name=name)
+            logger.info(f"Deleted existing collection: {name}")
+        except Exception:
+            pass  # Collection didn't exist, that's fine
+        marker.touch()
+    elif marker.exists():
+        logger.info("Resuming interrupted full rebuild")
+
+    collection = await get_vault_descriptions_collection(name)
+    indexed = await get_indexed_hashes(collection, key="note" if chunks else None)
+
+    # In-place edits don't bump directory mtimes, so stat every file here
+    catalog = vault.catalog
+    catalog.refresh(deep=True)
+    entries = catalog.unique_entries()
+
+    # Unhashed entries are candidates too; ingest hashes them while reading and
+    # skips the ones whose stored copy turns out to be current.
+    candidates = [
+        entry
+        for entry in entries
+        if entry.hash is None or indexed.get(entry.stem) != entry.hash
+    ]
+    current_ids = {entry.stem for entry in entries}
+    removed = [doc_id for doc_id in indexed if doc_id not in current_ids]
+    logger.info(
+        f"{len(candidates)} notes to check, {len(removed)} removed, "
+        f"{len(entries) - len(candidates)} unchanged"
     )
 
-    # Add new data
-    documents = vault.documents
-    ids = vault.titles
-
-    await collection.add(
-        documents=documents,
-        ids=ids,
+    if removed and chunks:
+        await collection.delete(where={"note": {"$in": removed}})
+    elif removed:
+        await collection.delete(ids=removed)
+    stats = await ingest(
+        collection,
+        catalog,
+        candidates,
+        indexed,
+        embed_documents,
+        batch_size=batch_size,
+        progress=progress,
+        records=chunk_records if chunks else note_records,
+        replace_notes=chunks,
+    )
+    logger.info(
+        f"Upserted {stats.upserted} notes, {stats.unchanged} unchanged, "
+        f"{len(stats.failed)} failed"
     )
+    # The rebuild ran to the end: notes that failed are simply out of date
+    # now, and the next sync retries them like any other changed note
+    marker.unlink(missing_ok=True)
+    if stats.failed:
+        shown = ", ".join(stats.failed[:10])
+        more = " ..." if len(stats.failed) > 10 else ""
+        logger.warning(
+            f"{len(stats.failed)} notes failed to index and will be retried on "
+            f"the next sync: {shown}{more}"
+        )
+    if not chunks and (stats.upserted or removed):
+        from tap.query.result_cache import invalidate_vector_results
+
+        invalidate_vector_results()
 
     return collection
 
 
 def main():
+    import argparse
     import asyncio
-
-    asyncio.run(load_vault(vault))
+    import sys
+    from tap.database.obsidian.vault import Vault
+
+    parser = argparse.ArgumentParser(description="Sync the Obsidian vault into Chroma.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Drop the collection and re-embed every note.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Notes per read/embed/upsert batch (default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--chunks",
+        action="store_true",
+        help="Sync the heading-aware passage collection used by `tap --passages`.",
+    )
+    args = parser.parse_args()
+
+    def report(stats: IngestStats):
+        print(
+            f"\rIndexed {stats.processed}/{stats.total} notes "
+            f"({stats.upserted} upserted, {len(stats.failed)} failed)",
+            end="",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    asyncio.run(
+        load_vault(
+            Vault(),
+            full=args.full,
+            batch_size=args.batch_size,
+            progress=report,
+            chunks=args.chunks,
+        )
+    )
+    print(file=sys.stderr)
 
     # Check the number of items in the collection
     async def check_collection():
-        collection = await get_vault_descriptions_collection()
+        collection = await get_vault_descriptions_collection(
+            CHUNK_COLLECTION_NAME if args.chunks else COLLECTION_NAME
+        )
         count = await collection.count()
         logger.info(f"Number of items in the collection: {count}")
 
@@ -0,0 +1,257 @@
+"""
+Wiki-link graph: forward links and backlinks between notes.
+
+Notes get integer ids (their position in the catalog's unique entries) and
+both directions of the graph are stored in compressed sparse row form: an
+offsets array and a targets array of uint32, so a node's neighbours are one
+slice. The arrays are written to graph.bin with a small JSON header and read
+back with array.frombytes, so loading costs one read, and traversal works on
+integer ids only, mapping back to titles at the end.
+
+Links are resolved the way Obsidian does: by file name, case-insensitively,
+ignoring folders, headings and aliases. Links to missing notes and self links
+are dropped.
+
+Each note's outgoing link targets are cached per file (size and mtime) in
+links.json, so after an edit only changed notes are re-read and re-parsed;
+the CSR arrays are rebuilt from that cache whenever the catalog digest
+(paths, sizes and mtimes) changes, which an in-place edit does too.
+"""
+
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING
+import json
+import logging
+import os
+
+from tap.database.local.snapshot import read_catalog_files
+from tap.database.obsidian.parser import parse_note
+from tap.storage.config import atomic_write_json, cache_dir, temp_path
+
+if TYPE_CHECKING:
+    from tap.database.obsidian.catalog import VaultCatalog
+
+logger = logging.getLogger(__name__)
+
+GRAPH_VERSION = 1
+# Notes read per batch while syncing
+SYNC_BATCH_SIZE = 256
+# Upper bound on nodes returned by a traversal
+MAX_EXPANSION = 500
+
+
+def link_key(target: str) -> str:
+    """
+    Normalised note name a wiki link points at.
+    """
+    name = target.rpartition("/")[2].strip()
+    if name.lower().endswith(".md"):
+        name = name[:-3]
+    return name.casefold()
+
+
+def _csr(n: int, edges: list[tuple[int, int]]) -> tuple[array, array]:
+    """
+    (offsets, targets) for edges sorted by source.
+    """
+    offsets = array("I", [0]) * (n + 1)
+    for source, _ in edges:
+        offsets[source + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    targets = array("I", (target for _, target in edges))
+    return offsets, targets
+
+
+class LinkGraph:
+    def __init__(
+        self,
+        titles: list[str],
+        forward: tuple[array, array],
+        reverse: tuple[array, array],
+    ):
+        self.titles = titles
+        self.forward = forward
+        self.reverse = reverse
+        self._ids: dict[str, int] | None = None
+
+    @staticmethod
+    def paths(directory: Path | None = None) -> tuple[Path, Path]:
+        directory = directory or cache_dir()
+        return directory / "graph.json", directory / "graph.bin"
+
+    @classmethod
+    def build(cls, titles: list[str], outgoing: list[list[str]]) -> "LinkGraph":
+        """
+        Graph over `titles`, where outgoing[i] holds the raw link targets of
+        titles[i].
+        """
+        ids = {}
+        for i, title in enumerate(titles):
+            ids.setdefault(title.casefold(), i)
+        edges = set()
+        for source, targets in enumerate(outgoing):
+            for target in targets:
+                node = ids.get(link_key(target))
+                if node is not None and node != source:
+                    edges.add((source, node))
+        n = len(titles)
+        forward = _csr(n, sorted(edges))
+        reverse = _csr(n, sorted((target, source) for source, target in edges))
+        return cls(titles, forward, reverse)
+
+    def save(self, key: dict, directory: Path | None = None):
+        header_path, data_path = self.paths(directory)
+        tmp = temp_path(data_path)
+        with open(tmp, "wb") as f:
+            for part in (*self.forward, *self.reverse):
+                part.tofile(f)
+        os.replace(tmp, data_path)
+        atomic_write_json(
+            header_path,
+            {
+                "version": GRAPH_VERSION,
+                "key": key,
+                "itemsize": array("I").itemsize,
+                "edges": len(self.forward[1]),
+                "titles": self.titles,
+            },
+        )
+
+    @classmethod
+    def load(cls, key: dict, directory: Path | None = None) -> "LinkGraph | None":
+        """
+        The saved graph, if it was built for `key` and is intact.
+        """
+        header_path, data_path = cls.paths(directory)
+        try:
+            with open(header_path, "r", encoding="utf-8") as f:
+                header = json.load(f)
+            if header.get("version") != GRAPH_VERSION or header.get("key") != key:
+                return None
+            if header["itemsize"] != array("I").itemsize:
+                return None
+            data = array("I")
+            with open(data_path, "rb") as f:
+                data.frombytes(f.read())
+        except (OSError, ValueError, KeyError):
+            return None
+        n, edges = len(header["titles"]), header["edges"]
+        if len(data) != 2 * (n + 1 + edges):
+            return None
+        bounds = [0, n + 1, n + 1 + edges, 2 * (n + 1) + edges, len(data)]
+        parts = [data[bounds[i] : bounds[i + 1]] for i in range(4)]
+        return cls(header["titles"], (parts[0], parts[1]), (parts[2], parts[3]))
+
+    @property
+    def ids(self) -> dict[str, int]:
+        if self._ids is None:
+            self._ids = {title: i for i, title in enumerate(self.titles)}
+        return self._ids
+
+    def neighbours(self, node: int, reverse: bool = False) -> array:
+        offsets, targets = self.reverse if reverse else self.forward
+        return targets[offsets[node] : offsets[node + 1]]
+
+    def links(self, title: str) -> list[str]:
+        node = self.ids.get(title)
+        if node is None:
+            return []
+        return [self.titles[i] for i in self.neighbours(node)]
+
+    def backlinks(self, title: str) -> list[str]:
+        node = self.ids.get(title)
+        if node is None:
+            return []
+        return [self.titles[i] for i in self.neighbours(node, reverse=True)]
+
+    def expand(
+        self,
+        title: str,
+        hops: int = 1,
+        reverse: bool = False,
+        limit: int = MAX_EXPANSION,
+    ) -> list[tuple[str, int]]:
+        """
+        Breadth-first (title, distance) pairs within `hops` links of `title`,
+        starting with the note itself at distance 0. Follows backlinks instead
+        of links when reverse=True. Stops after `limit` notes.
+        """
+        start = self.ids.get(title)
+        if start is None:
+            return []
+        offsets, targets = self.reverse if reverse else self.forward
+        distance = {start: 0}
+        frontier = deque([start])
+        while frontier and len(distance) < limit:
+            node = frontier.popleft()
+            depth = distance[node]
+            if depth == hops:
+                continue
+            for neighbour in targets[offsets[node] : offsets[node + 1]]:
+                if neighbour not in distance:
+                    distance[neighbour] = depth + 1
+                    frontier.append(neighbour)
+                    if len(distance) >= limit:
+                        break
+        return [(self.titles[node], depth) for node, depth in distance.items()]
+
+
+def sync_link_graph(
+    catalog: "VaultCatalog", directory: Path | None = None
+) -> LinkGraph:
+    """
+    The link graph for the catalog's current notes, re-parsing only notes
+    whose size or mtime changed since they were last parsed.
+    """
+    directory = directory or cache_dir()
+    key = {"root": str(catalog.root), "digest": catalog.digest()}
+    graph = LinkGraph.load(key, directory)
+    if graph is not None:
+        return graph
+
+    links_path = directory / "links.json"
+    try:
+        with open(links_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("root") != key["root"]:
+            cached = {}
+    except (OSError, ValueError):
+        cached = {}
+    previous: dict[str, list] = cached.get("notes", {})
+
+    entries = catalog.unique_entries()
+    notes: dict[str, list] = {}
+    stale = []
+    for entry in entries:
+        record = previous.get(entry.rel)
+        if record is not None and record[:2] == [entry.size, entry.mtime_ns]:
+            notes[entry.rel] = record
+        else:
+            stale.append(entry)
+
+    for start in range(0, len(stale), SYNC_BATCH_SIZE):
+        batch = stale[start : start + SYNC_BATCH_SIZE]
+        note_files = read_catalog_files(catalog, batch)
+        for entry, note_file in zip(batch, note_files):
+            if note_file is None:
+                continue
+            catalog.record_hash(entry.rel, note_file.digest)
+            parsed = parse_note(entry.stem, note_file.content)
+            targets = list(dict.fromkeys(link.target for link in parsed.wiki_links))
+            notes[entry.rel] = [entry.size, entry.mtime_ns, targets]
+    catalog.save()
+    if stale or len(notes) != len(previous):
+        atomic_write_json(links_path, {"root": key["root"], "notes": notes})
+
+    titles = [entry.stem for entry in entries]
+    outgoing = [notes.get(entry.rel, [0, 0, []])[2] for entry in entries]
+    graph = LinkGraph.build(titles, outgoing)
+    graph.save(key, directory)
+    logger.info(
+        f"Link graph: {len(titles)} notes, {len(graph.forward[1])} links, "
+        f"{len(stale)} notes re-parsed"
+    )
+    return graph
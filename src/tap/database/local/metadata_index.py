@@ -0,0 +1,379 @@
+"""
+Columnar metadata index: mtime, ctime and size per note, plus tag and
+frontmatter-key postings, so searches can be narrowed to a time window or a
+tag before anything is ranked.
+
+Notes get the same integer ids as the title index and link graph (their
+position in the catalog's unique entries). Each column is one array, and a
+permutation sorted by mtime turns a time window into two bisects and a slice.
+Tags and frontmatter keys map to sorted id lists stored in compressed sparse
+row form. Everything is written to meta.bin with a JSON header and loaded
+with array.frombytes, the same layout as the link graph.
+
+Tags and frontmatter keys are cached per file (size and mtime) in
+metadata.json, so after an edit only changed notes are re-read; the arrays
+are rebuilt from that cache whenever the catalog digest (paths, sizes and
+mtimes) changes, which an in-place edit does too.
+"""
+
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+import json
+import logging
+import os
+import re
+import time
+
+from tap.database.local.snapshot import read_catalog_files
+from tap.database.obsidian.parser import (
+    FRONTMATTER_RE,
+    extract_tags,
+    parse_frontmatter,
+)
+from tap.storage.config import atomic_write_json, cache_dir, temp_path
+
+if TYPE_CHECKING:
+    from tap.database.obsidian.catalog import VaultCatalog
+
+logger = logging.getLogger(__name__)
+
+METADATA_VERSION = 1
+# Notes read per batch while syncing
+SYNC_BATCH_SIZE = 256
+# --context-for DATE covers the day itself and this many days either side
+CONTEXT_DAYS = 1
+
+AGE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([mhdw])\s*$")
+AGE_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_age(age: str) -> float:
+    """
+    Seconds in an age like "30m", "12h", "7d" or "2w".
+    """
+    match = AGE_RE.match(age.lower())
+    if match is None:
+        raise ValueError(f"Invalid age {age!r}; use e.g. 30m, 12h, 7d or 2w")
+    return float(match.group(1)) * AGE_UNITS[match.group(2)]
+
+
+def recent_window(age: str) -> dict:
+    """
+    Filters for notes modified within `age` of now.
+    """
+    return {"since": time.time() - parse_age(age)}
+
+
+def context_window(day: str, days: int = CONTEXT_DAYS) -> dict:
+    """
+    Filters for notes modified on YYYY-MM-DD, give or take `days`.
+    """
+    start = datetime.combine(date.fromisoformat(day), datetime.min.time())
+    return {
+        "since": (start - timedelta(days=days)).timestamp(),
+        "until": (start + timedelta(days=days + 1)).timestamp(),
+    }
+
+
+def _postings(names: list[str], groups: dict[str, list[int]]) -> tuple[array, array]:
+    """
+    (offsets, ids) with the sorted ids of names[i] in ids[offsets[i]:offsets[i+1]].
+    """
+    offsets = array("I", [0])
+    ids = array("I")
+    for name in names:
+        ids.extend(groups[name])
+        offsets.append(len(ids))
+    return offsets, ids
+
+
+class MetadataIndex:
+    def __init__(
+        self,
+        mtime: array,
+        ctime: array,
+        size: array,
+        tags: list[str],
+        tag_postings: tuple[array, array],
+        keys: list[str],
+        key_postings: tuple[array, array],
+        by_mtime: array | None = None,
+    ):
+        self.mtime = mtime
+        self.ctime = ctime
+        self.size = size
+        self.tags = tags
+        self.tag_postings = tag_postings
+        self.keys = keys
+        self.key_postings = key_postings
+        # Ids ordered by mtime, for turning a time window into a slice
+        if by_mtime is None:
+            by_mtime = array("I", sorted(range(len(mtime)), key=mtime.__getitem__))
+        self.by_mtime = by_mtime
+        self._sorted_mtime: array | None = None
+        self._key_ids = {key.casefold(): i for i, key in enumerate(keys)}
+
+    def __len__(self) -> int:
+        return len(self.mtime)
+
+    @property
+    def sorted_mtime(self) -> array:
+        if self._sorted_mtime is None:
+            mtime = self.mtime
+            self._sorted_mtime = array("q", (mtime[i] for i in self.by_mtime))
+        return self._sorted_mtime
+
+    @staticmethod
+    def paths(directory: Path | None = None) -> tuple[Path, Path]:
+        directory = directory or cache_dir()
+        return directory / "meta.json", directory / "meta.bin"
+
+    @classmethod
+    def build(
+        cls,
+        stats: list[tuple[int, int, int]],
+        tags: list[list[str]],
+        keys: list[list[str]],
+    ) -> "MetadataIndex":
+        """
+        Index over notes where stats[i] is (mtime_ns, ctime_ns, size) and
+        tags[i] / keys[i] are note i's tags and frontmatter keys.
+        """
+        columns = [array("q", column) for column in zip(*stats)] or [
+            array("q") for _ in range(3)
+        ]
+        tag_groups: dict[str, list[int]] = {}
+        for i, note_tags in enumerate(tags):
+            for tag in note_tags:
+                tag_groups.setdefault(tag, []).append(i)
+        key_groups: dict[str, list[int]] = {}
+        for i, note_keys in enumerate(keys):
+            for key in note_keys:
+                key_groups.setdefault(key, []).append(i)
+        tag_names = sorted(tag_groups)
+        key_names = sorted(key_groups)
+        return cls(
+            *columns,
+            tag_names,
+            _postings(tag_names, tag_groups),
+            key_names,
+            _postings(key_names, key_groups),
+        )
+
+    def save(self, key: dict, directory: Path | None = None):
+        header_path, data_path = self.paths(directory)
+        tmp = temp_path(data_path)
+        with open(tmp, "wb") as f:
+            for part in (
+                self.mtime,
+                self.ctime,
+                self.size,
+                self.by_mtime,
+                *self.tag_postings,
+                *self.key_postings,
+            ):
+                part.tofile(f)
+        os.replace(tmp, data_path)
+        atomic_write_json(
+            header_path,
+            {
+                "version": METADATA_VERSION,
+                "key": key,
+                "itemsizes": [array("q").itemsize, array("I").itemsize],
+                "notes": len(self),
+                "tags": self.tags,
+                "tag_ids": len(self.tag_postings[1]),
+                "keys": self.keys,
+                "key_ids": len(self.key_postings[1]),
+            },
+        )
+
+    @classmethod
+    def load(cls, key: dict, directory: Path | None = None) -> "MetadataIndex | None":
+        """
+        The saved index, if it was built for `key` and is intact.
+        """
+        header_path, data_path = cls.paths(directory)
+        try:
+            with open(header_path, "r", encoding="utf-8") as f:
+                header = json.load(f)
+            if header.get("version") != METADATA_VERSION or header.get("key") != key:
+                return None
+            if header["itemsizes"] != [array("q").itemsize, array("I").itemsize]:
+                return None
+            with open(data_path, "rb") as f:
+                data = f.read()
+            n = header["notes"]
+            lengths = [
+                ("q", n),
+                ("q", n),
+                ("q", n),
+                ("I", n),
+                ("I", len(header["tags"]) + 1),
+                ("I", header["tag_ids"]),
+                ("I", len(header["keys"]) + 1),
+                ("I", header["key_ids"]),
+            ]
+            parts = []
+            offset = 0
+            for typecode, length in lengths:
+                part = array(typecode)
+                end = offset + length * part.itemsize
+                part.frombytes(data[offset:end])
+                parts.append(part)
+                offset = end
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if offset != len(data):
+            return None
+        return cls(
+            parts[0],
+            parts[1],
+            parts[2],
+            header["tags"],
+            (parts[4], parts[5]),
+            header["keys"],
+            (parts[6], parts[7]),
+            by_mtime=parts[3],
+        )
+
+    def modified_between(
+        self, since: float | None = None, until: float | None = None
+    ) -> array:
+        """
+        Ids of notes modified in [since, until) (epoch seconds), oldest first.
+        """
+        lo = 0 if since is None else bisect_left(self.sorted_mtime, int(since * 1e9))
+        hi = (
+            len(self.sorted_mtime)
+            if until is None
+            else bisect_left(self.sorted_mtime, int(until * 1e9))
+        )
+        return self.by_mtime[lo:hi]
+
+    def tagged(self, tag: str) -> array:
+        """
+        Ids of notes with `tag` (or a tag nested under it: "work" also
+        matches "work/meetings").
+        """
+        tag = tag.lstrip("#").casefold()
+        offsets, ids = self.tag_postings
+        # Tag names are sorted, so the tag and its children are two ranges
+        lo, hi = bisect_left(self.tags, f"{tag}/"), bisect_left(self.tags, f"{tag}0")
+        matched = list(range(lo, hi))
+        exact = bisect_left(self.tags, tag)
+        if exact < len(self.tags) and self.tags[exact] == tag:
+            if not matched:
+                return ids[offsets[exact] : offsets[exact + 1]]
+            matched.append(exact)
+        found: set[int] = set()
+        for i in matched:
+            found.update(ids[offsets[i] : offsets[i + 1]])
+        return array("I", sorted(found))
+
+    def with_key(self, key: str) -> array:
+        """
+        Ids of notes whose frontmatter sets `key`.
+        """
+        index = self._key_ids.get(key.casefold())
+        if index is None:
+            return array("I")
+        offsets, ids = self.key_postings
+        return ids[offsets[index] : offsets[index + 1]]
+
+    def select(
+        self,
+        since: float | None = None,
+        until: float | None = None,
+        tags: Iterable[str] = (),
+        keys: Iterable[str] = (),
+    ) -> list[int]:
+        """
+        Ids matching every filter, most recently modified first.
+        """
+        sets = [set(self.tagged(tag)) for tag in tags]
+        sets += [set(self.with_key(key)) for key in keys]
+        window = self.modified_between(since, until)
+        if not sets:
+            return window[::-1].tolist()
+        sets.sort(key=len)
+        allowed = sets[0].intersection(*sets[1:])
+        if since is None and until is None:
+            return sorted(allowed, key=self.mtime.__getitem__, reverse=True)
+        return [i for i in reversed(window) if i in allowed]
+
+
+def note_metadata(content: str) -> tuple[list[str], list[str]]:
+    """
+    (tags, frontmatter keys) of a note.
+    """
+    match = FRONTMATTER_RE.match(content)
+    frontmatter = parse_frontmatter(match.group(1)) if match else {}
+    return extract_tags(content, frontmatter), list(frontmatter)
+
+
+def sync_metadata_index(
+    catalog: "VaultCatalog", directory: Path | None = None
+) -> MetadataIndex:
+    """
+    The metadata index for the catalog's current notes, re-reading only
+    notes whose size or mtime changed since they were last read.
+    """
+    directory = directory or cache_dir()
+    key = {"root": str(catalog.root), "digest": catalog.digest()}
+    index = MetadataIndex.load(key, directory)
+    if index is not None:
+        return index
+
+    cache_path = directory / "metadata.json"
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("root") != key["root"]:
+            cached = {}
+    except (OSError, ValueError):
+        cached = {}
+    previous: dict[str, list] = cached.get("notes", {})
+
+    entries = catalog.unique_entries()
+    notes: dict[str, list] = {}
+    stale = []
+    for entry in entries:
+        record = previous.get(entry.rel)
+        if record is not None and record[:2] == [entry.size, entry.mtime_ns]:
+            notes[entry.rel] = record
+        else:
+            stale.append(entry)
+
+    for start in range(0, len(stale), SYNC_BATCH_SIZE):
+        batch = stale[start : start + SYNC_BATCH_SIZE]
+        note_files = read_catalog_files(catalog, batch)
+        for entry, note_file in zip(batch, note_files):
+            if note_file is None:
+                continue
+            catalog.record_hash(entry.rel, note_file.digest)
+            tags, keys = note_metadata(note_file.content)
+            ctime_ns = int(note_file.created_at * 1e9)
+            notes[entry.rel] = [entry.size, entry.mtime_ns, ctime_ns, tags, keys]
+    catalog.save()
+    if stale or len(notes) != len(previous):
+        atomic_write_json(cache_path, {"root": key["root"], "notes": notes})
+
+    stats = []
+    tags = []
+    keys = []
+    for entry in entries:
+        record = notes.get(entry.rel, [entry.size, entry.mtime_ns, 0, [], []])
+        stats.append((entry.mtime_ns, record[2], entry.size))
+        tags.append(record[3])
+        keys.append(record[4])
+    index = MetadataIndex.build(stats, tags, keys)
+    index.save(key, directory)
+    logger.info(
+        f"Metadata index: {len(index)} notes, {len(index.tags)} tags, "
+        f"{len(stale)} notes re-read"
+    )
+    return index
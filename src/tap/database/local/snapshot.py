@@ -0,0 +1,329 @@
+"""
+Packed vault snapshot for fast bulk reads.
+
+Reading the whole vault opens, stats and closes thousands of small files, and
+on synced home directories that per-file overhead dominates. `tap snapshot`
+packs every note into one file:
+
+    magic | header length | JSON header | record table | note bytes
+
+The header holds the vault root, the catalog generation, the codec and the
+notes' relative paths; record i in the table is (offset, stored length, size,
+mtime_ns, ctime_ns, digest) for rels[i]. The file is memory-mapped, so an
+uncompressed note is decoded straight out of the page cache with no read
+call; with --compress each note is zstd-compressed on its own and
+decompressed on access.
+
+A note is served from the snapshot only while the file on disk still has the
+size and mtime recorded at packing time, checked with one stat per note (the
+catalog can't be trusted for this: between deep refreshes it misses in-place
+edits). Anything else is read from disk as usual, so a stale snapshot costs
+speed, never correctness. zstd
+support comes from the standard library (compression.zstd) or the optional
+zstandard package.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+
+from tap.database.obsidian.reader import NoteFile, read_note_files
+from tap.storage.config import cache_dir, temp_path
+
+if TYPE_CHECKING:
+    from tap.database.obsidian.catalog import CatalogEntry, VaultCatalog
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TAPSNAP1"
+HEADER_SIZE = struct.Struct("<Q")
+# offset, stored length, size, mtime_ns, ctime_ns, digest
+RECORD = struct.Struct("<QQQqq16s")
+# Notes read per batch while packing
+PACK_BATCH_SIZE = 256
+DEFAULT_LEVEL = 3
+
+
+def snapshot_file() -> Path:
+    return cache_dir() / "snapshot.bin"
+
+
+def _zstd():
+    """
+    (compress(data, level), decompress(data)) from whichever zstd binding is
+    installed.
+    """
+    try:
+        from compression import zstd  # type: ignore[import-not-found]
+
+        return (
+            lambda data, level: zstd.compress(data, level=level),
+            zstd.decompress,
+        )
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError(
+            "Compressed snapshots need zstd: install the zstandard package"
+        ) from e
+    decompressor = zstandard.ZstdDecompressor()
+    return (
+        lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+        decompressor.decompress,
+    )
+
+
+class VaultSnapshot:
+    def __init__(self, path: Path, buffer: mmap.mmap, header: dict, table: int):
+        self.path = path
+        self.root = Path(header["root"])
+        self.generation: int = header["generation"]
+        self.codec: str | None = header["codec"]
+        self.rels: list[str] = header["rels"]
+        self.ids = {rel: i for i, rel in enumerate(self.rels)}
+        self._decompress = _zstd()[1] if self.codec == "zstd" else None
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self._table = table
+
+    @classmethod
+    def open(cls, path: Path | None = None) -> "VaultSnapshot | None":
+        """
+        Map the snapshot file, or None if there isn't a valid one.
+        """
+        path = path or snapshot_file()
+        try:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            if buffer[: len(MAGIC)] != MAGIC:
+                raise ValueError("bad magic")
+            start = len(MAGIC) + HEADER_SIZE.size
+            (length,) = HEADER_SIZE.unpack_from(buffer, len(MAGIC))
+            header = json.loads(buffer[start : start + length])
+            if start + length + len(header["rels"]) * RECORD.size > len(buffer):
+                raise ValueError("truncated")
+            snapshot = cls(path, buffer, header, start + length)
+        except (ValueError, KeyError, TypeError, struct.error, RuntimeError) as e:
+            logger.warning(f"Ignoring snapshot {path}: {e}")
+            buffer.close()
+            return None
+        return snapshot
+
+    def __len__(self) -> int:
+        return len(self.rels)
+
+    def record(self, i: int) -> tuple[int, int, int, int, int, bytes]:
+        return RECORD.unpack_from(self._buffer, self._table + i * RECORD.size)
+
+    def note_file(
+        self, rel: str, size: int | None = None, mtime_ns: int | None = None
+    ) -> NoteFile | None:
+        """
+        The note at `rel` as packed, or None if it isn't in the snapshot or
+        its packed size/mtime differ from the ones given.
+        """
+        i = self.ids.get(rel)
+        if i is None:
+            return None
+        offset, length, packed_size, packed_mtime, ctime_ns, digest = self.record(i)
+        if size is not None and size != packed_size:
+            return None
+        if mtime_ns is not None and mtime_ns != packed_mtime:
+            return None
+        data = self._view[offset : offset + length]
+        if self._decompress is not None:
+            data = self._decompress(data)
+        return NoteFile(
+            path=self.root / rel,
+            content=str(data, "utf-8"),
+            digest=digest.hex(),
+            size=packed_size,
+            created_at=ctime_ns / 1e9,
+            updated_at=packed_mtime / 1e9,
+        )
+
+    def read_fresh(self, paths: list[Path]) -> list[NoteFile | None]:
+        """
+        Like reader.read_note_files, but notes whose file still matches the
+        snapshot come from the snapshot; only the rest are read from disk.
+        """
+        results: list[NoteFile | None] = [None] * len(paths)
+        missing: list[int] = []
+        for i, path in enumerate(paths):
+            results[i] = self.read_stat(path)
+            if results[i] is None:
+                missing.append(i)
+        if missing:
+            read = read_note_files([paths[i] for i in missing])
+            for i, note_file in zip(missing, read):
+                results[i] = note_file
+        return results
+
+    def read_stat(self, path: Path) -> NoteFile | None:
+        """
+        The note at `path` if the file on disk still matches the snapshot,
+        checked with one stat instead of a full read.
+        """
+        rel = _relative(path, self.root)
+        if rel is None or rel not in self.ids:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return self.note_file(rel, st.st_size, st.st_mtime_ns)
+
+
+def _relative(path: Path, root: Path) -> str | None:
+    # String slicing: Path.relative_to dominates the cost of a snapshot hit
+    prefix = os.path.join(root, "")
+    name = os.fspath(path)
+    if not name.startswith(prefix):
+        return None
+    return name[len(prefix) :].replace(os.sep, "/")
+
+
+# Last opened snapshot and the (inode, mtime) of the file it came from
+_opened: tuple[tuple[int, int], VaultSnapshot | None] | None = None
+
+
+def open_snapshot(root: Path) -> VaultSnapshot | None:
+    """
+    The snapshot of the vault at `root`, if there is one. Reopened only when
+    the snapshot file has been replaced, so batch readers can call this per
+    batch.
+    """
+    global _opened
+    try:
+        st = os.stat(snapshot_file())
+    except OSError:
+        return None
+    key = (st.st_ino, st.st_mtime_ns)
+    if _opened is None or _opened[0] != key:
+        _opened = (key, VaultSnapshot.open())
+    snapshot = _opened[1]
+    if snapshot is None or snapshot.root != Path(root):
+        return None
+    return snapshot
+
+
+def read_catalog_files(
+    catalog: "VaultCatalog", entries: list["CatalogEntry"]
+) -> list[NoteFile | None]:
+    """
+    Read these catalog entries, from the snapshot where it is fresh and from
+    disk otherwise.
+    """
+    paths = [catalog.root / entry.rel for entry in entries]
+    snapshot = open_snapshot(catalog.root)
+    if snapshot is None:
+        return read_note_files(paths)
+    return snapshot.read_fresh(paths)
+
+
+def build_snapshot(
+    catalog: "VaultCatalog",
+    path: Path | None = None,
+    compress: bool = False,
+    level: int = DEFAULT_LEVEL,
+) -> tuple[int, int]:
+    """
+    Pack the catalog's unique notes into a snapshot file. Returns (notes,
+    bytes written).
+    """
+    compressor = _zstd()[0] if compress else None
+    path = path or snapshot_file()
+    entries = catalog.unique_entries()
+    records: list[tuple[int, int, int, int, int, bytes]] = []
+    rels: list[str] = []
+    tmp = temp_path(path)
+    with open(tmp, "wb") as data_file:
+        offset = 0
+        for start in range(0, len(entries), PACK_BATCH_SIZE):
+            batch = entries[start : start + PACK_BATCH_SIZE]
+            note_files = read_note_files([catalog.root / e.rel for e in batch])
+            for entry, note_file in zip(batch, note_files):
+                if note_file is None:
+                    continue
+                catalog.record_hash(entry.rel, note_file.digest)
+                data = note_file.content.encode("utf-8")
+                if compressor is not None:
+                    data = compressor(data, level)
+                data_file.write(data)
+                records.append(
+                    (
+                        offset,
+                        len(data),
+                        note_file.size,
+                        # The catalog's mtime is what freshness is checked against
+                        entry.mtime_ns,
+                        int(note_file.created_at * 1e9),
+                        bytes.fromhex(note_file.digest),
+                    )
+                )
+                rels.append(entry.rel)
+                offset += len(data)
+    catalog.save()
+
+    header = json.dumps(
+        {
+            "root": str(catalog.root),
+            "generation": catalog.generation,
+            "codec": "zstd" if compressor is not None else None,
+            "created_at": time.time(),
+            "rels": rels,
+        }
+    ).encode("utf-8")
+    table_end = len(MAGIC) + HEADER_SIZE.size + len(header) + len(records) * RECORD.size
+    packed = temp_path(path, ".packed")
+    with open(packed, "wb") as out, open(tmp, "rb") as data_file:
+        out.write(MAGIC)
+        out.write(HEADER_SIZE.pack(len(header)))
+        out.write(header)
+        for offset, *rest in records:
+            out.write(RECORD.pack(table_end + offset, *rest))
+        while chunk := data_file.read(1 << 20):
+            out.write(chunk)
+        written = out.tell()
+    os.remove(tmp)
+    os.replace(packed, path)
+    return len(records), written
+
+
+def snapshot(compress: bool = False, level: int = DEFAULT_LEVEL, remove: bool = False):
+    """
+    `tap snapshot`: pack the vault (or remove the snapshot).
+    """
+    if remove:
+        try:
+            os.remove(snapshot_file())
+            print("Snapshot removed")
+        except FileNotFoundError:
+            print("No snapshot to remove")
+        return
+    from tap.database.obsidian.vault import Vault
+
+    catalog = Vault().catalog
+    catalog.refresh(deep=True)
+    started = time.monotonic()
+    try:
+        count, written = build_snapshot(catalog, compress=compress, level=level)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(
+        f"Packed {count} notes into {snapshot_file()} "
+        f"({written / 1e6:.1f} MB) in {time.monotonic() - started:.1f}s"
+    )
+
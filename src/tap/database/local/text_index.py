@@ -0,0 +1,256 @@
+"""
+Full-text (BM25) index over note contents.
+
+Title matching can't find a note by a phrase in its body, and vector search
+needs embeddings. This keeps an SQLite FTS5 inverted index (porter-stemmed,
+diacritics folded) next to the vault catalog, ranked with BM25 and with title
+matches weighted above body matches.
+
+Sync is incremental: each indexed file's size and mtime are stored, and only
+files that differ from the catalog are re-read. When the catalog digest
+hasn't changed since the last sync, nothing is compared at all. In-place edits
+are seen once the catalog has been deep-refreshed: `tap watch`, the search
+service (see SearchService.content_vault) and the index CLI all do this.
+
+Queries are plain keywords, with "double quoted" phrases matched exactly:
+
+    tap -c 'burnout "weekly review"'
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+import logging
+import re
+import sqlite3
+import threading
+
+from tap.database.local.snapshot import read_catalog_files
+from tap.storage.config import cache_dir
+
+if TYPE_CHECKING:
+    from tap.database.obsidian.catalog import VaultCatalog
+
+logger = logging.getLogger(__name__)
+
+# Notes read per batch while syncing
+SYNC_BATCH_SIZE = 256
+# BM25 column weights: title, body
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+
+TERM_RE = re.compile(r"\w+")
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    rel TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes USING fts5(
+    title, body, tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def match_expression(query: str, operator: str = "AND") -> str | None:
+    """
+    FTS5 MATCH expression for a user query: quoted phrases must all match,
+    loose terms are combined with `operator`. Every token is quoted, so FTS5
+    syntax in the query (NEAR, *, column filters) is treated as text.
+    """
+    phrases = [
+        '"' + " ".join(terms) + '"'
+        for phrase in PHRASE_RE.findall(query)
+        if (terms := TERM_RE.findall(phrase))
+    ]
+    loose = [f'"{term}"' for term in TERM_RE.findall(PHRASE_RE.sub(" ", query))]
+    parts = phrases[:]
+    if loose:
+        parts.append("(" + f" {operator} ".join(loose) + ")")
+    return " AND ".join(parts) or None
+
+
+class TextIndex:
+    def __init__(self, path: Path | None = None):
+        self.path = path or cache_dir() / "fulltext.sqlite"
+        self._conn: sqlite3.Connection | None = None
+        # The daemon shares one index across its worker threads
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _meta(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,))
+        found = row.fetchone()
+        return found[0] if found else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def sync(self, catalog: "VaultCatalog") -> int:
+        """
+        Bring the index in line with the catalog's unique notes. Returns the
+        number of notes (re)indexed or removed.
+        """
+        with self._lock:
+            return self._sync(catalog)
+
+    def _sync(self, catalog: "VaultCatalog") -> int:
+        root = str(catalog.root)
+        digest = catalog.digest()
+        if self._meta("root") == root and self._meta("digest") == digest:
+            return 0
+
+        conn = self.conn
+        if self._meta("root") != root:
+            with conn:
+                conn.execute("DELETE FROM docs")
+                conn.execute("DELETE FROM notes")
+                self._set_meta("root", root)
+
+        indexed = {
+            rel: (doc_id, size, mtime_ns)
+            for doc_id, rel, size, mtime_ns in conn.execute(
+                "SELECT id, rel, size, mtime_ns FROM docs"
+            )
+        }
+        entries = catalog.unique_entries()
+        current = {entry.rel for entry in entries}
+        removed = [indexed[rel][0] for rel in indexed if rel not in current]
+        stale = [
+            entry
+            for entry in entries
+            if indexed.get(entry.rel, (None, None, None))[1:]
+            != (entry.size, entry.mtime_ns)
+        ]
+        if removed:
+            with conn:
+                self._delete(removed)
+
+        for start in range(0, len(stale), SYNC_BATCH_SIZE):
+            batch = stale[start : start + SYNC_BATCH_SIZE]
+            note_files = read_catalog_files(catalog, batch)
+            with conn:
+                self._delete([indexed[e.rel][0] for e in batch if e.rel in indexed])
+                for entry, note_file in zip(batch, note_files):
+                    if note_file is None:
+                        continue
+                    catalog.record_hash(entry.rel, note_file.digest)
+                    cursor = conn.execute(
+                        "INSERT INTO docs (rel, size, mtime_ns) VALUES (?, ?, ?)",
+                        (entry.rel, entry.size, entry.mtime_ns),
+                    )
+                    conn.execute(
+                        "INSERT INTO notes (rowid, title, body) VALUES (?, ?, ?)",
+                        (cursor.lastrowid, entry.stem, note_file.content),
+                    )
+        with conn:
+            self._set_meta("digest", digest)
+        catalog.save()
+        if removed or stale:
+            logger.info(
+                f"Full-text index: {len(stale)} notes indexed, {len(removed)} removed"
+            )
+        return len(stale) + len(removed)
+
+    def _delete(self, doc_ids: list[int]):
+        self.conn.executemany("DELETE FROM docs WHERE id = ?", [(i,) for i in doc_ids])
+        self.conn.executemany(
+            "DELETE FROM notes WHERE rowid = ?", [(i,) for i in doc_ids]
+        )
+
+    def _query(
+        self, expression: str, limit: int, within: bool = False
+    ) -> list[tuple[str, float]]:
+        restrict = "AND docs.rel IN (SELECT rel FROM temp.within) " if within else ""
+        return self.conn.execute(
+            "SELECT docs.rel, bm25(notes, ?, ?) AS score FROM notes "
+            "JOIN docs ON docs.id = notes.rowid "
+            f"WHERE notes MATCH ? {restrict}ORDER BY score LIMIT ?",
+            (TITLE_WEIGHT, BODY_WEIGHT, expression, limit),
+        ).fetchall()
+
+    def _set_within(self, rels: list[str]):
+        conn = self.conn
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS within (rel TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.within")
+        conn.executemany(
+            "INSERT OR IGNORE INTO temp.within VALUES (?)", [(r,) for r in rels]
+        )
+        conn.commit()
+
+    def search(
+        self, query: str, limit: int = 5, within: list[str] | None = None
+    ) -> list[tuple[str, float, int]]:
+        """
+        BM25-ranked (title, score, rank) matches, best first; higher scores
+        are better. Notes containing every term are preferred; if there are
+        none, any term will do. `within` restricts matching to these
+        vault-relative paths.
+        """
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        with self._lock:
+            if within is not None:
+                self._set_within(within)
+            restrict = within is not None
+            rows = self._query(expression, limit, restrict)
+            if not rows:
+                fallback = match_expression(query, operator="OR")
+                if fallback and fallback != expression:
+                    rows = self._query(fallback, limit, restrict)
+        return [
+            (Path(rel).stem, round(-score, 3), rank)
+            for rank, (rel, score) in enumerate(rows)
+        ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()
+        return count
+
+
+def main():
+    import argparse
+    import sys
+    from tap.database.obsidian.vault import Vault
+
+    parser = argparse.ArgumentParser(
+        description="Build or query the full-text index for the vault."
+    )
+    parser.add_argument("query", nargs="?", help="Search the index after syncing.")
+    parser.add_argument(
+        "--limit", type=int, default=5, help="Number of matches to return."
+    )
+    args = parser.parse_args()
+
+    catalog = Vault().catalog
+    # In-place edits don't bump directory mtimes, so stat every file here
+    catalog.refresh(deep=True)
+    index = TextIndex()
+    changed = index.sync(catalog)
+    print(
+        f"Full-text index holds {len(index)} notes ({changed} updated)",
+        file=sys.stderr,
+    )
+    if args.query:
+        for title, score, _ in index.search(args.query, args.limit):
+            print(f"{score:8.3f}  {title}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+Chroma-free vector index kept next to the vault catalog.
+
+Normalised embeddings live in a .npy matrix that is memory-mapped on load, with
+a small JSON sidecar holding the row ids, content hashes and model name. A
+top-k query is one matrix-vector product plus an argpartition, which answers
+in milliseconds for tens of thousands of notes and needs no server.
+
+Every sync writes its matrix to a new file named by a version that the sidecar
+records, and replacing the sidecar is what publishes it: a reader always gets
+a matrix and ids from the same sync, even while a writer is mid-update.
+
+Sync is incremental like the Chroma loader: rows whose content hash is
+unchanged are copied across, and only new or edited notes are embedded.
+
+A second index, "chunks", holds one row per heading-aware passage (see
+tap.database.obsidian.chunking) with the owning note and heading path per row,
+for passage retrieval over long notes.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+import json
+import logging
+import os
+import time
+
+from tap.database.local.snapshot import read_catalog_files
+from tap.database.obsidian.catalog import CatalogEntry
+from tap.database.obsidian.chunking import chunk_note
+from tap.query.embeddings import EMBEDDING_MODEL, embed
+from tap.storage.config import atomic_write_json, cache_dir, temp_path
+
+if TYPE_CHECKING:
+    import numpy as np
+    from tap.database.obsidian.vault import Vault
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "notes"
+CHUNK_INDEX_NAME = "chunks"
+DEFAULT_BATCH_SIZE = 64
+
+
+def index_dir() -> Path:
+    path = cache_dir() / "vectors"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class LocalVectorIndex:
+    def __init__(
+        self,
+        ids: list[str],
+        hashes: list[str],
+        matrix: "np.ndarray",
+        model: str = EMBEDDING_MODEL,
+        notes: list[str] | None = None,
+        headings: list[str] | None = None,
+        version: str | None = None,
+    ):
+        self.ids = ids
+        self.hashes = hashes
+        self.matrix = matrix
+        self.model = model
+        self.version = version
+        # Owning note and heading path per row; a note index is one row per note
+        self.notes = notes or ids
+        self.headings = headings or [""] * len(ids)
+        self._rows: dict[str, int] | None = None
+
+    @staticmethod
+    def paths(name: str = INDEX_NAME, version: str | None = None) -> tuple[Path, Path]:
+        """
+        (matrix, sidecar) paths; the matrix of a given version, or the
+        unversioned one written before versions existed.
+        """
+        directory = index_dir()
+        matrix = f"{name}.{version}.npy" if version else f"{name}.npy"
+        return directory / matrix, directory / f"{name}.json"
+
+    @classmethod
+    def exists(cls, name: str = INDEX_NAME) -> bool:
+        return cls.paths(name)[1].exists()
+
+    @classmethod
+    def load(cls, name: str = INDEX_NAME) -> "LocalVectorIndex | None":
+        import numpy as np
+
+        _, meta_path = cls.paths(name)
+        # A sync can replace the index between reading the sidecar and opening
+        # the matrix it names; the sidecar read on the retry names the new one
+        for _ in range(3):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                matrix_path, _ = cls.paths(name, meta.get("version"))
+                matrix = np.load(matrix_path, mmap_mode="r")
+                break
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError):
+                return None
+        else:
+            return None
+        if matrix.shape[0] != len(meta["ids"]):
+            logger.warning(f"Local vector index {name} is inconsistent, ignoring it")
+            return None
+        return cls(
+            meta["ids"],
+            meta["hashes"],
+            matrix,
+            meta["model"],
+            meta.get("notes"),
+            meta.get("headings"),
+            meta.get("version"),
+        )
+
+    def rows(self, ids: list[str]) -> list[int]:
+        """
+        Rows holding `ids`, skipping ids that aren't in the index.
+        """
+        if self._rows is None:
+            self._rows = {id: row for row, id in enumerate(self.ids)}
+        return [self._rows[id] for id in ids if id in self._rows]
+
+    def nearest(
+        self,
+        embeddings: "np.ndarray",
+        limit: int = 5,
+        within: list[int] | None = None,
+    ) -> list[list[tuple[int, float]]]:
+        """
+        Top `limit` rows per query embedding as (row, cosine distance), nearest
+        first, optionally among the `within` rows only. Distances are 1 -
+        cosine similarity, so lower is better; the Chroma collections are
+        created with the cosine space to match.
+        """
+        import numpy as np
+
+        candidates = None if within is None else np.asarray(within, dtype=np.intp)
+        matrix = self.matrix if candidates is None else self.matrix[candidates]
+        n = matrix.shape[0]
+        if n == 0 or limit <= 0:
+            return [[] for _ in range(len(embeddings))]
+        k = min(limit, n)
+        scores = np.atleast_2d(embeddings) @ matrix.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results: list[list[tuple[int, float]]] = []
+        for row, indices in zip(scores, top):
+            ordered = indices[np.argsort(-row[indices], kind="stable")]
+            rows = ordered if candidates is None else candidates[ordered]
+            results.append(
+                [(int(r), float(1.0 - row[i])) for r, i in zip(rows, ordered)]
+            )
+        return results
+
+    def query(
+        self,
+        embeddings: "np.ndarray",
+        limit: int = 5,
+        within: list[int] | None = None,
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Top `limit` rows per query embedding as (id, cosine distance).
+        """
+        return [
+            [(self.ids[i], distance) for i, distance in hits]
+            for hits in self.nearest(embeddings, limit, within)
+        ]
+
+    def embed_queries(self, queries: list[str]) -> "np.ndarray":
+        from tap.query.embedding_cache import get_query_cache
+
+        return get_query_cache().embed(
+            queries, self.model, lambda texts: embed(texts, self.model)
+        )
+
+    def search(
+        self, queries: list[str], limit: int = 5
+    ) -> list[list[tuple[str, float]]]:
+        return self.query(self.embed_queries(queries), limit)
+
+
+def _resize(path: Path, matrix: "np.ndarray", rows: int, chunk: int = 4096):
+    """
+    Rewrite the .npy at `path` with room for `rows` rows, keeping as many of
+    the existing rows as fit. Copies in chunks rather than materialising the
+    matrix.
+    """
+    import numpy as np
+
+    resized_path = path.with_name(f"{path.stem}.resize.npy")
+    out = np.lib.format.open_memmap(
+        resized_path, mode="w+", dtype=np.float32, shape=(rows, matrix.shape[1])
+    )
+    kept = min(rows, matrix.shape[0])
+    for start in range(0, kept, chunk):
+        out[start : start + chunk] = matrix[start : min(start + chunk, kept)]
+    out.flush()
+    del out
+    os.replace(resized_path, path)
+
+
+def sync_local_index(
+    vault: "Vault",
+    full: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Callable[[int, int], None] | None = None,
+    chunks: bool = False,
+) -> LocalVectorIndex:
+    """
+    Bring the local index in line with the vault, embedding only notes whose
+    content hash changed. Rows are streamed into the new matrix batch by batch,
+    so memory stays bounded by the batch size. With chunks=True the passage
+    index is synced instead, with one row per chunk.
+    """
+    import numpy as np
+
+    name = CHUNK_INDEX_NAME if chunks else INDEX_NAME
+    catalog = vault.catalog
+    catalog.refresh(deep=True)
+    entries = catalog.unique_entries()
+
+    old = None if full else LocalVectorIndex.load(name)
+    if old is not None and old.model != EMBEDDING_MODEL:
+        old = None
+    old_rows: dict[str, list[int]] = {}
+    if old is not None:
+        for i, note in enumerate(old.notes):
+            old_rows.setdefault(note, []).append(i)
+
+    version = f"{time.time_ns():x}"
+    matrix_path, meta_path = LocalVectorIndex.paths(name, version)
+    tmp_path = temp_path(matrix_path, ".tmp.npy")
+    matrix = None
+    ids: list[str] = []
+    hashes: list[str] = []
+    notes: list[str] = []
+    headings: list[str] = []
+    embedded = 0
+
+    def reusable(entry: CatalogEntry) -> bool:
+        rows = old_rows.get(entry.stem)
+        return rows is not None and entry.hash == old.hashes[rows[0]]
+
+    def records(entry: CatalogEntry, content: str) -> list[tuple[str, str, str]]:
+        """
+        (row id, heading, text to embed) for each row of a note.
+        """
+        if not chunks:
+            return [(entry.stem, "", content)]
+        return [
+            (c.chunk_id(entry.stem), c.heading, c.embedding_text(entry.stem))
+            for c in chunk_note(content)
+        ]
+
+    try:
+        for start in range(0, len(entries), batch_size):
+            batch = entries[start : start + batch_size]
+            to_read = [entry for entry in batch if not reusable(entry)]
+            contents: dict[str, str] = {}
+            for entry, note_file in zip(to_read, read_catalog_files(catalog, to_read)):
+                if note_file is not None:
+                    catalog.record_hash(entry.rel, note_file.digest)
+                    contents[entry.rel] = note_file.content
+
+            # Hashes are known now; some unread-before entries may be unchanged
+            fresh = {
+                entry.rel: records(entry, contents[entry.rel])
+                for entry in batch
+                if entry.rel in contents and not reusable(entry)
+            }
+            texts = [text for rows in fresh.values() for _, _, text in rows]
+            vectors = embed(texts) if texts else None
+            embedded += len(fresh)
+            offsets: dict[str, int] = {}
+            offset = 0
+            for rel, rows in fresh.items():
+                offsets[rel] = offset
+                offset += len(rows)
+
+            block_rows = []
+            for entry in batch:
+                if reusable(entry):
+                    for i in old_rows[entry.stem]:
+                        block_rows.append(old.matrix[i])
+                        ids.append(old.ids[i])
+                        headings.append(old.headings[i])
+                        hashes.append(entry.hash)
+                        notes.append(entry.stem)
+                elif entry.rel in fresh:
+                    for j, (row_id, heading, _) in enumerate(fresh[entry.rel]):
+                        block_rows.append(vectors[offsets[entry.rel] + j])
+                        ids.append(row_id)
+                        headings.append(heading)
+                        hashes.append(entry.hash)
+                        notes.append(entry.stem)
+                # else unreadable
+            if not block_rows:
+                continue
+
+            block = np.stack(block_rows).astype(np.float32, copy=False)
+            if matrix is None:
+                # Capacity estimate; grown as needed and trimmed at the end
+                capacity = max(len(entries) * (4 if chunks else 1), len(ids))
+                matrix = np.lib.format.open_memmap(
+                    tmp_path,
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=(capacity, block.shape[1]),
+                )
+            elif len(ids) > matrix.shape[0]:
+                capacity = max(matrix.shape[0] * 2, len(ids))
+                matrix.flush()
+                _resize(tmp_path, matrix, capacity)
+                del matrix
+                matrix = np.load(tmp_path, mmap_mode="r+")
+            matrix[len(ids) - len(block_rows) : len(ids)] = block
+            if progress:
+                progress(min(start + batch_size, len(entries)), len(entries))
+
+        if matrix is None:
+            np.save(tmp_path, np.zeros((0, 0), dtype=np.float32))
+        else:
+            matrix.flush()
+            if len(ids) < matrix.shape[0]:
+                _resize(tmp_path, matrix, len(ids))
+            del matrix
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        catalog.save()
+
+    os.replace(tmp_path, matrix_path)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            previous: str | None = json.load(f).get("version")
+    except (OSError, ValueError):
+        previous = None
+    meta = {"model": EMBEDDING_MODEL, "version": version, "ids": ids, "hashes": hashes}
+    if chunks:
+        meta.update(notes=notes, headings=headings)
+    atomic_write_json(meta_path, meta)
+    # Readers that already mapped the old matrix keep it until they let go
+    LocalVectorIndex.paths(name, previous)[0].unlink(missing_ok=True)
+    if not chunks:
+        from tap.query.result_cache import invalidate_vector_results
+
+        invalidate_vector_results()
+    logger.info(
+        f"Local vector index {name}: {len(ids)} rows, {embedded} notes embedded"
+    )
+    return LocalVectorIndex.load(name)  # type: ignore[return-value]
+
+
+def main():
+    import argparse
+    import sys
+    from tap.database.obsidian.vault import Vault
+
+    parser = argparse.ArgumentParser(
+        description="Build the local (Chroma-free) vector index for the vault."
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="Re-embed every note from scratch."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Notes per read/embed batch (default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--chunks",
+        action="store_true",
+        help="Build the heading-aware passage index used by `tap --passages`.",
+    )
+    args = parser.parse_args()
+
+    def report(done: int, total: int):
+        print(f"\rIndexed {done}/{total} notes", end="", file=sys.stderr, flush=True)
+
+    index = sync_local_index(
+        Vault(),
+        full=args.full,
+        batch_size=args.batch_size,
+        progress=report,
+        chunks=args.chunks,
+    )
+    rows = "passages" if args.chunks else "notes"
+    print(f"\nLocal vector index holds {len(index.ids)} {rows}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+Persistent catalog of the markdown files in a vault.
+
+Walking a large vault with rglob on every invocation dominates cold start, so
+the catalog records every note (relative path, stem, size, mtime, content hash)
+plus the mtime of every directory. On load we only stat the directories: a file
+being added, removed or renamed bumps its parent directory's mtime, so only
+those directories need to be re-listed. If too many directories changed, or
+the catalog belongs to a different vault/version, we fall back to a full scan.
+
+In-place edits don't touch directory mtimes; callers that care about file
+contents (indexing) should use refresh(deep=True), which also stats each file.
+
+Derived indexes are keyed by the catalog's generation, which goes up on every
+change. A catalog rebuilt from scratch (missing or corrupt file, another
+vault, a format change) starts from the current time in nanoseconds rather
+than from zero, so a generation number never comes back for a different set
+of notes. Generations alone don't name a vault state across processes,
+though: two of them can each advance the same saved generation over
+different edits. digest() does, from every entry's path, size and mtime.
+
+While `tap watch` is running it refreshes and saves the catalog as the vault
+changes, so loading skips the directory stats entirely.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import time
+
+from tap.storage.config import atomic_write_json, catalog_file, watch_lock_file
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 1
+# Rescan from scratch once more than this fraction of directories changed.
+DRIFT_RATIO = 0.5
+
+
+@dataclass(slots=True)
+class CatalogEntry:
+    rel: str
+    stem: str
+    size: int
+    mtime_ns: int
+    hash: str | None = None
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def watcher_active() -> bool:
+    """
+    True while a `tap watch` process holds the watch lock.
+    """
+    import fcntl
+
+    try:
+        fd = os.open(watch_lock_file(), os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)  # Also releases our shared lock
+    return False
+
+
+def _parent(rel: str) -> str:
+    head, _, _ = rel.rpartition("/")
+    return head
+
+
+def _join(parent: str, name: str) -> str:
+    return f"{parent}/{name}" if parent else name
+
+
+class VaultCatalog:
+    def __init__(self, root: Path, path: Path | None = None):
+        self.root = Path(root)
+        self.path = path or catalog_file()
+        self.entries: dict[str, CatalogEntry] = {}
+        self.dirs: dict[str, int] = {}
+        self.generation = 0
+        self.scanned_at = 0.0
+        self.dirty = False
+        self._unique: tuple[int, list[CatalogEntry]] | None = None
+        self._digest: tuple[int, str] | None = None
+        # mtime of the catalog file as last read or written
+        self._file_mtime_ns = 0
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    @classmethod
+    def load(cls, root: Path, path: Path | None = None) -> "VaultCatalog":
+        """
+        Load the catalog from disk and bring it up to date with the vault.
+        """
+        catalog = cls(root, path)
+        if not catalog._read():
+            # Never reuse a generation an earlier catalog may have had
+            catalog.generation = time.time_ns()
+            catalog.rescan()
+        elif not (catalog.path == catalog_file() and watcher_active()):
+            catalog.refresh()
+        catalog.save()
+        return catalog
+
+    @classmethod
+    def read(cls, root: Path, path: Path | None = None) -> "VaultCatalog | None":
+        """
+        The catalog as saved on disk, without refreshing it.
+        """
+        catalog = cls(root, path)
+        return catalog if catalog._read() else None
+
+    def reload(self) -> "VaultCatalog | None":
+        """
+        A fresh copy from disk if another process has since saved a newer
+        generation; costs one stat when nothing was saved.
+        """
+        try:
+            if os.stat(self.path).st_mtime_ns == self._file_mtime_ns:
+                return None
+        except OSError:
+            return None
+        fresh = VaultCatalog.read(self.root, self.path)
+        if fresh is None:
+            return None
+        self._file_mtime_ns = fresh._file_mtime_ns
+        return fresh if fresh.generation != self.generation else None
+
+    def _read(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._file_mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != CATALOG_VERSION or data.get("root") != str(
+            self.root
+        ):
+            return False
+        self.generation = data["generation"]
+        if data.get("digest"):
+            self._digest = (self.generation, data["digest"])
+        self.scanned_at = data["scanned_at"]
+        self.dirs = data["dirs"]
+        self.entries = {
+            rel: CatalogEntry(rel, stem, size, mtime_ns, digest)
+            for rel, stem, size, mtime_ns, digest in data["entries"]
+        }
+        return True
+
+    def save(self):
+        if not self.dirty:
+            return
+        atomic_write_json(
+            self.path,
+            {
+                "version": CATALOG_VERSION,
+                "root": str(self.root),
+                "generation": self.generation,
+                "digest": self.digest(),
+                "scanned_at": self.scanned_at,
+                "dirs": self.dirs,
+                "entries": [
+                    [e.rel, e.stem, e.size, e.mtime_ns, e.hash]
+                    for e in self.entries.values()
+                ],
+            },
+        )
+        self._file_mtime_ns = os.stat(self.path).st_mtime_ns
+        self.dirty = False
+
+    def _touch(self):
+        self.generation += 1
+        self.dirty = True
+
+    # ------------------------------------------------------------------
+    # Scanning
+    # ------------------------------------------------------------------
+    def rescan(self):
+        """
+        Walk the whole vault, keeping hashes for files whose size and mtime
+        are unchanged.
+        """
+        previous = self.entries
+        self.entries = {}
+        self.dirs = {}
+        self._walk("", previous)
+        self.scanned_at = time.time()
+        self._touch()
+
+    def refresh(self, deep: bool = False) -> bool:
+        """
+        Re-list only directories whose mtime changed. With deep=True, also
+        stat every known file to pick up in-place edits. Returns True if the
+        catalog changed.
+        """
+        changed: list[str] = []
+        for rel, mtime_ns in self.dirs.items():
+            try:
+                current = os.stat(self.root / rel).st_mtime_ns
+            except FileNotFoundError:
+                # Its parent's mtime changed too; the parent purges it.
+                continue
+            if current != mtime_ns:
+                changed.append(rel)
+
+        if not self.dirs or len(changed) > DRIFT_RATIO * len(self.dirs):
+            logger.info("Catalog drift detected, rescanning %s", self.root)
+            self.rescan()
+            return True
+
+        modified = False
+        if changed:
+            children: dict[str, list[str]] = {}
+            for rel in self.entries:
+                children.setdefault(_parent(rel), []).append(rel)
+            try:
+                for rel in changed:
+                    if rel in self.dirs:
+                        modified |= self._relist(rel, children.get(rel, []))
+            except OSError as e:
+                logger.info("Catalog refresh failed (%s), rescanning", e)
+                self.rescan()
+                return True
+        if deep:
+            modified |= self._verify_files()
+        if modified:
+            self._touch()
+        return modified
+
+    def _walk(self, rel_dir: str, previous: dict[str, CatalogEntry]):
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            try:
+                self.dirs[current] = os.stat(self.root / current).st_mtime_ns
+                with os.scandir(self.root / current) as it:
+                    for entry in it:
+                        rel = _join(current, entry.name)
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(rel)
+                        elif entry.name.endswith(".md") and entry.is_file():
+                            self._add(rel, entry.stat(), previous.get(rel))
+            except OSError as e:
+                logger.warning("Error scanning %s: %s", self.root / current, e)
+
+    def _relist(self, rel_dir: str, known_files: list[str]) -> bool:
+        """
+        Reconcile one directory's direct children with the catalog.
+        """
+        directory = self.root / rel_dir
+        seen_files: set[str] = set()
+        seen_dirs: set[str] = set()
+        modified = False
+        with os.scandir(directory) as it:
+            for entry in it:
+                rel = _join(rel_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    seen_dirs.add(rel)
+                    if rel not in self.dirs:
+                        self._walk(rel, {})
+                        modified = True
+                elif entry.name.endswith(".md") and entry.is_file():
+                    seen_files.add(rel)
+                    old = self.entries.get(rel)
+                    st = entry.stat()
+                    if (
+                        old is None
+                        or old.size != st.st_size
+                        or old.mtime_ns != st.st_mtime_ns
+                    ):
+                        self._add(rel, st, old)
+                        modified = True
+        self.dirs[rel_dir] = os.stat(directory).st_mtime_ns
+
+        for rel in known_files:
+            if rel not in seen_files:
+                del self.entries[rel]
+                modified = True
+        gone = [
+            d
+            for d in self.dirs
+            if d and _parent(d) == rel_dir and d not in seen_dirs
+        ]
+        for d in gone:
+            self._purge(d)
+            modified = True
+        return modified
+
+    def _purge(self, rel_dir: str):
+        prefix = f"{rel_dir}/"
+        for d in [d for d in self.dirs if d == rel_dir or d.startswith(prefix)]:
+            del self.dirs[d]
+        for rel in [r for r in self.entries if r.startswith(prefix)]:
+            del self.entries[rel]
+
+    def _verify_files(self) -> bool:
+        modified = False
+        for rel, entry in list(self.entries.items()):
+            try:
+                st = os.stat(self.root / rel)
+            except FileNotFoundError:
+                del self.entries[rel]
+                modified = True
+                continue
+            if entry.size != st.st_size or entry.mtime_ns != st.st_mtime_ns:
+                self._add(rel, st, None)
+                modified = True
+        return modified
+
+    def _add(self, rel: str, st: os.stat_result, old: CatalogEntry | None):
+        digest = None
+        if old and old.size == st.st_size and old.mtime_ns == st.st_mtime_ns:
+            digest = old.hash
+        self.entries[rel] = CatalogEntry(
+            rel, Path(rel).stem, st.st_size, st.st_mtime_ns, digest
+        )
+
+    # ------------------------------------------------------------------
+    # Content hashes (computed lazily; a cold scan never reads file bodies)
+    # ------------------------------------------------------------------
+    def record_hash(self, rel: str, digest: str) -> str:
+        """
+        Record the hash of content a caller has already read.
+        """
+        entry = self.entries.get(rel)
+        if entry is not None and entry.hash != digest:
+            entry.hash = digest
+            self.dirty = True
+        return digest
+
+    def content_hash(self, rel: str) -> str:
+        entry = self.entries[rel]
+        if entry.hash is None:
+            self.record_hash(rel, hash_bytes((self.root / rel).read_bytes()))
+        return entry.hash  # type: ignore[return-value]
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+    def unique_entries(self) -> list[CatalogEntry]:
+        """
+        Entries sorted by relative path; if several files share a name, keep
+        the first one.
+        """
+        if self._unique is not None and self._unique[0] == self.generation:
+            return self._unique[1]
+        seen: set[str] = set()
+        unique: list[CatalogEntry] = []
+        for rel in sorted(self.entries):
+            entry = self.entries[rel]
+            name = rel.rpartition("/")[2]
+            if name not in seen:
+                seen.add(name)
+                unique.append(entry)
+        self._unique = (self.generation, unique)
+        return unique
+
+    def digest(self) -> str:
+        """
+        Digest of the notes' paths, sizes and mtimes: equal digests mean the
+        same vault state, whichever process computed them.
+        """
+        if self._digest is not None and self._digest[0] == self.generation:
+            return self._digest[1]
+        h = hashlib.blake2b(digest_size=16)
+        for rel in sorted(self.entries):
+            entry = self.entries[rel]
+            h.update(f"{rel}\0{entry.size}\0{entry.mtime_ns}\n".encode())
+        self._digest = (self.generation, h.hexdigest())
+        return self._digest[1]
+
+    def __len__(self) -> int:
+        return len(self.entries)
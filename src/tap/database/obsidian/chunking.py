@@ -0,0 +1,114 @@
+"""
+Heading-aware chunking for passage-level embeddings.
+
+Embedding models truncate long input (all-MiniLM-L6-v2 stops at 256 word
+pieces), so a whole-note embedding only represents the note's opening. Notes
+are split at markdown headings, and sections that are still too long are
+split at paragraph breaks, then at whitespace. Each chunk records its
+character span in the note and its heading path; the embedded text is
+prefixed with "Title > Heading > Subheading" so short passages keep their
+context.
+
+Chunking is deterministic, so chunk n of an unchanged note is always the same
+span and chunk ids ("Title#n") stay stable across rebuilds.
+"""
+
+from typing import NamedTuple
+import re
+
+from tap.database.obsidian.parser import FRONTMATTER_RE
+
+# Roughly 256 word pieces of English prose
+MAX_CHUNK_CHARS = 1000
+HEADING_RE = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+FENCE_RE = re.compile(r"^[ \t]*(```|~~~)")
+PARAGRAPH_BREAK_RE = re.compile(r"\n[ \t]*\n")
+
+
+class Chunk(NamedTuple):
+    index: int
+    heading: str
+    start: int
+    end: int
+    text: str
+
+    def chunk_id(self, title: str) -> str:
+        return f"{title}#{self.index}"
+
+    def embedding_text(self, title: str) -> str:
+        breadcrumb = f"{title} > {self.heading}" if self.heading else title
+        return f"{breadcrumb}\n{self.text}"
+
+
+def _sections(content: str, offset: int) -> list[tuple[int, int, str]]:
+    """
+    (start, end, heading path) for each heading-delimited section, ignoring
+    '#' lines inside code fences.
+    """
+    sections: list[tuple[int, int, str]] = []
+    stack: list[tuple[int, str]] = []
+    start = offset
+    path = ""
+    in_fence = False
+    position = offset
+    for line in content[offset:].splitlines(keepends=True):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = HEADING_RE.match(line.rstrip("\r\n"))
+            if match:
+                sections.append((start, position, path))
+                level = len(match.group(1))
+                while stack and stack[-1][0] >= level:
+                    stack.pop()
+                stack.append((level, match.group(2).strip()))
+                path = " > ".join(text for _, text in stack)
+                start = position
+        position += len(line)
+    sections.append((start, len(content), path))
+    return [s for s in sections if content[s[0] : s[1]].strip()]
+
+
+def _split_long(content: str, start: int, end: int, limit: int) -> list[tuple[int, int]]:
+    """
+    Split [start, end) into spans of at most `limit` chars, preferring
+    paragraph breaks, then whitespace.
+    """
+    spans: list[tuple[int, int]] = []
+    breaks = [m.end() for m in PARAGRAPH_BREAK_RE.finditer(content, start, end)]
+    span_start = start
+    last_break = None
+    for point in breaks + [end]:
+        if point - span_start <= limit:
+            last_break = point
+            continue
+        if last_break is not None and last_break > span_start:
+            spans.append((span_start, last_break))
+            span_start = last_break
+        # A single paragraph longer than the limit: cut at whitespace
+        while point - span_start > limit:
+            cut = content.rfind(" ", span_start + limit // 2, span_start + limit)
+            cut = cut + 1 if cut != -1 else span_start + limit
+            spans.append((span_start, cut))
+            span_start = cut
+        last_break = point
+    if span_start < end:
+        spans.append((span_start, end))
+    return spans
+
+
+def chunk_note(content: str, max_chars: int = MAX_CHUNK_CHARS) -> list[Chunk]:
+    match = FRONTMATTER_RE.match(content)
+    offset = match.end() if match else 0
+    chunks: list[Chunk] = []
+    for start, end, heading in _sections(content, offset):
+        spans = (
+            [(start, end)]
+            if end - start <= max_chars
+            else _split_long(content, start, end, max_chars)
+        )
+        for span_start, span_end in spans:
+            text = content[span_start:span_end].strip()
+            if text:
+                chunks.append(Chunk(len(chunks), heading, span_start, span_end, text))
+    return chunks
@@ -1,12 +1,14 @@
 from pydantic import BaseModel, Field
 from pathlib import Path
+from tap.database.obsidian.parser import FrontmatterValue, parse_note_file
+from tap.database.obsidian.reader import NoteFile, read_note_file
 
 
 class ObsidianNote(BaseModel):
     title: str = Field(..., description="The title of the note")
     content: str = Field(..., description="The main content of the note")
-    created_at: str = Field(..., description="The creation date of the note")
-    updated_at: str = Field(..., description="The last updated date of the note")
+    created_at: float = Field(..., description="Creation (ctime) timestamp")
+    updated_at: float = Field(..., description="Last modified (mtime) timestamp")
     wiki_links: list[str] = Field(
         default_factory=list,
         description="A list of links to other notes within the vault",
@@ -14,6 +16,12 @@ class ObsidianNote(BaseModel):
     links: list[str] = Field(
         default_factory=list, description="A list of external links related to the note"
     )
+    frontmatter: dict[str, FrontmatterValue] = Field(
+        default_factory=dict, description="YAML frontmatter properties of the note"
+    )
+    tags: list[str] = Field(
+        default_factory=list, description="Frontmatter and inline #tags"
+    )
 
     @classmethod
     def from_file(cls, file_path: str | Path) -> "ObsidianNote":
@@ -27,36 +35,14 @@ class ObsidianNote(BaseModel):
         )
         assert file_path.exists(), f"File {file_path} does not exist"
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # Simple parsing logic (this can be expanded based on actual file structure)
-        title = file_path.stem
-        wiki_links = []
-        links = []
-
-        for line in content.splitlines():
-            if "[[" in line and "]]" in line:
-                wiki_links.append(line[line.index("[[") + 2 : line.index("]]")].strip())
-            if "http" in line:
-                # Retrieve the link in markdown format [text](url)
-                start = line.index("http")
-                end = line.find(" ", start)
-                if end == -1:
-                    end = len(line)
-                links.append(line[start:end].strip())
-
-        created_at = file_path.stat().st_ctime
-        updated_at = file_path.stat().st_mtime
+        return cls.from_note_file(read_note_file(file_path))
 
-        return cls(
-            title=title,
-            content=content,
-            created_at=str(created_at),
-            updated_at=str(updated_at),
-            wiki_links=wiki_links,
-            links=links,
-        )
+    @classmethod
+    def from_note_file(cls, note_file: NoteFile) -> "ObsidianNote":
+        """
+        Create an ObsidianNote from a file that has already been read.
+        """
+        return parse_note_file(note_file).to_model()
 
 
 if __name__ == "__main__":
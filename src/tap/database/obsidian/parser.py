@@ -0,0 +1,190 @@
+"""
+Single-pass note parser.
+
+One compiled alternation regex walks the note body once and picks up every
+wiki link ([[target#heading|alias]], including ![[embeds]]) and every bare
+URL. Results are kept in a compact __slots__ record; building the pydantic
+ObsidianNote is opt-in via ParsedNote.to_model(), since validating 40k models
+costs far more than the parse itself.
+"""
+
+from typing import TYPE_CHECKING, NamedTuple
+import re
+
+if TYPE_CHECKING:
+    from tap.database.obsidian.obsidian_note import ObsidianNote
+    from tap.database.obsidian.reader import NoteFile
+
+FRONTMATTER_RE = re.compile(r"\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)", re.S)
+LINK_RE = re.compile(
+    r"(?P<embed>!?)\[\[(?P<target>[^\[\]|#\n]*)"
+    r"(?:#(?P<heading>[^\[\]|\n]*))?"
+    r"(?:\|(?P<alias>[^\[\]\n]*))?\]\]"
+    r"|(?P<url>https?://[^\s<>()\[\]\"'`]+)"
+)
+FRONTMATTER_KEY_RE = re.compile(r"^([A-Za-z0-9_][\w \-]*?)\s*:\s*(.*)$")
+# Obsidian tags: #word, #nested/tag; at least one non-digit, so #123 isn't one
+TAG_RE = re.compile(r"(?<![^\s(])#([\w/-]*[^\W\d][\w/-]*)")
+URL_TRAILING = ".,;:!?*_~"
+
+FrontmatterValue = str | list[str]
+
+
+class WikiLink(NamedTuple):
+    target: str
+    heading: str | None = None
+    alias: str | None = None
+    embed: bool = False
+
+
+class ParsedNote:
+    __slots__ = (
+        "title",
+        "content",
+        "created_at",
+        "updated_at",
+        "wiki_links",
+        "links",
+        "frontmatter",
+    )
+
+    def __init__(
+        self,
+        title: str,
+        content: str,
+        created_at: float,
+        updated_at: float,
+        wiki_links: list[WikiLink],
+        links: list[str],
+        frontmatter: dict[str, FrontmatterValue],
+    ):
+        self.title = title
+        self.content = content
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.wiki_links = wiki_links
+        self.links = links
+        self.frontmatter = frontmatter
+
+    def to_model(self) -> "ObsidianNote":
+        """
+        Build the validated pydantic model.
+        """
+        from tap.database.obsidian.obsidian_note import ObsidianNote
+
+        return ObsidianNote(
+            title=self.title,
+            content=self.content,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            wiki_links=[link.target for link in self.wiki_links],
+            links=self.links,
+            frontmatter=self.frontmatter,
+            tags=self.tags,
+        )
+
+    @property
+    def tags(self) -> list[str]:
+        return extract_tags(self.content, self.frontmatter)
+
+    def __repr__(self):
+        return (
+            f"ParsedNote({self.title!r}, {len(self.wiki_links)} wiki links, "
+            f"{len(self.links)} links)"
+        )
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def parse_frontmatter(block: str) -> dict[str, FrontmatterValue]:
+    """
+    Parse the flat YAML subset Obsidian writes: scalars, [inline, lists] and
+    "- item" block lists. Indented nested mappings are skipped.
+    """
+    frontmatter: dict[str, FrontmatterValue] = {}
+    key: str | None = None
+    for line in block.splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        stripped = line.strip()
+        if key is not None and stripped.startswith("- "):
+            current = frontmatter.get(key)
+            if not isinstance(current, list):
+                current = []
+                frontmatter[key] = current
+            current.append(_unquote(stripped[2:]))
+            continue
+        match = FRONTMATTER_KEY_RE.match(line)
+        if match is None:
+            continue
+        key, value = match.group(1), match.group(2).strip()
+        if value.startswith("[") and value.endswith("]"):
+            frontmatter[key] = [
+                _unquote(item) for item in value[1:-1].split(",") if item.strip()
+            ]
+        elif value:
+            frontmatter[key] = _unquote(value)
+        else:
+            frontmatter[key] = []
+    return frontmatter
+
+
+def extract_tags(content: str, frontmatter: dict[str, FrontmatterValue]) -> list[str]:
+    """
+    Tags from the frontmatter `tags`/`tag` property and inline #tags in the
+    body, casefolded and without the leading #, in order of appearance.
+    """
+    tags: list[str] = []
+    for key in ("tags", "tag"):
+        value = frontmatter.get(key)
+        if isinstance(value, str):
+            value = re.split(r"[,\s]+", value)
+        tags.extend(value or [])
+    match = FRONTMATTER_RE.match(content)
+    tags.extend(TAG_RE.findall(content, match.end() if match else 0))
+    normalised = (tag.strip().lstrip("#").casefold() for tag in tags)
+    return list(dict.fromkeys(tag for tag in normalised if tag))
+
+
+def parse_note(
+    title: str, content: str, created_at: float = 0.0, updated_at: float = 0.0
+) -> ParsedNote:
+    frontmatter: dict[str, FrontmatterValue] = {}
+    match = FRONTMATTER_RE.match(content)
+    if match:
+        frontmatter = parse_frontmatter(match.group(1))
+
+    wiki_links: list[WikiLink] = []
+    links: list[str] = []
+    for m in LINK_RE.finditer(content):
+        url = m.group("url")
+        if url is not None:
+            links.append(url.rstrip(URL_TRAILING))
+        else:
+            heading = m.group("heading")
+            alias = m.group("alias")
+            wiki_links.append(
+                WikiLink(
+                    m.group("target").strip(),
+                    heading.strip() if heading else None,
+                    alias.strip() if alias else None,
+                    bool(m.group("embed")),
+                )
+            )
+    return ParsedNote(
+        title, content, created_at, updated_at, wiki_links, links, frontmatter
+    )
+
+
+def parse_note_file(note_file: "NoteFile") -> ParsedNote:
+    return parse_note(
+        note_file.path.stem,
+        note_file.content,
+        note_file.created_at,
+        note_file.updated_at,
+    )
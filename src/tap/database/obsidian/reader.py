@@ -0,0 +1,88 @@
+"""
+Bulk note reader.
+
+Full-vault loads are latency-bound (each open/read is a round trip on synced
+or network home directories), so files are read on a thread pool. Each file is
+opened exactly once: the stat comes from fstat on the open descriptor and the
+content hash is computed in the worker while the bytes are at hand.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+import os
+import sys
+
+from tap.database.obsidian.catalog import hash_bytes
+
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+@dataclass(slots=True)
+class NoteFile:
+    path: Path
+    content: str
+    digest: str
+    size: int
+    created_at: float
+    updated_at: float
+
+
+def read_note_file(path: Path) -> NoteFile:
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        data = f.read()
+    return NoteFile(
+        path=path,
+        content=data.decode("utf-8"),
+        digest=hash_bytes(data),
+        size=st.st_size,
+        created_at=st.st_ctime,
+        updated_at=st.st_mtime,
+    )
+
+
+def _read_or_none(path: Path) -> NoteFile | None:
+    try:
+        return read_note_file(path)
+    except Exception as e:
+        # stderr: stdout may be carrying composed context
+        print(f"Error reading {path}: {e}", file=sys.stderr)
+        return None
+
+
+def iter_note_files(
+    paths: Iterable[Path], max_workers: int = DEFAULT_WORKERS
+) -> Iterator[NoteFile | None]:
+    """
+    Read files concurrently, yielding results in input order (None for files
+    that couldn't be read). At most 2 * max_workers reads run ahead of the
+    consumer, so streaming a long list to a slow pipe holds only a window of
+    files in memory.
+    """
+    paths = list(paths)
+    if len(paths) <= 1 or max_workers <= 1:
+        for path in paths:
+            yield _read_or_none(path)
+        return
+    remaining = iter(paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        window: deque[Future] = deque(
+            pool.submit(_read_or_none, path)
+            for path in islice(remaining, 2 * max_workers)
+        )
+        while window:
+            result = window.popleft().result()
+            path = next(remaining, None)
+            if path is not None:
+                window.append(pool.submit(_read_or_none, path))
+            yield result
+
+
+def read_note_files(
+    paths: Iterable[Path], max_workers: int = DEFAULT_WORKERS
+) -> list[NoteFile | None]:
+    return list(iter_note_files(paths, max_workers))
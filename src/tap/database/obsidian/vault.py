@@ -1,11 +1,27 @@
+from bisect import bisect_left, bisect_right
 from functools import cached_property, lru_cache
-from contex.database.obsidian.obsidian_note import ObsidianNote
-from typing import override
+from tap.database.obsidian.catalog import VaultCatalog
+from tap.database.obsidian.parser import ParsedNote, parse_note_file
+from tap.database.obsidian.reader import NoteFile, read_note_files
+from typing import TYPE_CHECKING, override
 from pathlib import Path
 import os
+import re
+import sys
+
+if TYPE_CHECKING:
+    from tap.database.local.snapshot import VaultSnapshot
+    from tap.database.obsidian.obsidian_note import ObsidianNote
+
+DAILY_NOTE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
 
 
 class Vault:
+    def __init__(self, catalog: VaultCatalog | None = None):
+        # Reuse an already-loaded catalog (e.g. in a long-lived daemon)
+        if catalog is not None:
+            self.catalog = catalog
+
     @cached_property
     def obsidian_path(self) -> Path:
         obsidian_path = os.environ.get("OBSIDIAN_PATH")
@@ -19,85 +35,138 @@ class Vault:
 
         return path
 
+    @cached_property
+    def catalog(self) -> VaultCatalog:
+        # Persistent path catalog, refreshed incrementally from directory mtimes
+        return VaultCatalog.load(self.obsidian_path)
+
     @cached_property
     def paths(self) -> list[Path]:
-        # Recursively find all .md files in the obsidian_path directory and subdirectories;
+        # All .md files in the vault, sorted by relative path;
         # if duplicates, keep the first one found
-        md_files = list(self.obsidian_path.rglob("*.md"))
-        seen: set[str] = set()
-        unique_files: list[Path] = []
-        for file in md_files:
-            if file.name not in seen:
-                seen.add(file.name)
-                unique_files.append(file)
-        return unique_files
+        root = self.obsidian_path
+        return [root / entry.rel for entry in self.catalog.unique_entries()]
 
     @cached_property
     def titles(self) -> list[str]:
-        return [file.stem for file in self.paths]
+        return [entry.stem for entry in self.catalog.unique_entries()]
 
     @cached_property
     def documents(self) -> list[str]:
-        documents: list[str] = []
-        for file in self.paths:
-            try:
-                with file.open("r", encoding="utf-8") as f:
-                    documents.append(f.read())
-            except Exception as e:
-                print(f"Error reading {file}: {e}")
-                documents.append("")  # Append empty string on error
-        return documents
+        # Empty string for files that couldn't be read
+        return [
+            note_file.content if note_file else ""
+            for note_file in self.read_note_files(self.paths)
+        ]
+
+    @cached_property
+    def snapshot(self) -> "VaultSnapshot | None":
+        # Packed contents from `tap snapshot`, if one was taken of this vault
+        from tap.database.local.snapshot import open_snapshot
+
+        return open_snapshot(self.obsidian_path)
+
+    def read_note_files(self, paths: list[Path]) -> list[NoteFile | None]:
+        """
+        Read files on a thread pool (one open per file), recording their content
+        hashes in the catalog as a side effect. Notes unchanged since the last
+        snapshot are read from it instead.
+        """
+        snapshot = self.snapshot
+        if snapshot is not None:
+            note_files = snapshot.read_fresh(paths)
+        else:
+            note_files = read_note_files(paths)
+        root = self.obsidian_path
+        for note_file in note_files:
+            if note_file is not None:
+                rel = note_file.path.relative_to(root).as_posix()
+                self.catalog.record_hash(rel, note_file.digest)
+        self.catalog.save()
+        return note_files
+
+    @cached_property
+    def path_by_title(self) -> dict[str, Path]:
+        # Titles are unique (paths are deduplicated by filename)
+        return dict(zip(self.titles, self.paths))
+
+    @cached_property
+    def title_positions(self) -> dict[str, int]:
+        return {title: i for i, title in enumerate(self.titles)}
+
+    @cached_property
+    def daily_note_index(self) -> tuple[list[str], list[Path]]:
+        # Daily notes are strictly named "YYYY-MM-DD.md"; ISO dates sort lexically,
+        # so parallel sorted lists support bisecting on the date string.
+        daily = sorted(
+            (title, path)
+            for title, path in self.path_by_title.items()
+            if DAILY_NOTE_PATTERN.match(title)
+        )
+        return [date for date, _ in daily], [path for _, path in daily]
+
+    def get_path_by_title(self, title: str) -> Path | None:
+        return self.path_by_title.get(title)
 
     @lru_cache
     def get_document_by_title(self, title: str) -> str | None:
-        for file in self.paths:
-            if file.stem == title:
-                try:
-                    with file.open("r", encoding="utf-8") as f:
-                        return f.read()
-                except Exception as e:
-                    print(f"Error reading {file}: {e}")
-                    return None
-        return None
+        file = self.path_by_title.get(title)
+        if file is None:
+            return None
+        try:
+            with file.open("r", encoding="utf-8") as f:
+                return f.read()
+        except Exception as e:
+            print(f"Error reading {file}: {e}", file=sys.stderr)
+            return None
+
+    def get_daily_note_paths_in_date_range(
+        self, date_one: str, date_two: str
+    ) -> list[Path]:
+        from datetime import datetime
+
+        # Validate both ends; the index itself is keyed by the ISO string
+        start = datetime.strptime(date_one, "%Y-%m-%d").strftime("%Y-%m-%d")
+        end = datetime.strptime(date_two, "%Y-%m-%d").strftime("%Y-%m-%d")
+        dates, paths = self.daily_note_index
+        lo = bisect_left(dates, start)
+        hi = bisect_right(dates, end)
+        return paths[lo:hi]
 
     @lru_cache
     def get_daily_notes_in_date_range(self, date_one: str, date_two: str) -> list[str]:
-        # Create a list of dates in the range date_one to date_two (inclusive)
-        from datetime import datetime, timedelta
-
-        start_date = datetime.strptime(date_one, "%Y-%m-%d")
-        end_date = datetime.strptime(date_two, "%Y-%m-%d")
-        delta = end_date - start_date
-        date_list = [
-            (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
-            for i in range(delta.days + 1)
-        ]
-        # Find files with titles matching any date in the date_list. Daily notes are strictly named "YYYY-MM-DD.md"
         notes: list[str] = []
-        for date in date_list:
-            for file in self.paths:
-                if file.stem == date:
-                    try:
-                        with file.open("r", encoding="utf-8") as f:
-                            notes.append(f.read())
-                    except Exception as e:
-                        print(f"Error reading {file}: {e}")
+        for file in self.get_daily_note_paths_in_date_range(date_one, date_two):
+            try:
+                with file.open("r", encoding="utf-8") as f:
+                    notes.append(f.read())
+            except Exception as e:
+                print(f"Error reading {file}: {e}", file=sys.stderr)
         # Return the list of notes found
         assert len(notes) > 0, "No daily notes found in the given date range."
         return notes
 
     @lru_cache
-    def get_obsidian_note_objects(self) -> list[ObsidianNote]:
-        notes: list[ObsidianNote] = []
-        for file in self.paths:
+    def get_obsidian_note_objects(
+        self, validate: bool = False
+    ) -> "list[ParsedNote] | list[ObsidianNote]":
+        """
+        Parse every note in the vault. Returns lightweight ParsedNote records;
+        pass validate=True for pydantic ObsidianNote models.
+        """
+        notes: list[ParsedNote] = []
+        for note_file in self.read_note_files(self.paths):
+            if note_file is not None:
+                notes.append(parse_note_file(note_file))
+        if not validate:
+            return notes
+        models: list[ObsidianNote] = []
+        for note in notes:
             try:
-                with file.open("r", encoding="utf-8") as f:
-                    content = f.read()
-                    note = ObsidianNote.from_file(file)
-                    notes.append(note)
+                models.append(note.to_model())
             except Exception as e:
-                print(f"Error reading {file}: {e}")
-        return notes
+                print(f"Error validating {note.title}: {e}", file=sys.stderr)
+        return models
 
     @override
     def __repr__(self):
@@ -0,0 +1,217 @@
+"""
+Pluggable vector search backends.
+
+    chroma  the Chroma collection maintained by load_vault (needs a server)
+    local   the memory-mapped index from tap.database.local.vector_index
+
+Pick one with TAP_VECTOR_BACKEND; by default the local index is used when it
+has been built, and Chroma otherwise.
+
+Both also answer passage queries against their chunk index (built with
+--chunks), returning the best heading-delimited passages instead of notes.
+
+Searches limited to some notes (the metadata filters) score just those rows
+on the local index; Chroma can't filter on them, so more results are fetched
+from it and then narrowed.
+"""
+
+from functools import cache
+from typing import TYPE_CHECKING, NamedTuple, Protocol
+import os
+
+if TYPE_CHECKING:
+    from tap.database.local.vector_index import LocalVectorIndex
+
+# Chroma results fetched per requested result when searching within some notes
+FILTER_OVERFETCH = 10
+
+
+class Passage(NamedTuple):
+    note: str
+    heading: str
+    index: int
+    distance: float
+    # None when the backend doesn't store chunk text; see SearchService
+    text: str | None = None
+    # Content hash of the note when the passage was indexed
+    hash: str | None = None
+
+
+class VectorBackend(Protocol):
+    # Names the backend in cached results (see tap.query.result_cache)
+    name: str
+
+    def fingerprint(self) -> str:
+        """
+        Identifies the vectors answering searches right now: the embedding
+        model, plus the index version where the backend knows it.
+        """
+        ...
+
+    def search(
+        self, queries: list[str], limit: int = 5
+    ) -> list[list[tuple[str, float]]]:
+        """
+        For each query, the nearest (note title, distance) pairs, nearest first.
+        """
+        ...
+
+    def search_within(
+        self, query: str, titles: list[str], limit: int = 5
+    ) -> list[tuple[str, float]]:
+        """
+        The nearest notes among `titles` only.
+        """
+        ...
+
+    def search_passages(
+        self, queries: list[str], limit: int = 5
+    ) -> list[list[Passage]]:
+        """
+        For each query, the nearest chunks across all notes, nearest first.
+        """
+        ...
+
+
+def chunk_index(chunk_id: str) -> int:
+    """
+    Position of a chunk in its note, from its "Title#n" id.
+    """
+    return int(chunk_id.rsplit("#", 1)[1])
+
+
+class ChromaBackend:
+    name = "chroma"
+
+    def fingerprint(self) -> str:
+        from tap.database.chroma.load_vault import embedding_model
+
+        return embedding_model
+
+    def search(
+        self, queries: list[str], limit: int = 5
+    ) -> list[list[tuple[str, float]]]:
+        from tap.services.vector_service import vector_search_many
+
+        return vector_search_many(queries, limit)
+
+    def search_within(
+        self, query: str, titles: list[str], limit: int = 5
+    ) -> list[tuple[str, float]]:
+        allowed = set(titles)
+        (results,) = self.search([query], limit * FILTER_OVERFETCH)
+        return [result for result in results if result[0] in allowed][:limit]
+
+    def search_passages(
+        self, queries: list[str], limit: int = 5
+    ) -> list[list[Passage]]:
+        from tap.services.vector_service import passage_search_many
+
+        return passage_search_many(queries, limit)
+
+
+class LocalBackend:
+    """
+    Serves the local index files, reloading one whenever a sync (e.g. by
+    `tap watch --vectors`) has published a new version of it, so a
+    long-lived daemon never answers from a stale matrix.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        # Index name -> (sidecar inode and mtime, index loaded from it)
+        self._loaded: dict[str, tuple[tuple[int, int] | None, "LocalVectorIndex"]]
+        self._loaded = {}
+        # Fail here, as before, if the index hasn't been built
+        self.index
+
+    def _load(self, name: str, missing: str) -> "LocalVectorIndex":
+        from tap.database.local.vector_index import LocalVectorIndex
+
+        try:
+            st = os.stat(LocalVectorIndex.paths(name)[1])
+            stamp = (st.st_ino, st.st_mtime_ns)
+        except OSError:
+            stamp = None
+        loaded = self._loaded.get(name)
+        if loaded is not None and loaded[0] == stamp:
+            return loaded[1]
+        index = LocalVectorIndex.load(name)
+        if index is None:
+            raise RuntimeError(missing)
+        self._loaded[name] = (stamp, index)
+        return index
+
+    def fingerprint(self) -> str:
+        index = self.index
+        return f"{index.model}@{index.version}"
+
+    @property
+    def index(self) -> "LocalVectorIndex":
+        from tap.database.local.vector_index import INDEX_NAME
+
+        return self._load(
+            INDEX_NAME,
+            "Local vector index not built; run "
+            "`python -m tap.database.local.vector_index`",
+        )
+
+    @property
+    def chunks(self) -> "LocalVectorIndex":
+        from tap.database.local.vector_index import CHUNK_INDEX_NAME
+
+        return self._load(
+            CHUNK_INDEX_NAME,
+            "Local passage index not built; run "
+            "`python -m tap.database.local.vector_index --chunks`",
+        )
+
+    def search(
+        self, queries: list[str], limit: int = 5
+    ) -> list[list[tuple[str, float]]]:
+        return self.index.search(queries, limit)
+
+    def search_within(
+        self, query: str, titles: list[str], limit: int = 5
+    ) -> list[tuple[str, float]]:
+        index = self.index
+        (hits,) = index.query(index.embed_queries([query]), limit, index.rows(titles))
+        return hits
+
+    def search_passages(
+        self, queries: list[str], limit: int = 5
+    ) -> list[list[Passage]]:
+        chunks = self.chunks
+        return [
+            [
+                Passage(
+                    chunks.notes[row],
+                    chunks.headings[row],
+                    chunk_index(chunks.ids[row]),
+                    distance,
+                    hash=chunks.hashes[row],
+                )
+                for row, distance in hits
+            ]
+            for hits in chunks.nearest(chunks.embed_queries(queries), limit)
+        ]
+
+
+def backend_name() -> str:
+    name = os.environ.get("TAP_VECTOR_BACKEND")
+    if name:
+        return name
+    from tap.database.local.vector_index import LocalVectorIndex
+
+    return "local" if LocalVectorIndex.exists() else "chroma"
+
+
+@cache
+def get_backend(name: str | None = None) -> VectorBackend:
+    name = name or backend_name()
+    if name == "local":
+        return LocalBackend()
+    if name == "chroma":
+        return ChromaBackend()
+    raise ValueError(f"Unknown vector backend: {name}")
@@ -0,0 +1,196 @@
+"""
+Persistent LRU cache of query embeddings.
+
+People re-run the same semantic queries constantly, and encoding a query means
+loading and running the sentence-transformers model. Embeddings are cached in
+a small SQLite file keyed by (model, normalised query text), capped at a fixed
+number of entries with least-recently-used eviction. Hit/miss counts are kept
+both per process and persisted across runs.
+"""
+
+from array import array
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Sequence
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from tap.storage.config import cache_dir
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_MAX_ENTRIES = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, text)
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+class QueryEmbeddingCache:
+    def __init__(self, path: Path | None = None, max_entries: int | None = None):
+        self.path = path or cache_dir() / "query_embeddings.sqlite"
+        self.max_entries = max_entries or int(
+            os.environ.get("TAP_EMBEDDING_CACHE_SIZE", DEFAULT_MAX_ENTRIES)
+        )
+        self.hits = 0
+        self.misses = 0
+        self._conn: sqlite3.Connection | None = None
+        # The daemon shares one cache across its worker threads
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, texts: list[str]) -> dict[str, array]:
+        """
+        Cached vectors for the normalised texts that are present.
+        """
+        if not texts:
+            return {}
+        placeholders = ",".join("?" * len(texts))
+        rows = self.conn.execute(
+            f"SELECT text, vector FROM embeddings "
+            f"WHERE model = ? AND text IN ({placeholders})",
+            [model, *texts],
+        ).fetchall()
+        found: dict[str, array] = {}
+        for text, blob in rows:
+            vector = array("f")
+            vector.frombytes(blob)
+            found[text] = vector
+        if found:
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text = ?",
+                    [(time.time(), model, text) for text in found],
+                )
+        return found
+
+    def put_many(self, model: str, items: dict[str, Sequence[float]]):
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                [
+                    (model, text, array("f", vector).tobytes(), now)
+                    for text, vector in items.items()
+                ],
+            )
+            self._evict()
+
+    def _evict(self):
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN ("
+                "SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def _count(self, hits: int, misses: int):
+        self.hits += hits
+        self.misses += misses
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO counters VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                [("hits", hits), ("misses", misses)],
+            )
+
+    def embed(
+        self,
+        texts: list[str],
+        model: str,
+        encode: Callable[[list[str]], Sequence[Sequence[float]]],
+    ) -> "np.ndarray":
+        """
+        Embeddings for `texts` (one row each), encoding only the cache misses.
+        `model` namespaces the cache so different encoders never collide.
+        """
+        import numpy as np
+
+        keys = [normalize_query(text) for text in texts]
+        with self._lock:
+            found = self.get_many(model, list(dict.fromkeys(keys)))
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        if missing:
+            encoded = encode(missing)
+            fresh = {
+                key: array("f", map(float, vector))
+                for key, vector in zip(missing, encoded)
+            }
+            with self._lock:
+                self.put_many(model, fresh)
+            found.update(fresh)
+        with self._lock:
+            self._count(len(keys) - len(missing), len(missing))
+        return np.stack([np.frombuffer(found[key], dtype=np.float32) for key in keys])
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return self._stats()
+
+    def _stats(self) -> dict[str, int]:
+        counters = dict(self.conn.execute("SELECT name, value FROM counters"))
+        (entries,) = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "session_hits": self.hits,
+            "session_misses": self.misses,
+        }
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM embeddings")
+            self.conn.execute("DELETE FROM counters")
+
+
+@cache
+def get_query_cache() -> QueryEmbeddingCache:
+    return QueryEmbeddingCache()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the query embedding cache.")
+    parser.add_argument("--clear", action="store_true", help="Empty the cache.")
+    args = parser.parse_args()
+    cache = get_query_cache()
+    if args.clear:
+        cache.clear()
+    for name, value in cache.stats().items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
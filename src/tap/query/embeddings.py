@@ -0,0 +1,49 @@
+"""
+Sentence-transformers embeddings without going through Chroma.
+
+Used by the local vector backend and the query-side of vector search. The
+model is loaded on first use and kept for the life of the process (or daemon).
+"""
+
+from functools import cache
+from typing import TYPE_CHECKING
+import logging
+
+if TYPE_CHECKING:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+def detect_device() -> str:
+    import torch
+
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+@cache
+def get_model(model_name: str = EMBEDDING_MODEL) -> "SentenceTransformer":
+    from sentence_transformers import SentenceTransformer
+
+    device = detect_device()
+    logger.info(f"Loading embedding model: {model_name} on device: {device}")
+    return SentenceTransformer(model_name, device=device)
+
+
+def embed(texts: list[str], model_name: str = EMBEDDING_MODEL) -> "np.ndarray":
+    """
+    Unit-normalised float32 embeddings, one row per text.
+    """
+    import numpy as np
+
+    vectors = get_model(model_name).encode(
+        texts, normalize_embeddings=True, convert_to_numpy=True
+    )
+    return np.asarray(vectors, dtype=np.float32)
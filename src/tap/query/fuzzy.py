@@ -1,9 +1,196 @@
-from rapidfuzz import process, fuzz
+"""
+Fuzzy title matching.
+
+FuzzyIndex preprocesses the choice list once (lowercase, strip punctuation)
+and persists it next to the vault catalog, keyed by the catalog digest, so
+queries score against ready-made strings. Many queries can be scored together
+with rapidfuzz's cdist across all cores, and single queries against very
+large title sets are first narrowed by a cheap character-set prefilter.
+
+The prefilter is a heuristic, not a bound on WRatio: a title sharing too few
+distinct characters with the query is skipped even if it would have scored
+(e.g. "ab" against "ac"). Such matches score low and rarely make the top
+results, but a prefiltered search() can differ from search_many() there.
+"""
+
+from typing import TYPE_CHECKING
+import json
+
+from rapidfuzz import fuzz, process, utils
+
+from tap.storage.config import atomic_write_json, cache_dir
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from tap.database.obsidian.catalog import VaultCatalog
+
+# Prefilter only kicks in above this many choices
+PREFILTER_THRESHOLD = 20_000
+# Fraction of the distinct characters of the query or of the title, whichever
+# has fewer, that a candidate must share with the query. Tuned, not derived:
+# it can skip low-scoring matches
+PREFILTER_OVERLAP = 0.6
+# Above this share of all choices the prefilter saves too little to use
+PREFILTER_MAX_SHARE = 0.5
+
+
+def char_mask(text: str) -> int:
+    """
+    Bitmask of the characters in `text`: a-z and 0-9 get their own bit,
+    anything else shares the remaining bits by code point.
+    """
+    mask = 0
+    for ch in text:
+        if "a" <= ch <= "z":
+            mask |= 1 << (ord(ch) - 97)
+        elif "0" <= ch <= "9":
+            mask |= 1 << (ord(ch) - 22)
+        elif ch != " ":
+            mask |= 1 << (36 + ord(ch) % 28)
+    return mask
+
+
+class FuzzyIndex:
+    def __init__(
+        self,
+        choices: list[str],
+        processed: list[str] | None = None,
+        masks: list[int] | None = None,
+    ):
+        self.choices = choices
+        self.processed = processed or [utils.default_process(c) for c in choices]
+        self._masks = masks
+        self._mask_arrays: "tuple[np.ndarray, np.ndarray] | None" = None
+
+    @classmethod
+    def for_catalog(cls, catalog: "VaultCatalog", titles: list[str]) -> "FuzzyIndex":
+        """
+        Index `titles` (the catalog's unique stems), reusing the persisted
+        preprocessed list when the catalog hasn't changed since it was built.
+        """
+        path = cache_dir() / "fuzzy.json"
+        # The digest, not the generation: two processes can reach the same
+        # generation with different notes
+        key = {"root": str(catalog.root), "digest": catalog.digest()}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data["key"] == key and len(data["processed"]) == len(titles):
+                return cls(titles, data["processed"], data["masks"])
+        except (OSError, ValueError, KeyError):
+            pass
+        index = cls(titles)
+        # Building the masks costs about as much as a full scan, so large
+        # indexes keep them with the processed titles
+        masks = index.masks if len(titles) > PREFILTER_THRESHOLD else None
+        atomic_write_json(
+            path, {"key": key, "processed": index.processed, "masks": masks}
+        )
+        return index
+
+    @property
+    def masks(self) -> list[int]:
+        if self._masks is None:
+            self._masks = [char_mask(p) for p in self.processed]
+        return self._masks
+
+    def candidates(self, processed_query: str, limit: int = 5) -> list[int] | None:
+        """
+        Indices worth scoring for this query, or None to score everything.
+        Approximate: titles sharing too few characters with the query are
+        left out even if WRatio would give them a (low) score.
+        """
+        if len(self.processed) <= PREFILTER_THRESHOLD:
+            return None
+        import numpy as np
+
+        if self._mask_arrays is None:
+            masks = np.array(self.masks, dtype=np.uint64)
+            self._mask_arrays = (masks, np.bitwise_count(masks))
+        masks, title_bits = self._mask_arrays
+        query_mask = char_mask(processed_query)
+        shared = np.bitwise_count(masks & np.uint64(query_mask))
+        # WRatio scores a short title inside a long query as highly as a long
+        # title containing the query, so measure against the smaller side
+        needed = np.minimum(title_bits, query_mask.bit_count()) * PREFILTER_OVERLAP
+        selected = np.flatnonzero(shared >= needed)
+        if not limit <= len(selected) <= PREFILTER_MAX_SHARE * len(masks):
+            return None
+        return selected.tolist()
+
+    def search(
+        self, query: str, limit: int = 5, within: list[int] | None = None
+    ) -> list[tuple[str, float, int]]:
+        """
+        Best (title, score, index) matches. `within` limits scoring to these
+        indices, e.g. notes that passed a metadata filter.
+        """
+        processed_query = utils.default_process(query)
+        if within is None:
+            candidates = self.candidates(processed_query, limit)
+        else:
+            candidates = within
+        if candidates is None:
+            results = process.extract(
+                processed_query,
+                self.processed,
+                scorer=fuzz.WRatio,
+                processor=None,
+                limit=limit,
+            )
+            return [(self.choices[i], score, i) for _, score, i in results]
+        subset = [self.processed[i] for i in candidates]
+        results = process.extract(
+            processed_query, subset, scorer=fuzz.WRatio, processor=None, limit=limit
+        )
+        return [
+            (self.choices[candidates[j]], score, candidates[j])
+            for _, score, j in results
+        ]
+
+    def search_many(
+        self, queries: list[str], limit: int = 5, workers: int = -1
+    ) -> list[list[tuple[str, float, int]]]:
+        """
+        Score every query against every choice in one cdist call, using all
+        cores by default. Results match search() for each query, so the two
+        can share cached results.
+        """
+        import numpy as np
+
+        if not queries or not self.processed:
+            return [[] for _ in queries]
+        processed_queries = [utils.default_process(q) for q in queries]
+        scores = process.cdist(
+            processed_queries,
+            self.processed,
+            scorer=fuzz.WRatio,
+            processor=None,
+            dtype=np.float32,
+            workers=workers,
+        )
+        k = min(limit, scores.shape[1])
+        results: list[list[tuple[str, float, int]]] = []
+        for query, row in zip(processed_queries, scores):
+            # Ties for the last places go to the earliest choices, as in search()
+            threshold = np.partition(row, -k)[-k]
+            above = np.flatnonzero(row > threshold)
+            tied = np.flatnonzero(row == threshold)[: k - len(above)]
+            indices = np.concatenate([above, tied])
+            # Rescore the few winners at full precision, as search() reports
+            exact = {
+                int(i): fuzz.WRatio(query, self.processed[i], processor=None)
+                for i in indices
+            }
+            ordered = sorted(exact, key=lambda i: (-exact[i], i))
+            results.append([(self.choices[i], exact[i], i) for i in ordered])
+        return results
 
 
 def fuzzy_search(
     query: str, choices: list[str], limit: int = 5
-) -> list[tuple[str, int, int]]:
+) -> list[tuple[str, float, int]]:
     """
     Perform a fuzzy search to find the best matches for a given query from a list of choices.
 
@@ -15,5 +202,4 @@ def fuzzy_search(
     Returns:
     list: A list of tuples containing the best matches and their scores.
     """
-    results = process.extract(query, choices, scorer=fuzz.WRatio, limit=limit)
-    return results
+    return FuzzyIndex(choices).search(query, limit)
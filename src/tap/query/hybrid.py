@@ -0,0 +1,114 @@
+"""
+Hybrid search: title fuzzy matching, content keywords and vectors, fused.
+
+Each retriever runs on its own thread and gets its own deadline; whatever has
+answered by then is fused with reciprocal rank fusion (RRF), which needs only
+ranks, so fuzzy scores, BM25 scores and cosine distances never have to be
+put on a common scale. A retriever that times out or fails is left out of the
+fusion rather than failing the search, so a cold or unreachable vector
+backend never holds up the fast paths.
+
+Threads are daemonic: a retriever that overruns its deadline keeps running in
+the background but never delays the caller or interpreter exit.
+"""
+
+from typing import Callable
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Standard RRF damping constant (Cormack et al.)
+RRF_K = 60
+# Seconds each retriever may take before it's left out
+DEFAULT_TIMEOUTS = {"fuzzy": 1.0, "content": 2.0, "vector": 3.0}
+# Each retriever is asked for this many times the requested limit
+DEPTH_FACTOR = 4
+MIN_DEPTH = 20
+
+Retriever = Callable[[str, int], list[str]]
+
+
+def reciprocal_rank_fusion(
+    rankings: dict[str, list[str]],
+    k: int = RRF_K,
+    weights: dict[str, float] | None = None,
+) -> list[tuple[str, float]]:
+    """
+    Fuse ranked title lists into one (title, score) list, best first. Ties
+    keep the order in which titles were first seen.
+    """
+    scores: dict[str, float] = {}
+    for name, titles in rankings.items():
+        weight = (weights or {}).get(name, 1.0)
+        for rank, title in enumerate(dict.fromkeys(titles)):
+            scores[title] = scores.get(title, 0.0) + weight / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def run_retrievers(
+    retrievers: dict[str, Retriever],
+    query: str,
+    depth: int,
+    timeouts: dict[str, float] | None = None,
+) -> dict[str, list[str]]:
+    """
+    Run every retriever concurrently and collect the rankings that arrive
+    before their own deadline.
+    """
+    timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+    results: queue.Queue = queue.Queue()
+
+    def run(name: str, retriever: Retriever):
+        try:
+            results.put((name, retriever(query, depth), None))
+        except Exception as e:
+            results.put((name, None, e))
+
+    start = time.monotonic()
+    deadlines = {}
+    for name, retriever in retrievers.items():
+        deadlines[name] = start + timeouts.get(name, max(timeouts.values()))
+        threading.Thread(
+            target=run, args=(name, retriever), name=f"tap-{name}", daemon=True
+        ).start()
+
+    rankings: dict[str, list[str]] = {}
+    pending = set(retrievers)
+    while pending:
+        remaining = min(deadlines[name] for name in pending) - time.monotonic()
+        try:
+            name, ranking, error = results.get(timeout=max(remaining, 0))
+        except queue.Empty:
+            now = time.monotonic()
+            for name in [n for n in pending if deadlines[n] <= now]:
+                logger.info(f"{name} search timed out, leaving it out")
+                pending.discard(name)
+            continue
+        if name not in pending:
+            continue  # Arrived after its deadline
+        pending.discard(name)
+        if error is not None:
+            logger.info(f"{name} search failed, leaving it out: {error}")
+        else:
+            rankings[name] = ranking
+    return rankings
+
+
+def hybrid_search(
+    retrievers: dict[str, Retriever],
+    query: str,
+    limit: int = 5,
+    timeouts: dict[str, float] | None = None,
+) -> list[tuple[str, float, int]]:
+    """
+    Fused (title, score, rank) matches, in the same shape as fuzzy results.
+    """
+    depth = max(limit * DEPTH_FACTOR, MIN_DEPTH)
+    rankings = run_retrievers(retrievers, query, depth, timeouts)
+    fused = reciprocal_rank_fusion(rankings)[:limit]
+    return [
+        (title, round(score, 5), rank) for rank, (title, score) in enumerate(fused)
+    ]
@@ -0,0 +1,178 @@
+"""
+Persistent cache of search results.
+
+The same title and vector queries come up again and again, and each one
+ranks the whole vault from scratch (for vector search, after loading the
+embedding model). Results are cached in a small SQLite file keyed by (mode,
+query, limit), and each row records a stamp of the state it was computed at:
+the vault root and catalog digest, plus for vector rows the embedding model
+and index version. Once that state moves on, the row no longer matches and
+the next lookup recomputes and replaces it. Vector modes are per backend
+("vector:local", "vector:chroma"), and writers of the vector stores drop all
+of them, since Chroma has no index version to stamp.
+
+The table is capped with least-recently-used eviction, like the query
+embedding cache. Recency is tracked coarsely: a hit only writes its new
+last-used time if the stored one is over TOUCH_INTERVAL old, so repeated
+queries stay read-only.
+"""
+
+from functools import cache
+from pathlib import Path
+from typing import Callable
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from tap.storage.config import cache_dir
+
+DEFAULT_MAX_ENTRIES = 5_000
+# Seconds a row's last-used time may lag behind before a hit updates it
+TOUCH_INTERVAL = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    mode TEXT NOT NULL,
+    query TEXT NOT NULL,
+    lim INTEGER NOT NULL,
+    stamp TEXT NOT NULL,
+    result TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (mode, query, lim)
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+
+class ResultCache:
+    def __init__(self, path: Path | None = None, max_entries: int | None = None):
+        self.path = path or cache_dir() / "results.sqlite"
+        self.max_entries = max_entries or int(
+            os.environ.get("TAP_RESULT_CACHE_SIZE", DEFAULT_MAX_ENTRIES)
+        )
+        self.hits = 0
+        self.misses = 0
+        self._conn: sqlite3.Connection | None = None
+        # The daemon shares one cache across its worker threads
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get(self, mode: str, query: str, limit: int, stamp: str) -> list | None:
+        """
+        The cached result, if it was computed at `stamp`.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT result, last_used FROM results "
+                "WHERE mode = ? AND query = ? AND lim = ? AND stamp = ?",
+                (mode, query, limit, stamp),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            now = time.time()
+            if now - row[1] > TOUCH_INTERVAL:
+                with self.conn:
+                    self.conn.execute(
+                        "UPDATE results SET last_used = ? "
+                        "WHERE mode = ? AND query = ? AND lim = ?",
+                        (now, mode, query, limit),
+                    )
+        return json.loads(row[0])
+
+    def put(self, mode: str, query: str, limit: int, stamp: str, result: list):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (mode, query, limit, stamp, json.dumps(result), time.time()),
+            )
+            self._evict()
+
+    def _evict(self):
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM results WHERE rowid IN ("
+                "SELECT rowid FROM results ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def cached(
+        self,
+        mode: str,
+        query: str,
+        limit: int,
+        stamp: str,
+        compute: Callable[[], list],
+    ) -> list:
+        result = self.get(mode, query, limit, stamp)
+        if result is None:
+            result = compute()
+            self.put(mode, query, limit, stamp, result)
+        return result
+
+    def cached_many(
+        self,
+        mode: str,
+        queries: list[str],
+        limit: int,
+        stamp: str,
+        compute: Callable[[list[str]], list[list]],
+    ) -> list[list]:
+        """
+        Results for each query, computing only the misses (in one call).
+        """
+        results = {q: self.get(mode, q, limit, stamp) for q in dict.fromkeys(queries)}
+        missing = [q for q, result in results.items() if result is None]
+        if missing:
+            for query, result in zip(missing, compute(missing)):
+                self.put(mode, query, limit, stamp, result)
+                results[query] = result
+        return [results[q] for q in queries]  # type: ignore[misc]
+
+    def invalidate(self, mode: str | None = None):
+        """
+        Drop cached results for one mode and its sub-modes ("vector" covers
+        "vector:local"), or all of them.
+        """
+        with self._lock, self.conn:
+            if mode is None:
+                self.conn.execute("DELETE FROM results")
+            else:
+                self.conn.execute(
+                    "DELETE FROM results WHERE mode = ? OR mode GLOB ?",
+                    (mode, f"{mode}:*"),
+                )
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        return count
+
+
+@cache
+def get_result_cache() -> ResultCache:
+    return ResultCache()
+
+
+def invalidate_vector_results():
+    """
+    Called by vector store writers: re-embedding changes vector results
+    without changing the catalog.
+    """
+    try:
+        get_result_cache().invalidate("vector")
+    except sqlite3.Error:
+        pass  # No cache yet, or it's unusable; nothing to invalidate
@@ -9,25 +9,45 @@ def get_similarity_matches(query, limit=5):
         print(f"Match: {match}, Similarity Score: {score}")
 """
 
-from contex.database.chroma.load_vault import get_vault_collection
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tap.query.backends import Passage
 
 
 def vector_search(query: str, limit: int = 5) -> list[tuple[str, float]]:
-    import asyncio
+    return vector_search_many([query], limit)[0]
+
+
+def vector_search_many(
+    queries: list[str], limit: int = 5
+) -> list[list[tuple[str, float]]]:
+    """
+    Search several queries in one backend round-trip.
+    """
+    from tap.query.backends import get_backend
+
+    return get_backend().search(queries, limit)
+
 
-    async def _vector_search():
-        collection = await get_vault_collection()
-        results = await collection.query(
-            query_texts=[query],
-            n_results=limit,
-        )
-        return results
+def vector_search_within(
+    query: str, titles: list[str], limit: int = 5
+) -> list[tuple[str, float]]:
+    """
+    The nearest notes among `titles` (e.g. those passing a metadata filter).
+    """
+    from tap.query.backends import get_backend
 
-    results = asyncio.run(_vector_search())
-    matches = []
-    for doc, score in zip(results["ids"][0], results["distances"][0]):
-        matches.append((doc, score))
-    return matches
+    return get_backend().search_within(query, titles, limit)
+
+
+def passage_search_many(queries: list[str], limit: int = 5) -> list[list["Passage"]]:
+    """
+    Best passages (from the chunk index) for several queries.
+    """
+    from tap.query.backends import get_backend
+
+    return get_backend().search_passages(queries, limit)
 
 
 def main():
@@ -35,16 +55,16 @@ def main():
     import sys
 
     parser = argparse.ArgumentParser(description="Similarity search for titles.")
-    parser.add_argument("query", type=str, help="The search query.")
+    parser.add_argument("query", type=str, nargs="+", help="The search query.")
     parser.add_argument(
         "--limit", type=int, default=5, help="Number of top matches to return."
     )
     args = parser.parse_args()
-    query = args.query
-    matches = vector_search(query, args.limit)
-    print(f"Top {args.limit} similarity matches for '{query}':")
-    for match, score in matches:
-        print(f"Match: {match}, Similarity Score: {score}")
+    results = vector_search_many(args.query, args.limit)
+    for query, matches in zip(args.query, results):
+        print(f"Top {args.limit} similarity matches for '{query}':")
+        for match, score in matches:
+            print(f"Match: {match}, Similarity Score: {score}")
     sys.exit(0)
 
 
@@ -0,0 +1,413 @@
+"""
+Search and retrieval operations shared by the CLI and the tap daemon.
+
+The CLI builds a SearchService per invocation; `tap serve` keeps one alive so
+the vault catalog, title list and embedding model stay warm between calls.
+File contents are always read fresh, never from an in-memory cache, so a
+long-lived service can't serve stale notes. Unfiltered fuzzy and vector
+rankings are cached on disk per vault state (see tap.query.result_cache).
+"""
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tap.database.local.link_graph import LinkGraph
+    from tap.database.local.metadata_index import MetadataIndex
+    from tap.database.local.text_index import TextIndex
+    from tap.database.obsidian.vault import Vault
+    from tap.query.backends import Passage
+    from tap.query.fuzzy import FuzzyIndex
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between catalog freshness checks in a long-lived service
+REFRESH_INTERVAL = 1.0
+
+
+class SearchService:
+    def __init__(self):
+        self._vault: "Vault | None" = None
+        self._checked_at = 0.0
+        self._deep_checked_at = 0.0
+        self._lock = threading.Lock()
+        # One per derived index: concurrent requests (daemon threads, hybrid
+        # retrievers) must not build the same index at once
+        self._index_locks = {
+            name: threading.Lock() for name in ("fuzzy", "text", "graph", "metadata")
+        }
+        self._fuzzy: tuple["Vault", "FuzzyIndex"] | None = None
+        self._text: tuple["Vault", "TextIndex"] | None = None
+        self._graph: tuple["Vault", "LinkGraph"] | None = None
+        self._metadata: tuple["Vault", "MetadataIndex"] | None = None
+
+    @property
+    def vault(self) -> "Vault":
+        """
+        The current Vault. Re-checks the catalog at most every REFRESH_INTERVAL
+        seconds and swaps in a fresh Vault (dropping derived indexes) when the
+        set of notes changed.
+        """
+        from tap.database.obsidian.catalog import watcher_active
+        from tap.database.obsidian.vault import Vault
+
+        with self._lock:
+            now = time.monotonic()
+            if self._vault is None:
+                self._vault = Vault()
+            elif now - self._checked_at >= REFRESH_INTERVAL:
+                catalog = self._vault.catalog
+                if watcher_active():
+                    # `tap watch` keeps the saved catalog current; adopt it
+                    fresh = catalog.reload()
+                    if fresh is not None:
+                        self._vault = Vault(catalog=fresh)
+                elif catalog.refresh():
+                    catalog.save()
+                    self._vault = Vault(catalog=catalog)
+            self._checked_at = now
+            return self._vault
+
+    @property
+    def content_vault(self) -> "Vault":
+        """
+        The current Vault, with in-place edits seen too, for the indexes built
+        from note contents and mtimes. An edit doesn't touch its directory's
+        mtime, so unless `tap watch` is keeping the catalog current, this also
+        stats every note (deep refresh), at most every REFRESH_INTERVAL
+        seconds.
+        """
+        from tap.database.obsidian.catalog import watcher_active
+        from tap.database.obsidian.vault import Vault
+
+        vault = self.vault
+        if watcher_active():
+            return vault
+        with self._lock:
+            now = time.monotonic()
+            if self._vault is vault and now - self._deep_checked_at >= REFRESH_INTERVAL:
+                catalog = vault.catalog
+                if catalog.refresh(deep=True):
+                    catalog.save()
+                    self._vault = Vault(catalog=catalog)
+                self._deep_checked_at = now
+            return self._vault
+
+    @property
+    def fuzzy_index(self) -> "FuzzyIndex":
+        """
+        Preprocessed title index for the current vault.
+        """
+        from tap.query.fuzzy import FuzzyIndex
+
+        vault = self.vault
+        built = self._fuzzy
+        if built is None or built[0] is not vault:
+            with self._index_locks["fuzzy"]:
+                built = self._fuzzy
+                if built is None or built[0] is not vault:
+                    index = FuzzyIndex.for_catalog(vault.catalog, vault.titles)
+                    built = self._fuzzy = (vault, index)
+        return built[1]
+
+    @property
+    def text_index(self) -> "TextIndex":
+        """
+        Full-text index, synced with the catalog whenever the vault changed.
+        """
+        from tap.database.local.text_index import TextIndex
+
+        vault = self.content_vault
+        built = self._text
+        if built is None or built[0] is not vault:
+            with self._index_locks["text"]:
+                built = self._text
+                if built is None or built[0] is not vault:
+                    index = built[1] if built else TextIndex()
+                    index.sync(vault.catalog)
+                    built = self._text = (vault, index)
+        return built[1]
+
+    @property
+    def link_graph(self) -> "LinkGraph":
+        """
+        Wiki-link graph, synced with the catalog whenever the vault changed.
+        """
+        from tap.database.local.link_graph import sync_link_graph
+
+        vault = self.content_vault
+        built = self._graph
+        if built is None or built[0] is not vault:
+            with self._index_locks["graph"]:
+                built = self._graph
+                if built is None or built[0] is not vault:
+                    built = self._graph = (vault, sync_link_graph(vault.catalog))
+        return built[1]
+
+    @property
+    def metadata_index(self) -> "MetadataIndex":
+        """
+        Columnar mtime/ctime/size/tag index, synced whenever the vault changed.
+        """
+        from tap.database.local.metadata_index import sync_metadata_index
+
+        vault = self.content_vault
+        built = self._metadata
+        if built is None or built[0] is not vault:
+            with self._index_locks["metadata"]:
+                built = self._metadata
+                if built is None or built[0] is not vault:
+                    index = sync_metadata_index(vault.catalog)
+                    built = self._metadata = (vault, index)
+        return built[1]
+
+    def _within(self, filters: dict | None) -> list[int] | None:
+        """
+        Ids (positions in vault.titles) of notes passing `filters`, most
+        recently modified first, or None when there are no filters. Filters:
+        since/until (epoch seconds, on mtime), tags and keys (frontmatter).
+        """
+        if not filters:
+            return None
+        return self.metadata_index.select(
+            since=filters.get("since"),
+            until=filters.get("until"),
+            tags=filters.get("tags") or (),
+            keys=filters.get("keys") or (),
+        )
+
+    def filter_notes(
+        self, filters: dict, limit: int | None = None
+    ) -> list[tuple[str, float, int]]:
+        """
+        (title, mtime, index) for notes passing `filters`, newest first.
+        """
+        ids = self._within(filters) or []
+        mtime = self.metadata_index.mtime
+        titles = self.vault.titles
+        return [(titles[i], mtime[i] / 1e9, i) for i in ids[:limit]]
+
+    def _result_stamp(self) -> str:
+        catalog = self.vault.catalog
+        return f"{catalog.root}:{catalog.digest()}"
+
+    def _vector_cache_key(self) -> tuple[str, str]:
+        """
+        (mode, stamp) for cached vector results: per backend, and only valid
+        for the vectors and model that produced them.
+        """
+        from tap.query.backends import get_backend
+
+        backend = get_backend()
+        stamp = f"{self._result_stamp()}:{backend.fingerprint()}"
+        return f"vector:{backend.name}", stamp
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        exact: bool = False,
+        filters: dict | None = None,
+    ) -> list[tuple[str, float, int]]:
+        if not exact and not filters:
+            from tap.query.result_cache import get_result_cache
+
+            return get_result_cache().cached(
+                "fuzzy",
+                query,
+                limit,
+                self._result_stamp(),
+                lambda: self.fuzzy_index.search(query, limit),
+            )
+        within = self._within(filters)
+        if exact:
+            index = self.vault.title_positions.get(query)
+            if index is None:
+                return []
+            if within is not None and index not in within:
+                return []
+            return [(query, 100, index)]
+        return self.fuzzy_index.search(query, limit, within)
+
+    def search_many(
+        self, queries: list[str], limit: int = 5
+    ) -> list[list[tuple[str, float, int]]]:
+        from tap.query.result_cache import get_result_cache
+
+        return get_result_cache().cached_many(
+            "fuzzy",
+            queries,
+            limit,
+            self._result_stamp(),
+            lambda missing: self.fuzzy_index.search_many(missing, limit),
+        )
+
+    def content_search(
+        self, query: str, limit: int = 5, filters: dict | None = None
+    ) -> list[tuple[str, float, int]]:
+        within = self._within(filters)
+        if within is None:
+            return self.text_index.search(query, limit)
+        entries = self.vault.catalog.unique_entries()
+        rels = [entries[i].rel for i in within]
+        return self.text_index.search(query, limit, rels)
+
+    def hybrid_search(
+        self,
+        query: str,
+        limit: int = 5,
+        timeouts: dict[str, float] | None = None,
+        filters: dict | None = None,
+    ) -> list[tuple[str, float, int]]:
+        """
+        Title fuzzy, content keyword and vector results fused by reciprocal
+        rank, each retriever bounded by its own timeout.
+        """
+        from tap.query.hybrid import hybrid_search
+
+        retrievers = {
+            "fuzzy": lambda q, n: [
+                title for title, _, _ in self.search(q, n, filters=filters)
+            ],
+            "content": lambda q, n: [
+                title for title, _, _ in self.content_search(q, n, filters)
+            ],
+            "vector": lambda q, n: [
+                title for title, _ in self.vector_search(q, n, filters)
+            ],
+        }
+        return hybrid_search(retrievers, query, limit, timeouts)
+
+    def vector_search(
+        self, query: str, limit: int = 5, filters: dict | None = None
+    ) -> list[tuple[str, float]]:
+        """
+        Nearest notes by embedding, among those passing `filters` if given.
+        """
+        from tap.query.embedding_cache import normalize_query
+        from tap.query.result_cache import get_result_cache
+        from tap.query.similarity import vector_search, vector_search_within
+
+        within = self._within(filters)
+        if within is None:
+            # Queries are embedded normalised, so equal keys give equal results
+            mode, stamp = self._vector_cache_key()
+            return get_result_cache().cached(
+                mode,
+                normalize_query(query),
+                limit,
+                stamp,
+                lambda: vector_search(query, limit),
+            )
+        titles = self.vault.titles
+        return vector_search_within(query, [titles[i] for i in within], limit)
+
+    def vector_search_many(
+        self, queries: list[str], limit: int = 5
+    ) -> list[list[tuple[str, float]]]:
+        from tap.query.embedding_cache import normalize_query
+        from tap.query.result_cache import get_result_cache
+        from tap.query.similarity import vector_search_many
+
+        mode, stamp = self._vector_cache_key()
+        return get_result_cache().cached_many(
+            mode,
+            [normalize_query(query) for query in queries],
+            limit,
+            stamp,
+            lambda missing: vector_search_many(missing, limit),
+        )
+
+    def passage_search(self, query: str, limit: int = 5) -> list["Passage"]:
+        """
+        Best passages for `query` from the chunk index. Backends that don't
+        store chunk text get it filled in by re-chunking the current note,
+        as long as the note is still the one that was indexed.
+        """
+        from tap.database.obsidian.catalog import hash_bytes
+        from tap.database.obsidian.chunking import chunk_note
+        from tap.query.similarity import passage_search_many
+
+        passages = passage_search_many([query], limit)[0]
+        missing = list(dict.fromkeys(p.note for p in passages if p.text is None))
+        notes = {
+            title: (hash_bytes(content.encode("utf-8")), chunk_note(content))
+            for title, content in self.pour(missing)
+        }
+        filled = []
+        for passage in passages:
+            if passage.text is None:
+                digest, note_chunks = notes.get(passage.note, (None, []))
+                if digest != passage.hash or passage.index >= len(note_chunks):
+                    # Edited or removed since indexing: the chunk at this
+                    # index may be another passage now
+                    continue
+                passage = passage._replace(text=note_chunks[passage.index].text)
+            filled.append(passage)
+        return filled
+
+    def network(
+        self, title: str, hops: int = 1, reverse: bool = False
+    ) -> list[tuple[str, int, int]]:
+        """
+        (title, distance, index) for notes within `hops` links of `title`,
+        the note itself first. reverse=True follows backlinks.
+        """
+        expanded = self.link_graph.expand(title, hops, reverse)
+        return [(name, depth, index) for index, (name, depth) in enumerate(expanded)]
+
+    def locate(self, titles: list[str]) -> list[tuple[str, str]]:
+        """
+        (title, absolute path) for each title that exists, in order. Lets
+        callers stream note contents themselves rather than receive them all
+        at once.
+        """
+        vault = self.vault
+        return [
+            (title, str(path))
+            for title in titles
+            if (path := vault.get_path_by_title(title)) is not None
+        ]
+
+    def date_range_paths(self, start: str, end: str) -> list[tuple[str, str]]:
+        """
+        (date, absolute path) for each daily note between start and end.
+        """
+        paths = self.vault.get_daily_note_paths_in_date_range(start, end)
+        return [(path.stem, str(path)) for path in paths]
+
+    def get(self, title: str) -> str | None:
+        path = self.vault.get_path_by_title(title)
+        if path is None:
+            return None
+        try:
+            return path.read_text(encoding="utf-8")
+        except Exception as e:
+            logger.warning(f"Error reading {path}: {e}")
+            return None
+
+    def pour(self, titles: list[str]) -> list[tuple[str, str]]:
+        """
+        Contents of several notes, in order, skipping any that can't be read.
+        """
+        vault = self.vault
+        found = [
+            (title, path)
+            for title in titles
+            if (path := vault.get_path_by_title(title)) is not None
+        ]
+        note_files = vault.read_note_files([path for _, path in found])
+        return [
+            (title, note_file.content)
+            for (title, _), note_file in zip(found, note_files)
+            if note_file is not None
+        ]
+
+    def date_range(self, start: str, end: str) -> list[tuple[str, str]]:
+        """
+        (date, content) for each daily note between start and end, inclusive.
+        """
+        paths = self.vault.get_daily_note_paths_in_date_range(start, end)
+        return self.pour([path.stem for path in paths])
@@ -0,0 +1,149 @@
+"""
+Async-first vector search against Chroma.
+
+One VectorSearchService holds a single client and collection handle and sends
+a whole batch of query texts in one collection.query round-trip. Sync callers
+(the CLI, the daemon's worker threads, scripts) go through vector_search_many,
+which drives a process-wide asyncio.Runner so the event loop, and the client
+bound to it, survive between calls instead of being rebuilt by asyncio.run.
+"""
+
+from functools import cache
+from typing import TYPE_CHECKING
+import asyncio
+import threading
+
+if TYPE_CHECKING:
+    import numpy as np
+    from chromadb.api.models.AsyncCollection import AsyncCollection
+    from tap.query.backends import Passage
+
+
+class VectorSearchService:
+    def __init__(self):
+        self._collections: dict[str, "AsyncCollection"] = {}
+        self._lock: asyncio.Lock | None = None
+
+    async def collection(self, name: str | None = None) -> "AsyncCollection":
+        from tap.database.chroma.load_vault import (
+            COLLECTION_NAME,
+            get_vault_descriptions_collection,
+        )
+
+        name = name or COLLECTION_NAME
+        if name not in self._collections:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if name not in self._collections:
+                    self._collections[name] = await get_vault_descriptions_collection(
+                        name
+                    )
+        return self._collections[name]
+
+    async def embed_queries(self, queries: list[str]) -> "np.ndarray":
+        from tap.database.chroma.load_vault import (
+            embedding_model,
+            get_embedding_function,
+        )
+        from tap.query.embedding_cache import get_query_cache
+
+        # Encode on a worker thread, skipping queries seen before; the model
+        # is only loaded if some query misses the cache
+        return await asyncio.to_thread(
+            get_query_cache().embed,
+            queries,
+            f"chroma:{embedding_model}",
+            lambda texts: get_embedding_function()(texts),
+        )
+
+    async def search_many(
+        self, queries: list[str], limit: int = 5
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Nearest (title, distance) pairs for each query, from one round-trip.
+        """
+        if not queries:
+            return []
+        collection = await self.collection()
+        embeddings = await self.embed_queries(queries)
+        results = await collection.query(
+            query_embeddings=list(embeddings), n_results=limit
+        )
+        return [
+            list(zip(ids, distances))
+            for ids, distances in zip(results["ids"], results["distances"])
+        ]
+
+    async def search_passages(
+        self, queries: list[str], limit: int = 5
+    ) -> list[list["Passage"]]:
+        """
+        Nearest chunks for each query from the chunk collection, with text.
+        """
+        if not queries:
+            return []
+        from tap.database.chroma.load_vault import CHUNK_COLLECTION_NAME
+        from tap.query.backends import Passage, chunk_index
+
+        collection = await self.collection(CHUNK_COLLECTION_NAME)
+        embeddings = await self.embed_queries(queries)
+        results = await collection.query(
+            query_embeddings=list(embeddings),
+            n_results=limit,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            [
+                Passage(
+                    metadata["note"],
+                    metadata.get("heading", ""),
+                    chunk_index(chunk_id),
+                    distance,
+                    document,
+                )
+                for chunk_id, document, metadata, distance in zip(
+                    ids, documents, metadatas, distances
+                )
+            ]
+            for ids, documents, metadatas, distances in zip(
+                results["ids"],
+                results["documents"],
+                results["metadatas"],
+                results["distances"],
+            )
+        ]
+
+    async def search(self, query: str, limit: int = 5) -> list[tuple[str, float]]:
+        return (await self.search_many([query], limit))[0]
+
+
+_runner_lock = threading.Lock()
+
+
+@cache
+def _runner() -> asyncio.Runner:
+    return asyncio.Runner()
+
+
+@cache
+def get_vector_service() -> VectorSearchService:
+    return VectorSearchService()
+
+
+def vector_search_many(
+    queries: list[str], limit: int = 5
+) -> list[list[tuple[str, float]]]:
+    """
+    Sync wrapper for VectorSearchService.search_many on the shared event loop.
+    """
+    with _runner_lock:
+        return _runner().run(get_vector_service().search_many(queries, limit))
+
+
+def passage_search_many(queries: list[str], limit: int = 5) -> list[list["Passage"]]:
+    """
+    Sync wrapper for VectorSearchService.search_passages on the shared event loop.
+    """
+    with _runner_lock:
+        return _runner().run(get_vector_service().search_passages(queries, limit))
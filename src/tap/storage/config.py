@@ -0,0 +1,109 @@
+"""
+Filesystem locations for tap's local state.
+
+Everything derived from the vault lives under a single cache directory so it
+can be wiped without touching the vault. Override with TAP_CACHE_DIR. State
+that can't be rebuilt from the vault (the pool, aliases) lives in the data
+directory instead; override with TAP_DATA_DIR.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+
+def cache_dir() -> Path:
+    """
+    Directory for tap's derived data (catalog, indexes, caches).
+    """
+    override = os.environ.get("TAP_CACHE_DIR")
+    if override:
+        path = Path(override).expanduser()
+    else:
+        xdg = os.environ.get("XDG_CACHE_HOME")
+        base = Path(xdg).expanduser() if xdg else Path.home() / ".cache"
+        path = base / "tap"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def data_dir() -> Path:
+    """
+    Directory for tap's own state (pool, aliases), which isn't derived data.
+    """
+    override = os.environ.get("TAP_DATA_DIR")
+    if override:
+        path = Path(override).expanduser()
+    else:
+        xdg = os.environ.get("XDG_DATA_HOME")
+        base = Path(xdg).expanduser() if xdg else Path.home() / ".local" / "share"
+        path = base / "tap"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def state_file() -> Path:
+    return data_dir() / "state.sqlite"
+
+
+def catalog_file() -> Path:
+    return cache_dir() / "catalog.json"
+
+
+def matches_file() -> Path:
+    return cache_dir() / "matches.json"
+
+
+def pool_file() -> Path:
+    return cache_dir() / "pool.json"
+
+
+def watch_lock_file() -> Path:
+    """
+    Held (flock) by a running `tap watch`, which keeps the catalog current.
+    """
+    return cache_dir() / "watch.lock"
+
+
+def socket_file() -> Path:
+    """
+    Unix socket for `tap serve`. Prefers XDG_RUNTIME_DIR, which is private to
+    the user and cleared on logout.
+
+    The name is keyed by the vault and cache directory, so a client whose
+    OBSIDIAN_PATH or TAP_CACHE_DIR differs from the daemon's never reaches
+    it and runs in-process instead.
+    """
+    vault = os.path.expanduser(os.environ.get("OBSIDIAN_PATH", ""))
+    identity = f"{os.path.abspath(vault) if vault else ''}\0{cache_dir()}"
+    key = hashlib.blake2b(identity.encode("utf-8"), digest_size=6).hexdigest()
+    name = f"tap-{key}.sock"
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and Path(runtime).is_dir():
+        return Path(runtime) / name
+    return cache_dir() / name
+
+
+def temp_path(path: Path, suffix: str = ".tmp") -> Path:
+    """
+    Hidden sibling of `path` to write before renaming it into place, unique
+    per process and thread: threads of one process (daemon requests, hybrid
+    retrievers) may write the same file at once.
+    """
+    return path.with_name(
+        f".{path.name}.{os.getpid()}.{threading.get_ident()}{suffix}"
+    )
+
+
+def atomic_write_json(path: Path, data: Any):
+    """
+    Write JSON to a temp file and rename it into place, so concurrent readers
+    never see a half-written file.
+    """
+    tmp = temp_path(path)
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
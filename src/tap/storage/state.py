@@ -0,0 +1,323 @@
+"""
+Transactional store for tap's small mutable state: the last search results,
+the pool, aliases and cached token counts.
+
+Several tap stages in one pipeline run at the same time, and rewriting JSON
+files wholesale let them clobber each other (and lose alias use counts). All
+of it now lives in one SQLite database in WAL mode: readers never block, each
+update is a single transaction, and read-modify-write operations take the
+write lock up front (BEGIN IMMEDIATE) so they can't interleave.
+
+The store lives in the data directory rather than the cache, so wiping the
+cache doesn't lose the pool or aliases. The first time it is opened, existing
+matches.json / pool.json and the aliases.json of older versions are imported.
+"""
+
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
+from typing import Iterator, NamedTuple
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from tap.storage.config import matches_file, pool_file, state_file
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    position INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    score REAL NOT NULL,
+    idx INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pool (
+    position INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    name TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    path TEXT,
+    tag TEXT,
+    description TEXT,
+    created_at REAL NOT NULL,
+    last_used REAL,
+    use_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS token_counts (
+    tokenizer TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    PRIMARY KEY (tokenizer, digest)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class Alias(NamedTuple):
+    name: str
+    title: str
+    path: str | None
+    tag: str | None
+    description: str | None
+    created_at: float
+    last_used: float | None
+    use_count: int
+
+
+def legacy_alias_files() -> list[Path]:
+    xdg = os.environ.get("XDG_CONFIG_HOME")
+    config = Path(xdg).expanduser() if xdg else Path.home() / ".config"
+    return [config / "tap" / "aliases.json", config / "contex" / "aliases.json"]
+
+
+class StateStore:
+    def __init__(self, path: Path | None = None):
+        self.path = path or state_file()
+        self._conn: sqlite3.Connection | None = None
+        # The daemon and tests may share a store across threads
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._migrate()
+        return self._conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        One write transaction, holding the database write lock from the start.
+        """
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    # ------------------------------------------------------------------
+    # Last results
+    # ------------------------------------------------------------------
+    def set_matches(self, matches: list[tuple[str, float, int]]):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM matches")
+            conn.executemany(
+                "INSERT INTO matches VALUES (?, ?, ?, ?)",
+                [(i, *match) for i, match in enumerate(matches)],
+            )
+
+    def get_matches(self) -> list[tuple[str, float, int]]:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT title, score, idx FROM matches ORDER BY position"
+            ).fetchall()
+
+    # ------------------------------------------------------------------
+    # Pool
+    # ------------------------------------------------------------------
+    def pool_titles(self) -> list[str]:
+        with self._lock:
+            rows = self.conn.execute("SELECT title FROM pool ORDER BY position")
+            return [title for (title,) in rows]
+
+    def pool_add(self, title: str) -> bool:
+        """
+        Append `title` to the pool; False if it was already there.
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO pool (title) VALUES (?)", (title,)
+            )
+            return cursor.rowcount == 1
+
+    def pool_remove(self, index: int) -> str | None:
+        """
+        Remove the 1-based `index`th pool item, returning its title.
+        """
+        if index < 1:
+            return None
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT position, title FROM pool ORDER BY position "
+                "LIMIT 1 OFFSET ?",
+                (index - 1,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM pool WHERE position = ?", (row[0],))
+            return row[1]
+
+    def pool_discard(self, titles: list[str]):
+        """
+        Remove these titles, leaving anything stowed since they were read.
+        """
+        with self.transaction() as conn:
+            conn.executemany("DELETE FROM pool WHERE title = ?", [(t,) for t in titles])
+
+    def pool_clear(self):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM pool")
+
+    # ------------------------------------------------------------------
+    # Aliases
+    # ------------------------------------------------------------------
+    def set_alias(
+        self,
+        name: str,
+        title: str,
+        path: str | None = None,
+        tag: str | None = None,
+        description: str | None = None,
+    ):
+        """
+        Create or retarget an alias, keeping its usage history.
+        """
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO aliases (name, title, path, tag, description, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET title = excluded.title, "
+                "path = excluded.path, tag = COALESCE(excluded.tag, tag), "
+                "description = COALESCE(excluded.description, description)",
+                (name, title, path, tag, description, time.time()),
+            )
+
+    def get_alias(self, name: str) -> Alias | None:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM aliases WHERE name = ?", (name,)
+            ).fetchone()
+        return Alias(*row) if row else None
+
+    def list_aliases(self) -> list[Alias]:
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM aliases ORDER BY name").fetchall()
+        return [Alias(*row) for row in rows]
+
+    def record_alias_use(self, name: str, path: str | None = None):
+        """
+        Count one use of an alias, optionally updating its resolved path.
+        """
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE aliases SET use_count = use_count + 1, last_used = ?, "
+                "path = COALESCE(?, path) WHERE name = ?",
+                (time.time(), path, name),
+            )
+
+    def remove_alias(self, name: str) -> bool:
+        with self.transaction() as conn:
+            cursor = conn.execute("DELETE FROM aliases WHERE name = ?", (name,))
+            return cursor.rowcount == 1
+
+    # ------------------------------------------------------------------
+    # Token counts, by tokenizer and content hash
+    # ------------------------------------------------------------------
+    def get_token_count(self, tokenizer: str, digest: str) -> int | None:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT tokens FROM token_counts WHERE tokenizer = ? AND digest = ?",
+                (tokenizer, digest),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_token_counts(self, tokenizer: str, counts: dict[str, int]):
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO token_counts VALUES (?, ?, ?)",
+                [(tokenizer, digest, tokens) for digest, tokens in counts.items()],
+            )
+
+    # ------------------------------------------------------------------
+    # Migration from the JSON files
+    # ------------------------------------------------------------------
+    def _migrate(self):
+        with self.transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+                return
+            self._import_json(conn)
+            conn.execute("INSERT INTO meta VALUES ('migrated', ?)", (str(time.time()),))
+
+    def _import_json(self, conn: sqlite3.Connection):
+        matches = _read_json(matches_file())
+        if isinstance(matches, list):
+            conn.executemany(
+                "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?)",
+                [(i, *match) for i, match in enumerate(matches) if len(match) == 3],
+            )
+        pool = _read_json(pool_file())
+        if isinstance(pool, list):
+            conn.executemany(
+                "INSERT OR IGNORE INTO pool (title) VALUES (?)",
+                [(title,) for title in pool if isinstance(title, str)],
+            )
+        for path in legacy_alias_files():
+            aliases = _read_json(path)
+            if not isinstance(aliases, dict):
+                continue
+            for name, record in aliases.items():
+                # Hand-edited files may hold anything; skip what isn't an alias
+                file = record.get("file") if isinstance(record, dict) else None
+                if not isinstance(file, str) or not file:
+                    logger.warning(f"Skipping malformed alias {name!r} in {path}")
+                    continue
+                use_count = record.get("use_count")
+                conn.execute(
+                    "INSERT OR IGNORE INTO aliases VALUES (?, ?, NULL, ?, ?, ?, ?, ?)",
+                    (
+                        name,
+                        file[:-3] if file.endswith(".md") else file,
+                        _text(record.get("tag")),
+                        _text(record.get("description")),
+                        time.time(),
+                        _timestamp(record.get("last_used")),
+                        use_count if isinstance(use_count, int) else 0,
+                    ),
+                )
+            logger.info(f"Imported {len(aliases)} aliases from {path}")
+
+
+def _read_json(path: Path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _text(value) -> str | None:
+    return value if isinstance(value, str) else None
+
+
+def _timestamp(value) -> float | None:
+    from datetime import datetime
+
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+@cache
+def get_state() -> StateStore:
+    return StateStore()
@@ -0,0 +1,19 @@
+"""
+Shared helpers for tests that build a vault on disk.
+"""
+
+import os
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def bump_mtime(path):
+    """
+    Move the file's mtime a second forward, so an edit is seen even on
+    filesystems with coarse timestamps.
+    """
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
@@ -0,0 +1,43 @@
+from tap.cli.budget import TRUNCATION_MARKER, TokenBudget, Tokenizer
+from tap.cli.output import stream_notes
+from tap.storage.state import StateStore
+
+
+def test_budget_keeps_ranked_prefix_and_trims_the_boundary_note(capsys):
+    budget = TokenBudget(400, Tokenizer(None))
+    notes = [("First", "a" * 400), ("Second", "b\n" * 800), ("Third", "c" * 40)]
+
+    assert stream_notes(notes, raw=True, budget=budget) == 2
+    out, err = capsys.readouterr()
+    assert "<first>\n" + "a" * 400 in out
+    assert TRUNCATION_MARKER in out and "<third>" not in out
+    assert budget.kept == ["First", "Second"] and budget.trimmed == ["Second"]
+    assert "kept 2 notes" in err
+
+
+def test_budget_drops_when_too_little_is_left():
+    budget = TokenBudget(60, Tokenizer(None))
+    assert budget.fit("Big", "x" * 400) is None
+    assert budget.fit("Small", "y") is None  # Nothing may jump the queue
+    assert budget.kept == []
+
+
+def test_token_counts_are_cached_by_content_hash(tmp_path, monkeypatch):
+    store = StateStore(tmp_path / "state.sqlite")
+    monkeypatch.setattr("tap.storage.state.get_state", lambda: store)
+    calls = []
+
+    def encode(text):
+        calls.append(text)
+        return text.split()
+
+    tokenizer = Tokenizer("words", encode, " ".join)
+    budget = TokenBudget(1000, tokenizer)
+    assert budget.fit("Note", "one two three") == "one two three"
+    budget.finish()
+    assert calls == ["one two three"]
+
+    budget = TokenBudget(1000, tokenizer)
+    budget.fit("Note", "one two three")
+    assert calls == ["one two three"]
+    assert budget.used == 3
@@ -0,0 +1,93 @@
+from helpers import bump_mtime, write
+from tap.database.obsidian.catalog import VaultCatalog
+
+
+def test_catalog_incremental_refresh(tmp_path):
+    vault = tmp_path / "vault"
+    write(vault / "a.md", "alpha")
+    write(vault / "projects" / "b.md", "beta")
+    write(vault / "projects" / "old" / "c.md", "gamma")
+    store = tmp_path / "catalog.json"
+
+    catalog = VaultCatalog.load(vault, store)
+    assert sorted(e.stem for e in catalog.unique_entries()) == ["a", "b", "c"]
+    generation = catalog.generation
+
+    # Unchanged vault: loads from disk without bumping the generation
+    catalog = VaultCatalog.load(vault, store)
+    assert catalog.generation == generation
+
+    # Add a file, delete a subtree
+    write(vault / "projects" / "d.md", "delta")
+    (vault / "projects" / "old" / "c.md").unlink()
+    (vault / "projects" / "old").rmdir()
+    bump_mtime(vault / "projects")
+
+    catalog = VaultCatalog.load(vault, store)
+    assert sorted(e.stem for e in catalog.unique_entries()) == ["a", "b", "d"]
+    assert "projects/old" not in catalog.dirs
+    assert catalog.generation > generation
+
+
+def test_catalog_deep_refresh_and_hashes(tmp_path):
+    vault = tmp_path / "vault"
+    write(vault / "a.md", "alpha")
+    catalog = VaultCatalog.load(vault, tmp_path / "catalog.json")
+    before = catalog.content_hash("a.md")
+
+    write(vault / "a.md", "alpha, edited")
+    bump_mtime(vault / "a.md")
+    assert catalog.refresh(deep=True)
+    assert catalog.content_hash("a.md") != before
+
+
+def test_catalog_dedupes_by_name(tmp_path):
+    vault = tmp_path / "vault"
+    write(vault / "x" / "same.md", "one")
+    write(vault / "y" / "same.md", "two")
+    catalog = VaultCatalog.load(vault, tmp_path / "catalog.json")
+    assert [e.rel for e in catalog.unique_entries()] == ["x/same.md"]
+
+
+def test_catalog_rebuild_never_reuses_a_generation(tmp_path):
+    vault = tmp_path / "vault"
+    store = tmp_path / "catalog.json"
+    write(vault / "a.md", "alpha")
+    first = VaultCatalog.load(vault, store).generation
+
+    # Wiping the catalog and indexing a different set of notes must not land
+    # on a generation that derived caches could still be keyed by
+    store.unlink()
+    (vault / "a.md").unlink()
+    write(vault / "b.md", "beta")
+    second = VaultCatalog.load(vault, store).generation
+    assert second > first
+
+    # Same for switching vaults and back
+    other = tmp_path / "other"
+    write(other / "c.md", "gamma")
+    VaultCatalog.load(other, store)
+    assert VaultCatalog.load(vault, store).generation not in (first, second)
+
+
+def test_digest_names_the_vault_state_not_the_generation(tmp_path):
+    vault = tmp_path / "vault"
+    write(vault / "a.md", "alpha")
+    store = tmp_path / "catalog.json"
+    VaultCatalog.load(vault, store)
+
+    # Two processes advance the same saved generation over different edits
+    first = VaultCatalog.read(vault, store)
+    second = VaultCatalog.read(vault, store)
+    write(vault / "b.md", "beta")
+    first.refresh()
+    (vault / "b.md").unlink()
+    write(vault / "c.md", "gamma")
+    second.refresh()
+    assert first.generation == second.generation
+    assert first.digest() != second.digest()
+
+    # Saved with the catalog, and equal for equal states
+    second.save()
+    assert VaultCatalog.read(vault, store).digest() == second.digest()
+    assert VaultCatalog.load(vault, tmp_path / "other.json").digest() == second.digest()
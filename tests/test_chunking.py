@@ -0,0 +1,60 @@
+from tap.database.obsidian.chunking import chunk_note
+
+NOTE = """---
+tags: [x]
+---
+Intro paragraph.
+
+# Work
+## Projects
+```
+# not a heading
+```
+Alpha.
+
+# Health
+""" + "\n\n".join(f"Paragraph {i} " + "word " * 40 for i in range(6))
+
+
+def test_chunks_follow_headings_and_stay_under_limit():
+    chunks = chunk_note(NOTE, max_chars=400)
+
+    assert [c.heading for c in chunks[:3]] == ["", "Work", "Work > Projects"]
+    assert "# not a heading" in chunks[2].text
+    assert all(c.heading == "Health" for c in chunks[3:])
+    assert len(chunks) > 4
+    assert all(c.end - c.start <= 400 for c in chunks)
+    # Spans point back into the note
+    for chunk in chunks:
+        assert NOTE[chunk.start : chunk.end].strip() == chunk.text
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+
+
+def test_passage_text_is_only_refilled_from_the_indexed_note(monkeypatch):
+    from tap.database.obsidian.catalog import hash_bytes
+    from tap.query.backends import Passage
+    from tap.services.search_service import SearchService
+
+    indexed = "# One\nfirst passage\n# Two\nsecond passage\n"
+    edited = "# Two\nsecond passage\n"
+    digest = hash_bytes(indexed.encode("utf-8"))
+    hits = [
+        Passage("Kept", "One", 0, 0.1, hash=digest),
+        Passage("Edited", "One", 0, 0.2, hash=digest),
+        Passage("Stored", "Two", 1, 0.3, "text from the store"),
+    ]
+    monkeypatch.setattr(
+        "tap.query.similarity.passage_search_many", lambda queries, limit: [hits]
+    )
+    service = SearchService()
+    notes = {"Kept": indexed, "Edited": edited}
+    monkeypatch.setattr(
+        service, "pour", lambda titles: [(t, notes[t]) for t in titles]
+    )
+
+    passages = service.passage_search("first", limit=3)
+    # The edited note's chunk 0 is now "Two"; it must not be returned as "One"
+    assert [(p.note, p.text) for p in passages] == [
+        ("Kept", "# One\nfirst passage"),
+        ("Stored", "text from the store"),
+    ]
@@ -0,0 +1,89 @@
+import os
+import sys
+import threading
+
+import pytest
+
+from tap.daemon import client
+from tap.daemon.client import UNAVAILABLE, DaemonError, call, send
+from tap.storage.config import socket_file
+
+
+class FakeService:
+    def search(self, query, limit=5):
+        return [[query, 100, 0]][:limit]
+
+    def date_range_paths(self, start, end):
+        raise ValueError(f"Invalid date {start!r}")
+
+
+@pytest.fixture
+def daemon_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("TAP_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    monkeypatch.setenv("OBSIDIAN_PATH", str(tmp_path / "vault"))
+    monkeypatch.delenv("TAP_NO_DAEMON", raising=False)
+    return tmp_path
+
+
+@pytest.fixture
+def server(daemon_env):
+    from tap.daemon.server import TapServer
+
+    server = TapServer(str(socket_file()))
+    server.service = FakeService()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_socket_is_keyed_by_vault_and_cache(daemon_env, monkeypatch):
+    path = socket_file()
+    assert path.parent == daemon_env
+    monkeypatch.setenv("OBSIDIAN_PATH", str(daemon_env / "other"))
+    assert socket_file() != path
+    monkeypatch.setenv("OBSIDIAN_PATH", str(daemon_env / "vault"))
+    monkeypatch.setenv("TAP_CACHE_DIR", str(daemon_env / "other-cache"))
+    assert socket_file() != path
+
+
+def test_daemon_protocol(server, monkeypatch):
+    assert send("ping") == os.getpid()
+    assert send("search", query="burnout", limit=1) == [["burnout", 100, 0]]
+    with pytest.raises(DaemonError, match="ValueError: Invalid date"):
+        send("date_range_paths", start="2025-13-45", end="2025-12-01")
+    with pytest.raises(DaemonError, match="Unknown operation"):
+        send("shutdown")
+
+    # A client for another vault doesn't reach this daemon
+    monkeypatch.setenv("OBSIDIAN_PATH", "/elsewhere")
+    assert send("ping") is UNAVAILABLE
+
+
+def test_call_falls_back_in_process(daemon_env, monkeypatch):
+    monkeypatch.setattr("tap.services.search_service.SearchService", FakeService)
+    assert send("search", query="x") is UNAVAILABLE
+    assert call("search", query="burnout") == [["burnout", 100, 0]]
+
+    # A stale socket with nobody listening is the same as no daemon
+    socket_file().touch()
+    assert call("search", query="stale") == [["stale", 100, 0]]
+    monkeypatch.setenv("TAP_NO_DAEMON", "1")
+    assert client.send("ping") is UNAVAILABLE
+
+
+def test_cli_reports_service_errors(daemon_env, monkeypatch, capsys):
+    pytest.importorskip("rich")
+    from tap.cli.main import main
+
+    def failing_call(op, **params):
+        raise DaemonError("ValueError: month must be in 1..12")
+
+    monkeypatch.setattr("tap.cli.commands.search.call", failing_call)
+    monkeypatch.setattr(sys, "argv", ["tap", "-d", "2025-13-45:2025-12-01"])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 1
+    assert "month must be in 1..12" in capsys.readouterr().err
@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from tap.query.embedding_cache import QueryEmbeddingCache  # noqa: E402
+
+
+def test_cache_encodes_only_misses_and_counts_them(tmp_path):
+    cache = QueryEmbeddingCache(tmp_path / "q.sqlite")
+    encoded: list[list[str]] = []
+
+    def encode(texts):
+        encoded.append(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    vectors = cache.embed(["Burnout", "burnout ", "weekly"], "m", encode)
+    # Queries are normalised, so the first two share one entry
+    assert encoded == [["burnout", "weekly"]]
+    assert vectors.tolist() == [[7.0, 1.0], [7.0, 1.0], [6.0, 1.0]]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    cache.embed(["weekly", "new"], "m", encode)
+    assert encoded[-1] == ["new"]
+    # Another model never sees these entries
+    cache.embed(["weekly"], "other", encode)
+    assert encoded[-1] == ["weekly"]
+
+    stats = QueryEmbeddingCache(tmp_path / "q.sqlite").stats()
+    assert stats["hits"] == 2 and stats["misses"] == 4
+    assert stats["entries"] == 4
+
+
+def test_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr("tap.query.embedding_cache.time.time", lambda: next(clock))
+    cache = QueryEmbeddingCache(tmp_path / "q.sqlite", max_entries=2)
+
+    def encode(texts):
+        return [[1.0] for _ in texts]
+
+    cache.embed(["a"], "m", encode)
+    cache.embed(["b"], "m", encode)
+    cache.embed(["a"], "m", encode)  # "a" is now the most recent
+    cache.embed(["c"], "m", encode)
+    assert sorted(cache.get_many("m", ["a", "b", "c"])) == ["a", "c"]
+
+
+def test_chroma_queries_skip_the_model_when_cached(tmp_path, monkeypatch):
+    import asyncio
+
+    from tap.database.chroma import load_vault
+    from tap.query import embedding_cache
+    from tap.services.vector_service import VectorSearchService
+
+    monkeypatch.setattr(
+        embedding_cache,
+        "get_query_cache",
+        lambda: QueryEmbeddingCache(tmp_path / "q.sqlite"),
+    )
+    loads = []
+
+    def get_embedding_function():
+        loads.append(1)
+        return lambda texts: [[1.0] for _ in texts]
+
+    monkeypatch.setattr(load_vault, "get_embedding_function", get_embedding_function)
+    service = VectorSearchService()
+    asyncio.run(service.embed_queries(["burnout"]))
+    assert len(loads) == 1
+    asyncio.run(service.embed_queries(["burnout"]))
+    assert len(loads) == 1
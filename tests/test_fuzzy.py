@@ -0,0 +1,78 @@
+import json
+import random
+import types
+
+import pytest
+
+pytest.importorskip("rapidfuzz")
+pytest.importorskip("numpy")
+
+from tap.query import fuzzy  # noqa: E402
+from tap.query.fuzzy import FuzzyIndex  # noqa: E402
+
+TITLES = ["Burnout", "Weekly Review", "Project Alpha", "2025-10-02", "Recipes"]
+
+
+def _random_titles(n: int) -> list[str]:
+    rng = random.Random(7)
+    letters = "eeeeetttaaooiinnsshhrrdlucmwfgypbvkjxqz"
+
+    def word():
+        return "".join(rng.choice(letters) for _ in range(rng.randint(3, 9)))
+
+    return [" ".join(word() for _ in range(rng.randint(1, 5))) for _ in range(n)]
+
+
+def test_search_and_search_many_agree():
+    index = FuzzyIndex(TITLES)
+    assert index.search("weekly revew", limit=1)[0][0] == "Weekly Review"
+    assert index.search("alpha", limit=2, within=[0, 1])[0][0] in TITLES[:2]
+    many = index.search_many(["weekly revew", "burnout"], limit=1)
+    assert [results[0][0] for results in many] == ["Weekly Review", "Burnout"]
+    assert index.search_many([], limit=1) == []
+
+    # Scores and tie order are identical, so both share cached results
+    index = FuzzyIndex(_random_titles(2_000) + ["weekly review"] * 3)
+    queries = ["weekly revew", "ab", "x", "review burnout"]
+    assert index.search_many(queries, limit=7) == [
+        index.search(query, limit=7) for query in queries
+    ]
+
+
+def test_prefilter_keeps_short_titles_and_is_only_used_when_selective(monkeypatch):
+    monkeypatch.setattr(fuzzy, "PREFILTER_THRESHOLD", 1_000)
+    titles = _random_titles(5_000) + ["burnout", "weekly review"]
+    index = FuzzyIndex(titles)
+    burnout = len(titles) - 2
+
+    # A short title inside a long query scores highly, so it must survive
+    candidates = index.candidates("burnout recovery plan")
+    assert candidates is None or burnout in candidates
+    assert index.search("burnout recovery plan", limit=1)[0][0] == "burnout"
+
+    # A selective query scores only its candidates, and finds the same
+    # matches a full scan does
+    candidates = index.candidates("burnout")
+    assert candidates is not None and burnout in candidates
+    assert len(candidates) <= fuzzy.PREFILTER_MAX_SHARE * len(titles)
+    full = FuzzyIndex(titles).search("burnout", limit=5, within=range(len(titles)))
+    assert index.search("burnout", limit=5) == full
+
+    # Too few candidates to fill the limit: score everything
+    assert index.candidates("qqqqzzzzxxxx", limit=5_000) is None
+
+
+def test_for_catalog_reuses_processed_titles(tmp_path, monkeypatch):
+    monkeypatch.setenv("TAP_CACHE_DIR", str(tmp_path))
+    catalog = types.SimpleNamespace(root=tmp_path / "vault", digest=lambda: "one")
+    FuzzyIndex.for_catalog(catalog, TITLES)
+    path = tmp_path / "fuzzy.json"
+    data = json.loads(path.read_text())
+    data["processed"][0] = "sentinel"
+    path.write_text(json.dumps(data))
+
+    # Same vault state: the persisted list is used as-is
+    assert FuzzyIndex.for_catalog(catalog, TITLES).processed[0] == "sentinel"
+    # Any other state rebuilds it, whatever its generation
+    catalog.digest = lambda: "two"
+    assert FuzzyIndex.for_catalog(catalog, TITLES).processed[0] == "burnout"
@@ -0,0 +1,34 @@
+import time
+
+from tap.query.hybrid import hybrid_search, reciprocal_rank_fusion
+
+
+def test_rrf_rewards_agreement():
+    fused = reciprocal_rank_fusion(
+        {"fuzzy": ["a", "b", "c"], "content": ["c", "b"], "vector": ["b"]}
+    )
+    assert [title for title, _ in fused] == ["b", "c", "a"]
+
+
+def test_slow_and_failing_retrievers_are_left_out():
+    def slow(query, n):
+        time.sleep(2)
+        return ["slow"]
+
+    def broken(query, n):
+        raise RuntimeError("backend down")
+
+    started = time.monotonic()
+    results = hybrid_search(
+        {
+            "fuzzy": lambda q, n: ["x", "y"],
+            "content": broken,
+            "vector": slow,
+        },
+        "query",
+        limit=5,
+        timeouts={"vector": 0.1},
+    )
+    assert time.monotonic() - started < 1
+    assert [title for title, _, _ in results] == ["x", "y"]
+    assert [rank for _, _, rank in results] == [0, 1]
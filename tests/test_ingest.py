@@ -0,0 +1,168 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+from helpers import bump_mtime, write
+from tap.database.chroma import load_vault as chroma
+from tap.database.obsidian.catalog import VaultCatalog, hash_bytes
+
+
+class FakeCollection:
+    """
+    The parts of Chroma's AsyncCollection that syncing uses.
+    """
+
+    def __init__(self):
+        self.docs: dict[str, tuple[str, dict]] = {}
+        self.upserted: list[str] = []
+
+    async def get(self, include, limit, offset):
+        ids = list(self.docs)[offset : offset + limit]
+        return {"ids": ids, "metadatas": [self.docs[i][1] for i in ids]}
+
+    async def upsert(self, ids, documents, metadatas, embeddings):
+        assert len(embeddings) == len(ids)
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            self.docs[doc_id] = (document, metadata)
+        self.upserted.extend(ids)
+
+    async def delete(self, ids=None, where=None):
+        if where is not None:
+            notes = set(where["note"]["$in"])
+            ids = [i for i, (_, m) in self.docs.items() if m.get("note") in notes]
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+
+
+@pytest.fixture
+def chroma_env(tmp_path, monkeypatch):
+    """
+    A vault, an in-memory collection and a client standing in for Chroma.
+    """
+    monkeypatch.setenv("TAP_CACHE_DIR", str(tmp_path / "cache"))
+    collections: dict[str, FakeCollection] = {}
+
+    class Client:
+        async def delete_collection(self, name):
+            collections.pop(name, None)
+
+    async def get_client():
+        return Client()
+
+    async def get_collection(name=chroma.COLLECTION_NAME):
+        return collections.setdefault(name, FakeCollection())
+
+    module = types.ModuleType("dbclients.clients.chroma")
+    module.get_client = get_client
+    for name in ("dbclients", "dbclients.clients"):
+        monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+    monkeypatch.setitem(sys.modules, "dbclients.clients.chroma", module)
+    monkeypatch.setattr(chroma, "get_vault_descriptions_collection", get_collection)
+    monkeypatch.setattr(
+        chroma, "embed_documents", lambda texts: [[float(len(t))] for t in texts]
+    )
+
+    vault = tmp_path / "vault"
+    store = tmp_path / "catalog.json"
+
+    def sync(**kwargs) -> FakeCollection:
+        handle = types.SimpleNamespace(
+            obsidian_path=vault, catalog=VaultCatalog.load(vault, store)
+        )
+        return asyncio.run(chroma.load_vault(handle, **kwargs))
+
+    return vault, sync
+
+
+def test_sync_reembeds_only_changed_notes(chroma_env):
+    vault, sync = chroma_env
+    write(vault / "a.md", "alpha")
+    write(vault / "b.md", "beta")
+    write(vault / "c.md", "gamma")
+
+    collection = sync()
+    assert sorted(collection.upserted) == ["a", "b", "c"]
+    assert collection.docs["a"][1]["path"] == "a.md"
+
+    # Nothing changed: nothing is embedded
+    collection.upserted.clear()
+    sync()
+    assert collection.upserted == []
+
+    # An in-place edit, a deletion and a new note
+    write(vault / "b.md", "beta, edited")
+    bump_mtime(vault / "b.md")
+    (vault / "c.md").unlink()
+    write(vault / "d.md", "delta")
+    sync()
+    assert sorted(collection.upserted) == ["b", "d"]
+    assert sorted(collection.docs) == ["a", "b", "d"]
+    assert collection.docs["b"][0] == "beta, edited"
+
+
+def test_ingest_streams_batches_and_skips_failures(tmp_path):
+    from tap.database.chroma.ingest import ingest
+
+    vault = tmp_path / "vault"
+    for i in range(10):
+        write(vault / f"n{i}.md", f"note {i}")
+    (vault / "n3.md").write_bytes(b"\xff\xfe not utf-8")
+    catalog = VaultCatalog.load(vault, tmp_path / "catalog.json")
+    entries = catalog.unique_entries()
+    collection = FakeCollection()
+    embedded: list[list[str]] = []
+
+    def embed(texts):
+        embedded.append(texts)
+        if "note 5" in texts:
+            raise RuntimeError("model fell over")
+        return [[1.0] for _ in texts]
+
+    progress = []
+    stats = asyncio.run(
+        ingest(
+            collection,
+            catalog,
+            entries,
+            {"n0": hash_bytes(b"note 0"), "n1": "stale"},
+            embed,
+            batch_size=3,
+            progress=lambda s: progress.append(s.processed),
+        )
+    )
+    # Batches of 3; n0 is already current, and the batch holding n5 fails as
+    # a whole while the rest carry on
+    assert [len(texts) for texts in embedded] == [2, 2, 3, 1]
+    assert stats.unchanged == 1
+    assert sorted(stats.failed) == ["n3", "n4", "n5"]
+    assert sorted(collection.docs) == ["n1", "n2", "n6", "n7", "n8", "n9"]
+    assert stats.upserted == 6
+    assert progress == [3, 6, 9, 10]
+    # Hashes read along the way were recorded and saved
+    assert catalog.entries["n2.md"].hash is not None
+    assert not catalog.dirty
+
+
+def test_full_rebuild_resumes_and_clears_marker(chroma_env):
+    vault, sync = chroma_env
+    write(vault / "a.md", "alpha")
+    write(vault / "b.md", "beta")
+    collection = sync()
+    marker = chroma.ingest_marker(chroma.COLLECTION_NAME)
+
+    # An interrupted --full leaves the marker: the next --full resumes into
+    # the existing collection instead of dropping it again
+    marker.touch()
+    collection.upserted.clear()
+    assert sync(full=True) is collection
+    assert collection.upserted == []
+    assert not marker.exists()
+
+    # A note that can't be read doesn't pin the marker
+    (vault / "c.md").write_bytes(b"\xff\xfe not utf-8")
+    collection = sync(full=True)
+    assert sorted(collection.docs) == ["a", "b"]
+    assert not marker.exists()
+    assert sync(full=True) is not collection
@@ -0,0 +1,36 @@
+from helpers import bump_mtime, write
+from tap.database.local.link_graph import LinkGraph, sync_link_graph
+from tap.database.obsidian.catalog import VaultCatalog
+
+
+def test_link_graph_traversal_and_incremental_sync(tmp_path):
+    vault = tmp_path / "vault"
+    write(vault / "Hub.md", "See [[Alpha]], [[projects/Beta|the beta]] and [[Hub]].")
+    write(vault / "Alpha.md", "Back to [[hub#Intro]]. Missing: [[Nowhere]].")
+    write(vault / "projects" / "Beta.md", "Depends on ![[Gamma.md]].")
+    write(vault / "Gamma.md", "Leaf.")
+    store = tmp_path / "cache"
+    store.mkdir()
+    catalog = VaultCatalog.load(vault, store / "catalog.json")
+
+    graph = sync_link_graph(catalog, store)
+    assert sorted(graph.links("Hub")) == ["Alpha", "Beta"]
+    assert sorted(graph.backlinks("Hub")) == ["Alpha"]
+    assert graph.backlinks("Gamma") == ["Beta"]
+    assert graph.expand("Hub", hops=1) == [("Hub", 0), ("Alpha", 1), ("Beta", 1)]
+    assert ("Gamma", 2) in graph.expand("Hub", hops=2)
+    assert graph.expand("Gamma", hops=3, reverse=True)[-1] == ("Alpha", 3)
+    assert len(graph.expand("Hub", hops=5, limit=2)) == 2
+
+    # Unchanged catalog: loaded from disk, not rebuilt
+    key = {"root": str(catalog.root), "digest": catalog.digest()}
+    assert LinkGraph.load(key, store).links("Beta") == ["Gamma"]
+
+    path = vault / "Gamma.md"
+    path.write_text("Now links [[Alpha]].", encoding="utf-8")
+    bump_mtime(path)
+    catalog.refresh(deep=True)
+
+    graph = sync_link_graph(catalog, store)
+    assert graph.links("Gamma") == ["Alpha"]
+    assert sorted(graph.backlinks("Alpha")) == ["Gamma", "Hub"]
@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+from helpers import write
+from tap.database.local.metadata_index import (
+    MetadataIndex,
+    context_window,
+    parse_age,
+    sync_metadata_index,
+)
+from tap.database.obsidian.catalog import VaultCatalog
+from tap.database.obsidian.parser import extract_tags, parse_note
+
+DAY = 86_400
+
+
+def _write(path, text, age_days=0.0):
+    write(path, text)
+    mtime = time.time() - age_days * DAY
+    os.utime(path, (mtime, mtime))
+
+
+def test_extract_tags_from_frontmatter_and_body():
+    content = "---\ntags: [Work, career]\n---\n# Title\n#work/meetings, #2024 #todo"
+    note = parse_note("Note", content)
+    assert extract_tags(content, note.frontmatter) == [
+        "work",
+        "career",
+        "work/meetings",
+        "todo",
+    ]
+    assert extract_tags("tag: solo", {"tag": "a, b c"}) == ["a", "b", "c"]
+
+
+def test_parse_age_and_context_window():
+    assert parse_age("7d") == 7 * DAY
+    assert parse_age("12h") == 12 * 3600
+    with pytest.raises(ValueError):
+        parse_age("soon")
+    window = context_window("2024-03-15")
+    assert window["until"] - window["since"] == 3 * DAY
+
+
+def test_metadata_filters_and_incremental_sync(tmp_path):
+    vault = tmp_path / "vault"
+    _write(vault / "Fresh.md", "#work today", age_days=0.1)
+    _write(vault / "Side.md", "#work-life balance", age_days=100)
+    _write(vault / "Week.md", "---\nstatus: draft\n---\n#work/meetings", age_days=3)
+    _write(vault / "Old.md", "---\ntags: personal\n---\nold", age_days=40)
+    store = tmp_path / "cache"
+    store.mkdir()
+    catalog = VaultCatalog.load(vault, store / "catalog.json")
+    titles = [entry.stem for entry in catalog.unique_entries()]
+
+    index = sync_metadata_index(catalog, store)
+    now = time.time()
+
+    def names(ids):
+        return [titles[i] for i in ids]
+
+    assert names(index.select()) == ["Fresh", "Week", "Old", "Side"]
+    assert names(index.select(since=now - 7 * DAY)) == ["Fresh", "Week"]
+    assert names(index.select(tags=["work"])) == ["Fresh", "Week"]
+    assert names(index.select(tags=["#Work/meetings"])) == ["Week"]
+    assert names(index.select(since=now - DAY, tags=["work"])) == ["Fresh"]
+    assert names(index.select(keys=["status"])) == ["Week"]
+    assert names(index.select(until=now - 10 * DAY)) == ["Old", "Side"]
+
+    # Unchanged catalog: loaded from disk with the same columns
+    key = {"root": str(catalog.root), "digest": catalog.digest()}
+    loaded = MetadataIndex.load(key, store)
+    assert loaded is not None
+    assert loaded.mtime == index.mtime and loaded.tags == index.tags
+
+    _write(vault / "Old.md", "now #work too", age_days=0)
+    catalog.refresh(deep=True)
+    index = sync_metadata_index(catalog, store)
+    assert names(index.select(tags=["work"]))[0] == "Old"
+    assert index.select(tags=["personal"]) == []
+
+
+@pytest.mark.parametrize("flag", [["-g", "1"], ["-l"], ["query", "--passages"]])
+def test_filters_are_rejected_where_they_cannot_apply(flag, monkeypatch, capsys):
+    pytest.importorskip("rich")
+    import sys
+
+    from tap.cli.main import main
+
+    def unexpected_call(op, **params):
+        raise AssertionError(f"{op} would ignore the filters")
+
+    monkeypatch.setattr("tap.cli.commands.search.call", unexpected_call)
+    monkeypatch.setattr(sys, "argv", ["tap", *flag, "--tag", "work"])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 1
+    assert "can't be combined" in capsys.readouterr().err
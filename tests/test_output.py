@@ -0,0 +1,73 @@
+from tap.cli.output import read_located, stream_notes, xml_tag
+
+
+def test_xml_tag():
+    assert xml_tag("Mental Health Context") == "mental-health-context"
+    assert xml_tag("Sales Strategy FY26") == "sales-strategy-fy26"
+    assert xml_tag("2025-01-06") == "note-2025-01-06"
+    assert xml_tag("???") == "note"
+
+
+def test_stream_notes_reads_in_order(tmp_path, capsys):
+    located = []
+    for i in range(100):
+        path = tmp_path / f"2025-01-{i:03d}.md"
+        path.write_text(f"day {i}", encoding="utf-8")
+        located.append((path.stem, str(path)))
+    located.append(("missing", str(tmp_path / "missing.md")))
+
+    assert stream_notes(read_located(located), raw=True) == 100
+    out = capsys.readouterr().out
+    assert out.startswith("<note-2025-01-000>\nday 0\n</note-2025-01-000>\n")
+    positions = [out.index(f"\nday {i}\n") for i in range(100)]
+    assert positions == sorted(positions)
+
+
+def test_only_bulk_reads_open_the_snapshot(tmp_path, monkeypatch):
+    from tap.cli.output import SNAPSHOT_MIN_READS
+    from tap.database.local import snapshot
+
+    opened = []
+    monkeypatch.setattr(snapshot, "open_snapshot", lambda root: opened.append(root))
+    monkeypatch.setenv("OBSIDIAN_PATH", str(tmp_path))
+    located = []
+    for i in range(SNAPSHOT_MIN_READS):
+        path = tmp_path / f"{i}.md"
+        path.write_text(f"note {i}", encoding="utf-8")
+        located.append((path.stem, str(path)))
+
+    assert len(list(read_located(located[:3]))) == 3
+    assert opened == []
+    assert len(list(read_located(located))) == SNAPSHOT_MIN_READS
+    assert opened == [tmp_path]
+
+
+def test_drain_keeps_notes_lost_to_a_closed_pipe(tmp_path, monkeypatch):
+    import io
+
+    from tap.cli import output
+    from tap.cli.commands import pool
+    from tap.storage.state import StateStore
+
+    class ClosingStdout(io.StringIO):
+        # Like `tap pool drain | head -c 100`: the reader goes away mid-stream
+        def flush(self):
+            if self.tell() > 100:
+                raise BrokenPipeError
+
+    store = StateStore(tmp_path / "state.sqlite")
+    paths = {}
+    for title in ["One", "Two", "Three"]:
+        paths[title] = tmp_path / f"{title}.md"
+        paths[title].write_text(title.lower() * 20, encoding="utf-8")
+        store.pool_add(title)
+    monkeypatch.setattr(pool, "get_state", lambda: store)
+    monkeypatch.setattr(
+        "tap.daemon.client.call",
+        lambda op, titles: [(title, str(paths[title])) for title in titles],
+    )
+    monkeypatch.setattr(output, "discard_stdout", lambda: None)
+    monkeypatch.setattr("sys.stdout", ClosingStdout())
+
+    pool.handle_pool_drain(raw=True)
+    assert store.pool_titles() == ["Two", "Three"]
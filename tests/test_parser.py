@@ -0,0 +1,33 @@
+from tap.database.obsidian.parser import WikiLink, parse_note
+
+NOTE = """---
+tags: [work, "career"]
+aliases:
+  - LinkedIn
+status: draft
+---
+See [[Project Alpha]] and [[People/John Doe#Contact|John]] on one line.
+![[diagram.png]] plus https://example.com/a?b=1, and (https://example.org).
+"""
+
+
+def test_parse_note_extracts_all_links_and_frontmatter():
+    note = parse_note("Example", NOTE)
+
+    assert note.wiki_links == [
+        WikiLink("Project Alpha"),
+        WikiLink("People/John Doe", "Contact", "John"),
+        WikiLink("diagram.png", embed=True),
+    ]
+    assert note.links == ["https://example.com/a?b=1", "https://example.org"]
+    assert note.frontmatter == {
+        "tags": ["work", "career"],
+        "aliases": ["LinkedIn"],
+        "status": "draft",
+    }
+
+
+def test_parse_note_without_frontmatter():
+    note = parse_note("Plain", "no links here\n---\nstill: body")
+    assert note.frontmatter == {}
+    assert note.wiki_links == []
@@ -0,0 +1,37 @@
+import os
+import threading
+
+from tap.cli.pipe import _read_write, copy_fd
+
+DATA = os.urandom(300_000)
+
+
+def _drain(fd, sink):
+    with os.fdopen(fd, "rb") as f:
+        sink.append(f.read())
+
+
+def _copy_into_pipe(src, copy):
+    read_end, write_end = os.pipe()
+    sink = []
+    reader = threading.Thread(target=_drain, args=(read_end, sink))
+    reader.start()
+    copied = copy(src, write_end, 4096)
+    os.close(write_end)
+    reader.join()
+    return copied, sink[0]
+
+
+def test_copy_fd_from_file_and_pipe(tmp_path):
+    path = tmp_path / "input.bin"
+    path.write_bytes(DATA)
+
+    with open(path, "rb") as f:
+        assert _copy_into_pipe(f.fileno(), copy_fd) == (len(DATA), DATA)
+    with open(path, "rb") as f:
+        assert _copy_into_pipe(f.fileno(), _read_write) == (len(DATA), DATA)
+
+    # File to file: neither end is a pipe, so splice can't be used
+    with open(path, "rb") as src, open(tmp_path / "out.bin", "wb") as dst:
+        assert copy_fd(src.fileno(), dst.fileno()) == len(DATA)
+    assert (tmp_path / "out.bin").read_bytes() == DATA
@@ -0,0 +1,66 @@
+import pytest
+
+from helpers import write
+from tap.database.obsidian.catalog import VaultCatalog, hash_bytes
+from tap.database.obsidian.reader import iter_note_files, read_note_files
+
+
+def test_read_note_files_keeps_order_and_skips_unreadable(tmp_path):
+    paths = []
+    for i in range(40):
+        path = tmp_path / f"note{i}.md"
+        write(path, f"note {i}")
+        paths.append(path)
+    paths.insert(7, tmp_path / "missing.md")
+
+    note_files = read_note_files(paths, max_workers=4)
+    assert note_files[7] is None
+    read = [n for n in note_files if n is not None]
+    assert [n.path for n in read] == [p for p in paths if p.name != "missing.md"]
+    first = read[0]
+    assert first.content == "note 0"
+    assert first.digest == hash_bytes(b"note 0")
+    assert first.size == len(b"note 0")
+    assert first.updated_at == pytest.approx(paths[0].stat().st_mtime)
+
+    # Serial and streamed reads agree with the pooled one
+    assert [n and n.digest for n in iter_note_files(paths, max_workers=1)] == [
+        n and n.digest for n in note_files
+    ]
+
+
+def test_record_hash_saves_the_read_digest(tmp_path):
+    vault = tmp_path / "vault"
+    write(vault / "a.md", "alpha")
+    store = tmp_path / "catalog.json"
+    catalog = VaultCatalog.load(vault, store)
+    assert catalog.entries["a.md"].hash is None
+
+    (note_file,) = read_note_files([vault / "a.md"])
+    catalog.record_hash("a.md", note_file.digest)
+    catalog.record_hash("gone.md", note_file.digest)  # Unknown notes are ignored
+    assert catalog.dirty
+    catalog.save()
+
+    # The hash is reused rather than recomputed from the file
+    reloaded = VaultCatalog.load(vault, store)
+    assert reloaded.entries["a.md"].hash == note_file.digest
+    assert reloaded.content_hash("a.md") == hash_bytes(b"alpha")
+
+
+def test_obsidian_note_from_note_file(tmp_path):
+    pytest.importorskip("pydantic")
+    from tap.database.obsidian.obsidian_note import ObsidianNote
+
+    path = tmp_path / "Project.md"
+    write(path, "---\ntags: [work]\n---\nSee [[Alpha|the alpha]] and #todo.\n")
+    (note_file,) = read_note_files([path])
+
+    note = ObsidianNote.from_note_file(note_file)
+    assert note.title == "Project"
+    assert note.content == note_file.content
+    assert note.wiki_links == ["Alpha"]
+    assert note.frontmatter == {"tags": ["work"]}
+    assert note.tags == ["work", "todo"]
+    assert note.updated_at == note_file.updated_at
+    assert ObsidianNote.from_file(path) == note
@@ -0,0 +1,62 @@
+from tap.query import result_cache
+from tap.query.result_cache import ResultCache
+
+
+def test_results_are_reused_until_the_stamp_moves(tmp_path):
+    cache = ResultCache(tmp_path / "results.sqlite")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return [["Alpha", 90.0, 0]]
+
+    assert cache.cached("fuzzy", "alp", 5, "vault:1", compute) == [["Alpha", 90.0, 0]]
+    assert cache.cached("fuzzy", "alp", 5, "vault:1", compute) == [["Alpha", 90.0, 0]]
+    assert len(calls) == 1 and cache.hits == 1
+    # Different limit or mode: separate entries
+    cache.cached("fuzzy", "alp", 10, "vault:1", compute)
+    cache.cached("vector", "alp", 5, "vault:1", compute)
+    assert len(calls) == 3
+    # The catalog moved on: recomputed and replaced
+    cache.cached("fuzzy", "alp", 5, "vault:2", compute)
+    assert len(calls) == 4 and len(cache) == 3
+
+    cache.invalidate("vector")
+    assert cache.get("vector", "alp", 5, "vault:1") is None
+    assert cache.get("fuzzy", "alp", 5, "vault:2") is not None
+
+
+def test_cached_many_computes_only_misses(tmp_path):
+    cache = ResultCache(tmp_path / "results.sqlite", max_entries=2)
+    seen = []
+
+    def compute(queries):
+        seen.append(queries)
+        return [[[q.upper(), 1.0]] for q in queries]
+
+    assert cache.cached_many("vector", ["a", "b"], 5, "s", compute) == [
+        [["A", 1.0]],
+        [["B", 1.0]],
+    ]
+    cache.cached_many("vector", ["b", "c", "b"], 5, "s", compute)
+    assert seen == [["a", "b"], ["c"]]
+    assert len(cache) == 2  # Least recently used ("a") evicted
+
+
+def test_hits_only_write_when_recency_is_stale(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path / "results.sqlite")
+    cache.put("vector:local", "q", 5, "s", [["A", 0.1]])
+    writes = cache.conn.total_changes
+    for _ in range(10):
+        assert cache.get("vector:local", "q", 5, "s") == [["A", 0.1]]
+    assert cache.conn.total_changes == writes
+
+    monkeypatch.setattr(result_cache.time, "time", lambda: 2e10)
+    cache.get("vector:local", "q", 5, "s")
+    assert cache.conn.total_changes == writes + 1
+
+    # Dropping "vector" drops every backend's vector rows
+    cache.put("vector:chroma", "q", 5, "s", [["B", 0.2]])
+    cache.put("fuzzy", "q", 5, "s", [["C", 90.0, 0]])
+    cache.invalidate("vector")
+    assert len(cache) == 1 and cache.get("fuzzy", "q", 5, "s") is not None
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+
+import pytest
+
+from helpers import bump_mtime, write
+
+# The service reads through vault.py, which needs typing.override (3.12+)
+pytest.importorskip("tap.database.obsidian.vault", exc_type=ImportError)
+pytest.importorskip("rapidfuzz")
+
+from tap.database.local import metadata_index  # noqa: E402
+from tap.database.local.metadata_index import recent_window  # noqa: E402
+from tap.services import search_service  # noqa: E402
+from tap.services.search_service import SearchService  # noqa: E402
+
+
+@pytest.fixture
+def vault(tmp_path, monkeypatch):
+    monkeypatch.setenv("TAP_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "vault"
+    write(root / "Alpha.md", "---\ntags: [work]\n---\nalpha beta")
+    write(root / "Beta.md", "beta gamma #work")
+    write(root / "Gamma.md", "gamma delta")
+    monkeypatch.setenv("OBSIDIAN_PATH", str(root))
+    return root
+
+
+def _edit_in_place(path, text):
+    # Appending doesn't touch the directory's mtime
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+    bump_mtime(path)
+
+
+@pytest.fixture
+def long_lived(monkeypatch):
+    # A daemon's service, re-checking the vault on every request
+    monkeypatch.setattr(search_service, "REFRESH_INTERVAL", 0)
+    return SearchService()
+
+
+def test_content_search_sees_in_place_edits(vault, long_lived):
+    def found(service):
+        return sorted(title for title, _, _ in service.content_search("quokka"))
+
+    assert found(long_lived) == []
+    # A fresh process (the CLI without a daemon)
+    _edit_in_place(vault / "Gamma.md", "\na quokka appears")
+    assert found(SearchService()) == ["Gamma"]
+    # The daemon's service
+    _edit_in_place(vault / "Beta.md", "\nanother quokka")
+    assert found(long_lived) == ["Beta", "Gamma"]
+
+
+def test_link_graph_sees_in_place_edits(vault, long_lived):
+    def linked(service, title, reverse=False):
+        return [name for name, _, _ in service.network(title, reverse=reverse)]
+
+    assert linked(long_lived, "Alpha", reverse=True) == ["Alpha"]
+    _edit_in_place(vault / "Gamma.md", "\nsee [[Alpha]]")
+    assert linked(SearchService(), "Gamma") == ["Gamma", "Alpha"]
+    _edit_in_place(vault / "Beta.md", "\nsee [[Alpha]]")
+    assert sorted(linked(long_lived, "Alpha", reverse=True)) == [
+        "Alpha",
+        "Beta",
+        "Gamma",
+    ]
+
+
+def test_metadata_filters_see_in_place_edits(vault, long_lived):
+    month_ago = time.time() - 30 * 86_400
+    for path in vault.iterdir():
+        os.utime(path, (month_ago, month_ago))
+
+    def recent(service):
+        return [title for title, _, _ in service.filter_notes(recent_window("1d"))]
+
+    assert recent(long_lived) == []
+    _edit_in_place(vault / "Gamma.md", "\ntouched")
+    assert recent(SearchService()) == ["Gamma"]
+    _edit_in_place(vault / "Beta.md", "\ntouched")
+    assert sorted(recent(long_lived)) == ["Beta", "Gamma"]
+
+
+def test_concurrent_requests_build_each_index_once(vault, monkeypatch):
+    builds = []
+    sync = metadata_index.sync_metadata_index
+
+    def counting_sync(catalog, directory=None):
+        builds.append(threading.get_ident())
+        return sync(catalog, directory)
+
+    monkeypatch.setattr(metadata_index, "sync_metadata_index", counting_sync)
+    service = SearchService()
+    service.vault  # Loaded once; the indexes are what's raced
+    filters = {"tags": ["work"]}
+    results, errors = [], []
+
+    def request(i):
+        try:
+            if i % 2:
+                hits = service.search("beta", 5, filters=filters)
+            else:
+                hits = service.content_search("beta", 5, filters)
+            results.append(sorted(title for title, _, _ in hits))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(builds) == 1
+    assert all(titles == ["Alpha", "Beta"] for titles in results)
+
+
+def test_exact_search_respects_filters(vault):
+    service = SearchService()
+    assert service.search("Gamma", exact=True) == [("Gamma", 100, 2)]
+    assert service.search("Gamma", exact=True, filters={"tags": ["work"]}) == []
+    assert service.search("Missing", exact=True) == []
+
+
+def test_hybrid_search_on_a_cold_cache(vault, monkeypatch):
+    # The fuzzy and content retrievers race to build the shared indexes
+    service = SearchService()
+    monkeypatch.setattr(service, "vector_search", lambda query, n, filters: [])
+    timeouts = {"fuzzy": 10.0, "content": 10.0}
+    hits = service.hybrid_search("beta", 5, timeouts, {"tags": ["work"]})
+    assert sorted(title for title, _, _ in hits) == ["Alpha", "Beta"]
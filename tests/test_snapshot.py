@@ -0,0 +1,56 @@
+import os
+
+from helpers import write
+from tap.database.local.snapshot import (
+    VaultSnapshot,
+    build_snapshot,
+    read_catalog_files,
+    snapshot_file,
+)
+from tap.database.obsidian.catalog import VaultCatalog
+
+
+def test_snapshot_serves_fresh_notes_and_falls_back_to_disk(tmp_path):
+    vault = tmp_path / "vault"
+    write(vault / "Alpha.md", "alpha ✓")
+    write(vault / "notes" / "Beta.md", "beta")
+    catalog = VaultCatalog.load(vault, tmp_path / "catalog.json")
+    path = tmp_path / "snapshot.bin"
+
+    count, written = build_snapshot(catalog, path)
+    assert count == 2 and written == path.stat().st_size
+    snapshot = VaultSnapshot.open(path)
+    assert snapshot is not None and snapshot.root == vault
+    note = snapshot.note_file("Alpha.md")
+    assert note.content == "alpha ✓"
+    assert note.digest == catalog.entries["Alpha.md"].hash
+
+    beta = vault / "notes" / "Beta.md"
+    beta.write_text("beta, edited", encoding="utf-8")
+    st = os.stat(beta)
+    os.utime(beta, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert snapshot.read_stat(beta) is None
+    notes = snapshot.read_fresh([vault / "Alpha.md", beta])
+    assert [n.content for n in notes] == ["alpha ✓", "beta, edited"]
+
+    path.write_bytes(b"not a snapshot")
+    assert VaultSnapshot.open(path) is None
+
+
+def test_in_place_edit_is_never_served_stale(tmp_path, monkeypatch):
+    monkeypatch.setenv("TAP_CACHE_DIR", str(tmp_path / "cache"))
+    vault = tmp_path / "vault"
+    write(vault / "Alpha.md", "alpha")
+    catalog = VaultCatalog.load(vault, tmp_path / "catalog.json")
+    build_snapshot(catalog, snapshot_file())
+
+    # Edited after the catalog's last deep refresh: its entry still matches
+    # the snapshot, the file doesn't
+    alpha = vault / "Alpha.md"
+    alpha.write_text("ALPHA", encoding="utf-8")
+    st = os.stat(alpha)
+    os.utime(alpha, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    catalog.refresh()
+    assert catalog.entries["Alpha.md"].mtime_ns != os.stat(alpha).st_mtime_ns
+    (note,) = read_catalog_files(catalog, catalog.unique_entries())
+    assert note.content == "ALPHA"
@@ -0,0 +1,93 @@
+"""
+CLI startup budget: `tap "query"` should only import what the search path
+needs, and parsing + routing setup should stay well under the interpreter's
+own startup cost.
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+HEAVY_MODULES = (
+    "rich",
+    "rapidfuzz",
+    "pydantic",
+    "chromadb",
+    "sentence_transformers",
+    "torch",
+    "numpy",
+    "dbclients",
+)
+# Seconds allowed on top of a bare `python -c pass`
+STARTUP_BUDGET = 0.15
+
+IMPORT_CLI = """
+import sys
+from tap.cli.parser import parse_args
+args, parser = parse_args(["some query", "-L", "3"])
+import tap.cli.router, tap.cli.commands.search
+"""
+
+
+def _run(code: str) -> tuple[float, str]:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={"PYTHONPATH": str(SRC), "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    return time.perf_counter() - start, result.stdout
+
+
+def test_cli_import_does_not_load_heavy_modules():
+    _, stdout = _run(
+        IMPORT_CLI
+        + f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert stdout.strip() == ""
+
+
+def test_cli_startup_budget():
+    baseline = min(_run("pass")[0] for _ in range(3))
+    elapsed = min(_run(IMPORT_CLI)[0] for _ in range(3))
+    assert elapsed - baseline < STARTUP_BUDGET
+
+
+def test_alias_fast_path_skips_vault(tmp_path):
+    note = tmp_path / "LinkedIn Professional Context.md"
+    note.write_text("Ten years of platform work.", encoding="utf-8")
+    setup = f"""
+from tap.storage.state import StateStore
+StateStore().set_alias("linkedin", {note.stem!r}, {str(note)!r})
+"""
+    code = """
+import sys
+from tap.cli.main import main
+sys.argv = ["tap", "-a", "linkedin"]
+main()
+loaded = (
+    "tap.database.obsidian.vault",
+    "tap.query.fuzzy",
+    "tap.services.search_service",
+)
+print(",".join(m for m in loaded + %r if m in sys.modules))
+""" % (HEAVY_MODULES,)
+    env = {
+        "PYTHONPATH": str(SRC),
+        "TAP_CACHE_DIR": str(tmp_path / "cache"),
+        "TAP_DATA_DIR": str(tmp_path / "data"),
+        "XDG_CONFIG_HOME": str(tmp_path / "config"),
+        "TAP_NO_DAEMON": "1",
+    }
+    subprocess.run([sys.executable, "-c", setup], env=env, check=True)
+    result = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == (
+        "<linkedin>\nTen years of platform work.\n</linkedin>\n\n"
+    )
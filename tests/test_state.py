@@ -0,0 +1,95 @@
+import json
+import shutil
+import threading
+
+from tap.storage.state import StateStore
+
+
+def test_state_store_migrates_and_updates_atomically(tmp_path, monkeypatch):
+    monkeypatch.setenv("TAP_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "cache" / "matches.json").write_text(json.dumps([["a", 90, 0]]))
+    (tmp_path / "cache" / "pool.json").write_text(json.dumps(["a", "b"]))
+    legacy = tmp_path / "config" / "contex" / "aliases.json"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_text(
+        json.dumps({"linkedin": {"file": "LinkedIn.md", "tag": "li", "use_count": 47}})
+    )
+
+    store = StateStore(tmp_path / "state.sqlite")
+    assert store.get_matches() == [("a", 90.0, 0)]
+    assert store.pool_titles() == ["a", "b"]
+    assert store.get_alias("linkedin").title == "LinkedIn"
+
+    # Imported once only
+    store.pool_clear()
+    assert StateStore(tmp_path / "state.sqlite").pool_titles() == []
+
+    def use():
+        StateStore(tmp_path / "state.sqlite").record_alias_use("linkedin")
+
+    threads = [threading.Thread(target=use) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get_alias("linkedin").use_count == 67
+
+    store.pool_add("x")
+    store.pool_add("y")
+    assert not store.pool_add("x")
+    assert store.pool_remove(1) == "x"
+    assert store.pool_titles() == ["y"]
+
+
+def test_state_outlives_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("TAP_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("TAP_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    legacy = tmp_path / "config" / "tap" / "aliases.json"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_text(
+        json.dumps(
+            {
+                "bad": ["not", "a", "record"],
+                "nofile": {"tag": "x"},
+                "odd": {"file": "Odd.md", "use_count": "many", "last_used": 5},
+            }
+        )
+    )
+
+    store = StateStore()
+    assert store.path == tmp_path / "data" / "state.sqlite"
+    store.pool_add("kept")
+    assert store.get_alias("odd").use_count == 0
+    assert store.get_alias("bad") is None and store.get_alias("nofile") is None
+    store.conn.close()
+
+    shutil.rmtree(tmp_path / "cache", ignore_errors=True)
+    store = StateStore()
+    assert store.pool_titles() == ["kept"]
+    assert store.get_alias("odd").title == "Odd"
+
+
+def test_atomic_writes_from_threads_do_not_collide(tmp_path):
+    from tap.storage.config import atomic_write_json
+
+    path = tmp_path / "shared.json"
+    errors = []
+
+    def write(i):
+        try:
+            for _ in range(50):
+                atomic_write_json(path, {"writer": i})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert json.loads(path.read_text())["writer"] in range(8)
+    assert [p.name for p in tmp_path.iterdir()] == ["shared.json"]
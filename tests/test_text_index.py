@@ -0,0 +1,45 @@
+import os
+
+from helpers import write
+from tap.database.local.text_index import TextIndex, match_expression
+from tap.database.obsidian.catalog import VaultCatalog
+
+
+def test_match_expression_quotes_terms_and_phrases():
+    assert match_expression('burnout "weekly review"') == (
+        '"weekly review" AND ("burnout")'
+    )
+    assert match_expression("a NEAR* b", operator="OR") == '("a" OR "NEAR" OR "b")'
+    assert match_expression('""') is None
+
+
+def test_text_index_ranks_and_syncs_incrementally(tmp_path):
+    vault = tmp_path / "vault"
+    write(vault / "review.md", "Notes from the weekly review. Reviewing goals.")
+    write(vault / "journal" / "monday.md", "Felt burnout; skipped the review.")
+    write(vault / "recipes.md", "Soup with lentils.")
+    catalog = VaultCatalog.load(vault, tmp_path / "catalog.json")
+    index = TextIndex(tmp_path / "fulltext.sqlite")
+
+    assert index.sync(catalog) == 3
+    assert index.sync(catalog) == 0
+    assert [t for t, _, _ in index.search("review")][0] == "review"
+    assert [t for t, _, _ in index.search('"weekly review"')] == ["review"]
+    # No note has both terms, so any term matches
+    assert {t for t, _, _ in index.search("lentils burnout")} == {
+        "recipes",
+        "monday",
+    }
+
+    # Edit in place and delete a note
+    path = vault / "recipes.md"
+    path.write_text("Lentil soup, then a weekly review.", encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    (vault / "journal" / "monday.md").unlink()
+    catalog.refresh(deep=True)
+
+    assert index.sync(catalog) == 2
+    assert len(index) == 2
+    assert {t for t, _, _ in index.search('"weekly review"')} == {"review", "recipes"}
+    assert index.search("burnout") == []
@@ -0,0 +1,45 @@
+import pytest
+
+from helpers import write
+
+# vault.py needs typing.override (Python 3.12+)
+vault_module = pytest.importorskip("tap.database.obsidian.vault", exc_type=ImportError)
+
+
+@pytest.fixture
+def vault(tmp_path, monkeypatch):
+    monkeypatch.setenv("TAP_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "vault"
+    for date in ["2025-01-01", "2025-01-03", "2025-01-05", "2025-02-01"]:
+        write(root / "daily" / f"{date}.md", f"day {date}")
+    write(root / "Project Plan.md", "plan")
+    write(root / "archive" / "Project Plan.md", "older plan")
+    write(root / "2025-01-04 meeting.md", "not a daily note")
+    monkeypatch.setenv("OBSIDIAN_PATH", str(root))
+    return vault_module.Vault()
+
+
+def test_titles_resolve_to_the_first_path(vault):
+    assert vault.get_path_by_title("Project Plan") == (
+        vault.obsidian_path / "Project Plan.md"
+    )
+    assert vault.get_path_by_title("2025-01-03").name == "2025-01-03.md"
+    assert vault.get_path_by_title("Missing") is None
+
+
+def test_daily_note_range_bounds_are_inclusive(vault):
+    def dates(start, end):
+        paths = vault.get_daily_note_paths_in_date_range(start, end)
+        return [path.stem for path in paths]
+
+    assert dates("2025-01-01", "2025-01-05") == [
+        "2025-01-01",
+        "2025-01-03",
+        "2025-01-05",
+    ]
+    assert dates("2025-01-02", "2025-01-04") == ["2025-01-03"]
+    assert dates("2025-01-05", "2025-01-05") == ["2025-01-05"]
+    assert dates("2025-01-06", "2025-01-31") == []
+    assert dates("2024-01-01", "2024-12-31") == []
+    with pytest.raises(ValueError):
+        vault.get_daily_note_paths_in_date_range("2025-13-01", "2025-12-31")
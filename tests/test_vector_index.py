@@ -0,0 +1,130 @@
+import types
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from helpers import bump_mtime, write  # noqa: E402
+from tap.database.local import vector_index  # noqa: E402
+from tap.database.local.vector_index import (  # noqa: E402
+    CHUNK_INDEX_NAME,
+    LocalVectorIndex,
+    sync_local_index,
+)
+from tap.database.obsidian.catalog import VaultCatalog  # noqa: E402
+from tap.query.backends import LocalBackend  # noqa: E402
+from tap.query.embedding_cache import get_query_cache  # noqa: E402
+
+
+def letter_embed(texts, model_name=None):
+    """
+    Unit-normalised letter counts: similar spellings are near each other.
+    """
+    rows = np.zeros((len(texts), 26), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for ch in text.lower():
+            if "a" <= ch <= "z":
+                rows[i, ord(ch) - 97] += 1
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    return rows / np.where(norms == 0, 1, norms)
+
+
+@pytest.fixture
+def vault_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("TAP_CACHE_DIR", str(tmp_path / "cache"))
+    get_query_cache.cache_clear()
+    embedded: list[str] = []
+
+    def embed(texts, model_name=None):
+        embedded.extend(texts)
+        return letter_embed(texts)
+
+    monkeypatch.setattr(vector_index, "embed", embed)
+    vault = tmp_path / "vault"
+    write(vault / "apples.md", "apples apples apples")
+    write(vault / "zebra.md", "zebra zoo zigzag")
+    write(vault / "long.md", "# Intro\nkiwi kiwi\n\n# Later\nquartz quiz")
+
+    def sync(**kwargs) -> LocalVectorIndex:
+        handle = types.SimpleNamespace(
+            catalog=VaultCatalog.load(vault, tmp_path / "catalog.json")
+        )
+        return sync_local_index(handle, **kwargs)
+
+    return vault, sync, embedded
+
+
+def test_local_index_searches_and_syncs_incrementally(vault_env):
+    vault, sync, embedded = vault_env
+    index = sync()
+    assert sorted(index.ids) == ["apples", "long", "zebra"]
+    assert len(embedded) == 3
+
+    (hits,) = index.search(["apple"], limit=2)
+    assert hits[0][0] == "apples"
+    # Cosine distances: 0 for identical directions, at most 2
+    assert 0 <= hits[0][1] < hits[1][1] <= 2
+
+    # Only the edited note is re-embedded
+    embedded.clear()
+    write(vault / "zebra.md", "apples and zebras")
+    bump_mtime(vault / "zebra.md")
+    index = sync()
+    assert embedded == ["apples and zebras"]
+    assert len(index.ids) == 3
+
+
+def test_reader_keeps_a_consistent_matrix_across_syncs(vault_env):
+    vault, sync, _ = vault_env
+    before = sync()
+    write(vault / "new.md", "brand new note")
+    after = sync()
+
+    # Each sync publishes a new matrix; a reader mapped before it still has
+    # ids and rows from one and the same sync
+    assert after.version != before.version
+    assert before.matrix.shape[0] == len(before.ids) == 3
+    assert LocalVectorIndex.load().ids == after.ids
+    old_matrix, _ = LocalVectorIndex.paths(version=before.version)
+    assert not old_matrix.exists()
+
+    # A sidecar naming a matrix that isn't there is not a usable index
+    meta_path = LocalVectorIndex.paths()[1]
+    meta_path.write_text(meta_path.read_text().replace(after.version, "gone"))
+    assert LocalVectorIndex.load() is None
+
+
+def test_chunk_index_rows_belong_to_notes(vault_env):
+    _, sync, _ = vault_env
+    chunks = sync(chunks=True)
+    assert LocalVectorIndex.exists(CHUNK_INDEX_NAME)
+    rows = [i for i, note in enumerate(chunks.notes) if note == "long"]
+    assert [chunks.headings[i] for i in rows] == ["Intro", "Later"]
+    (hits,) = chunks.nearest(chunks.embed_queries(["quiz"]), limit=1)
+    assert chunks.headings[hits[0][0]] == "Later"
+
+
+def test_backend_picks_up_a_newer_index(vault_env):
+    vault, sync, _ = vault_env
+    sync()
+    backend = LocalBackend()
+    assert backend.search(["zebra"], limit=1)[0][0][0] == "zebra"
+    fingerprint = backend.fingerprint()
+
+    # A watcher syncing in another process publishes a new version, which
+    # cached vector results are stamped with
+    write(vault / "zebras.md", "zebra zebra zoo")
+    sync()
+    assert backend.search(["zebras"], limit=1)[0][0][0] == "zebras"
+    assert backend.fingerprint() != fingerprint
+
+
+def test_search_within_fills_the_limit_from_allowed_notes(vault_env):
+    _, sync, _ = vault_env
+    sync()
+    backend = LocalBackend()
+    # "zebra" is the furthest note from the query, yet the only one allowed
+    assert [t for t, _ in backend.search_within("apple", ["zebra"], 5)] == ["zebra"]
+    hits = backend.search_within("apple", ["zebra", "apples", "gone"], 5)
+    assert [title for title, _ in hits] == ["apples", "zebra"]
+    assert backend.search_within("apple", [], 5) == []
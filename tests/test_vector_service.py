@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from tap.database.chroma import load_vault  # noqa: E402
+from tap.query.embedding_cache import get_query_cache  # noqa: E402
+from tap.services import vector_service  # noqa: E402
+
+
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+        self.queries: list[int] = []
+        self.loops: set[int] = set()
+
+    async def query(self, query_embeddings, n_results, include=None):
+        import asyncio
+
+        self.loops.add(id(asyncio.get_running_loop()))
+        self.queries.append(len(query_embeddings))
+        rows = range(len(query_embeddings))
+        ids = [[f"Note {i}#{j}" for j in range(n_results)] for i in rows]
+        return {
+            "ids": ids,
+            "distances": [[0.1 * j for j in range(n_results)] for _ in rows],
+            "documents": [[f"text {j}" for j in range(n_results)] for _ in rows],
+            "metadatas": [
+                [{"note": f"Note {i}", "heading": "H"} for _ in range(n_results)]
+                for i in rows
+            ],
+        }
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("TAP_CACHE_DIR", str(tmp_path))
+    get_query_cache.cache_clear()
+    collections: dict[str, FakeCollection] = {}
+    opened: list[str] = []
+
+    async def get_collection(name=load_vault.COLLECTION_NAME):
+        opened.append(name)
+        return collections.setdefault(name, FakeCollection(name))
+
+    monkeypatch.setattr(
+        load_vault, "get_vault_descriptions_collection", get_collection
+    )
+    monkeypatch.setattr(
+        load_vault, "get_embedding_function", lambda: lambda texts: [[1.0]] * len(texts)
+    )
+    monkeypatch.setattr(vector_service, "get_vector_service", lambda: fresh)
+    fresh = vector_service.VectorSearchService()
+    return collections, opened
+
+
+def test_batched_queries_share_one_loop_and_collection(service):
+    collections, opened = service
+    results = vector_service.vector_search_many(["a", "b", "c"], limit=2)
+    assert [[title for title, _ in hits] for hits in results] == [
+        ["Note 0#0", "Note 0#1"],
+        ["Note 1#0", "Note 1#1"],
+        ["Note 2#0", "Note 2#1"],
+    ]
+
+    # Calls from other threads reuse the same event loop and collection handle
+    thread = threading.Thread(target=vector_service.vector_search_many, args=(["d"],))
+    thread.start()
+    thread.join()
+    notes = collections[load_vault.COLLECTION_NAME]
+    assert notes.queries == [3, 1]
+    assert len(notes.loops) == 1
+    assert opened == [load_vault.COLLECTION_NAME]
+    assert vector_service.vector_search_many([]) == []
+
+
+def test_passages_come_back_with_text(service):
+    (passages,) = vector_service.passage_search_many(["query"], limit=2)
+    assert [(p.note, p.heading, p.index, p.text) for p in passages] == [
+        ("Note 0", "H", 0, "text 0"),
+        ("Note 0", "H", 1, "text 1"),
+    ]
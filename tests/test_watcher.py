@@ -0,0 +1,77 @@
+import errno
+import os
+import sys
+
+import pytest
+
+from helpers import write
+from tap.daemon.watcher import (
+    PollingWatcher,
+    acquire_watch_lock,
+    make_watcher,
+    wait_for_changes,
+)
+from tap.database.obsidian.catalog import VaultCatalog, watcher_active
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify")
+def test_inotify_watcher_sees_notes_and_new_directories(tmp_path):
+    vault = tmp_path / "vault"
+    write(vault / "a.md", "alpha")
+    catalog = VaultCatalog.load(vault, tmp_path / "catalog.json")
+    watcher = make_watcher(catalog)
+    try:
+        assert type(watcher).__name__ == "InotifyWatcher"
+        (vault / ".obsidian.json").write_text("{}")
+        assert not watcher.wait(0.2)
+
+        (vault / "projects").mkdir()
+        assert watcher.wait(1)
+        # Files in the new directory are watched too
+        write(vault / "projects" / "b.md", "beta")
+        assert watcher.wait(1)
+        assert not watcher.wait(0.1)
+    finally:
+        watcher.close()
+
+
+def test_polling_watcher_and_watch_lock(tmp_path, monkeypatch):
+    monkeypatch.setenv("TAP_CACHE_DIR", str(tmp_path / "cache"))
+    vault = tmp_path / "vault"
+    write(vault / "a.md", "alpha")
+    catalog = VaultCatalog.load(vault, tmp_path / "catalog.json")
+    watcher = PollingWatcher(catalog, interval=0.05)
+    assert not watcher.wait(0.1)
+    write(vault / "b.md", "beta")
+    assert watcher.wait(1)
+
+    assert not watcher_active()
+    lock = acquire_watch_lock()
+    assert lock is not None
+    try:
+        assert watcher_active()
+        assert acquire_watch_lock() is None
+    finally:
+        os.close(lock)
+    assert not watcher_active()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify")
+def test_watcher_falls_back_to_polling_when_out_of_watches(tmp_path, monkeypatch):
+    vault = tmp_path / "vault"
+    write(vault / "a.md", "alpha")
+    catalog = VaultCatalog.load(vault, tmp_path / "catalog.json")
+    watcher = make_watcher(catalog)
+    try:
+
+        def out_of_watches(top):
+            raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+        monkeypatch.setattr(watcher, "_add_tree", out_of_watches)
+        (vault / "projects").mkdir()
+        watcher = wait_for_changes(watcher, catalog, debounce=0.05)
+        assert isinstance(watcher, PollingWatcher)
+        write(vault / "projects" / "b.md", "beta")
+        assert watcher.wait(1)
+    finally:
+        watcher.close()